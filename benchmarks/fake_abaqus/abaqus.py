@@ -0,0 +1,283 @@
+# -*- coding: utf-8 -*-
+"""Stand-in for the Abaqus CAE kernel (``mdb``/``session``).
+
+Model objects keep the mesh and the regions the relaxation backend builds
+(parts, nodes, elements, sets, surfaces, instances) with real behaviour;
+every other CAE command (materials, sections, steps, loads, fields) is
+accepted and recorded. ``Job.writeInput`` writes a deck with the part mesh
+so the INP modifier can run on it: comma-separated data lines like Abaqus,
+node coordinates with 9 significant digits.
+"""
+import numpy as np
+
+from abaqusConstants import OFF
+
+# CAE face -> local node pair of a 4-node element.
+FACE_NODES = {1: (0, 1), 2: (1, 2), 3: (2, 3), 4: (3, 0)}
+
+
+class _Recorder(object):
+    """Accepts any CAE command or attribute chain; ``calls`` keeps the (name, kwargs) received."""
+
+    def __init__(self, name=""):
+        self._name = name
+        self.calls = []
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+
+        child = _Recorder(name)
+        setattr(self, name, child)
+        return child
+
+    def __call__(self, *args, **kwargs):
+        self.calls.append((self._name, kwargs))
+        return _Recorder(self._name)
+
+    def __getitem__(self, key):
+        return _Recorder(str(key))
+
+
+class MeshNode(object):
+    __slots__ = ("label", "coordinates", "index")
+
+    def __init__(self, label, coordinates, index):
+        self.label = label
+        self.coordinates = coordinates
+        self.index = index
+
+
+class MeshElement(object):
+    __slots__ = ("label", "type", "node_indices", "index")
+
+    def __init__(self, label, element_type, node_indices, index):
+        self.label = label
+        self.type = element_type
+        self.node_indices = node_indices
+        self.index = index
+
+    @property
+    def connectivity(self):
+        return self.node_indices
+
+
+class MeshArray(list):
+    """Node or element sequence with ``getByBoundingBox``, vectorized over the part arrays."""
+
+    def __init__(self, items=(), owner=None):
+        list.__init__(self, items)
+        self.owner = owner
+
+    def __getitem__(self, index):
+        result = list.__getitem__(self, index)
+        return MeshArray(result, self.owner) if isinstance(index, slice) else result
+
+    def getByBoundingBox(self, xMin=-np.inf, yMin=-np.inf, zMin=-np.inf, xMax=np.inf, yMax=np.inf, zMax=np.inf):
+        if not self:
+            return MeshArray((), self.owner)
+
+        lower = np.array([xMin, yMin, zMin], dtype=np.float64)
+        upper = np.array([xMax, yMax, zMax], dtype=np.float64)
+        coords = self.owner.node_coords()
+
+        if isinstance(list.__getitem__(self, 0), MeshNode):
+            points = coords[np.fromiter((item.index for item in self), dtype=np.int64, count=len(self))]
+            inside = np.all((points >= lower) & (points <= upper), axis=1)
+        else:
+            rows = np.fromiter((item.index for item in self), dtype=np.int64, count=len(self))
+            points = coords[self.owner.element_node_rows()[rows]]
+            inside = np.all((points >= lower) & (points <= upper), axis=(1, 2))
+
+        return MeshArray([item for item, keep in zip(self, inside.tolist()) if keep], self.owner)
+
+
+class Region(object):
+    def __init__(self, name, nodes=None, elements=None):
+        self.name = name
+        self.nodes = nodes if nodes is not None else MeshArray()
+        self.elements = elements if elements is not None else MeshArray()
+
+
+class Part(_Recorder):
+    def __init__(self, name, dimensionality=None, type=None):
+        _Recorder.__init__(self, name)
+        self.name = name
+        self.nodes = MeshArray(owner=self)
+        self.elements = MeshArray(owner=self)
+        self.sets = {}
+        self._coords = None
+        self._element_rows = None
+
+    def Node(self, coordinates, label=None):
+        node = MeshNode(label if label is not None else len(self.nodes) + 1, tuple(coordinates), len(self.nodes))
+        list.append(self.nodes, node)
+        self._coords = None
+        return node
+
+    def Element(self, nodes, elemShape=None, label=None):
+        element = MeshElement(label if label is not None else len(self.elements) + 1, elemShape,
+                              tuple(node.index for node in nodes), len(self.elements))
+        list.append(self.elements, element)
+        self._element_rows = None
+        return element
+
+    def Set(self, name, nodes=None, elements=None):
+        self.sets[name] = Region(name, nodes, elements)
+        return self.sets[name]
+
+    def node_coords(self):
+        if self._coords is None or len(self._coords) != len(self.nodes):
+            self._coords = np.array([node.coordinates for node in self.nodes], dtype=np.float64).reshape(-1, 3)
+        return self._coords
+
+    def element_node_rows(self):
+        if self._element_rows is None or len(self._element_rows) != len(self.elements):
+            self._element_rows = np.array([element.node_indices for element in self.elements],
+                                          dtype=np.int64).reshape(len(self.elements), -1)
+        return self._element_rows
+
+
+class PartInstance(object):
+    def __init__(self, name, part):
+        self.name = name
+        self.part = part
+        self.nodes = MeshArray(part.nodes, part)
+        self.elements = MeshArray(part.elements, part)
+
+
+class Assembly(_Recorder):
+    def __init__(self):
+        _Recorder.__init__(self, "rootAssembly")
+        self.instances = {}
+        self.sets = {}
+        self.surfaces = {}
+
+    def Instance(self, name, part, dependent=None):
+        self.instances[name] = PartInstance(name, part)
+        return self.instances[name]
+
+    def Set(self, name, nodes=None, elements=None):
+        self.sets[name] = Region(name, nodes, elements)
+        return self.sets[name]
+
+    def Surface(self, name, **faces):
+        elements = MeshArray()
+        node_rows = []
+        part = None
+        for face, face_elements in sorted(faces.items()):
+            number = int(face[len('face')])
+            if not face_elements:
+                continue
+            part = face_elements.owner
+            rows = np.fromiter((element.index for element in face_elements), dtype=np.int64,
+                               count=len(face_elements))
+            node_rows.append(part.element_node_rows()[rows][:, FACE_NODES[number]].ravel())
+            list.extend(elements, face_elements)
+
+        nodes = MeshArray(owner=part)
+        if node_rows:
+            list.extend(nodes, [part.nodes[int(row)] for row in np.unique(np.concatenate(node_rows)).tolist()])
+        elements.owner = part
+
+        self.surfaces[name] = Region(name, nodes, elements)
+        return self.surfaces[name]
+
+
+class Model(_Recorder):
+    def __init__(self, name, modelType=None):
+        _Recorder.__init__(self, name)
+        self.name = name
+        self.parts = {}
+        self.materials = {}
+        self.steps = {'Initial': _Recorder('Initial')}
+        self.fields = {}
+        self.predefinedFields = {}
+        self.boundaryConditions = {}
+        self.interactions = {}
+        self.rootAssembly = Assembly()
+
+    def Part(self, name, dimensionality=None, type=None):
+        self.parts[name] = Part(name, dimensionality, type)
+        return self.parts[name]
+
+    def Material(self, name, **kwargs):
+        self.materials[name] = _Recorder(name)
+        return self.materials[name]
+
+    def CoupledTempDisplacementStep(self, name, **kwargs):
+        self.steps[name] = _Recorder(name)
+        self.steps[name].calls.append(('CoupledTempDisplacementStep', kwargs))
+        return self.steps[name]
+
+    def MappedField(self, name, **kwargs):
+        self.fields[name] = kwargs
+        return kwargs
+
+    def Temperature(self, name, **kwargs):
+        self.predefinedFields[name] = kwargs
+        return kwargs
+
+    def DisplacementBC(self, name, **kwargs):
+        self.boundaryConditions[name] = kwargs
+        return kwargs
+
+    def FilmCondition(self, name, **kwargs):
+        self.interactions[name] = kwargs
+        return kwargs
+
+
+class Job(object):
+    def __init__(self, name, model, **kwargs):
+        self.name = name
+        self.model = model
+        self.options = kwargs
+
+    def writeInput(self, consistencyChecking=OFF):
+        model = mdb.models[self.model]
+        with open(self.name + ".inp", 'w') as f:
+            f.write("*Heading\n** Job name: {0} Model name: {0}\n".format(self.name))
+            for part in model.parts.values():
+                f.write("*Part, name={}\n*Node\n".format(part.name))
+                labels = np.array([node.label for node in part.nodes], dtype=np.float64)
+                coords = part.node_coords()
+                np.savetxt(f, np.column_stack([labels, coords[:, :2]]), fmt="%d, %.9g, %.9g")
+
+                f.write("*Element, type=CPE4RT\n")
+                node_labels = labels.astype(np.int64)[part.element_node_rows()]
+                element_labels = np.array([element.label for element in part.elements], dtype=np.int64)
+                np.savetxt(f, np.column_stack([element_labels, node_labels]), fmt="%d", delimiter=", ")
+                f.write("*End Part\n")
+
+            f.write("*Assembly, name=Assembly\n")
+            for instance in model.rootAssembly.instances.values():
+                f.write("*Instance, name={}, part={}\n*End Instance\n".format(instance.name, instance.part.name))
+            f.write("*End Assembly\n")
+
+            if model.predefinedFields:
+                f.write("** PREDEFINED FIELDS\n")
+                for name in model.predefinedFields:
+                    f.write("** Name: {}   Type: Temperature\n".format(name))
+            for name in model.steps:
+                if name != 'Initial':
+                    f.write("*Step, name={}, nlgeom=NO, inc=1000\n*End Step\n".format(name))
+
+
+class Mdb(object):
+    def __init__(self):
+        self.models = {'Model-1': Model('Model-1')}
+        self.jobs = {}
+
+    def Model(self, name, modelType=None, **kwargs):
+        self.models[name] = Model(name, modelType)
+        return self.models[name]
+
+    def Job(self, name, model, **kwargs):
+        self.jobs[name] = Job(name, model, **kwargs)
+        return self.jobs[name]
+
+
+mdb = Mdb()
+session = _Recorder("session")
+
+__all__ = ['mdb', 'session']
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""Stand-in for the Abaqus ``abaqusConstants`` module: every constant the framework uses."""
+
+
+class SymbolicConstant(str):
+    def __repr__(self):
+        return self
+
+
+class Boolean(SymbolicConstant):
+    def __bool__(self):
+        return self == 'ON'
+
+    __nonzero__ = __bool__
+
+
+ON = Boolean('ON')
+OFF = Boolean('OFF')
+
+_NAMES = (
+    # Output positions and field types.
+    'NODAL', 'INTEGRATION_POINT', 'CENTROID', 'ELEMENT_NODAL', 'WHOLE_ELEMENT',
+    'SCALAR', 'VECTOR', 'TENSOR_3D_FULL', 'TENSOR_3D_PLANAR', 'TENSOR_2D_PLANAR',
+    # Invariants.
+    'MISES', 'TRESCA', 'PRESS', 'INV3', 'MAX_PRINCIPAL', 'MID_PRINCIPAL', 'MIN_PRINCIPAL', 'MAGNITUDE',
+    # Model building.
+    'CARTESIAN', 'TWO_D_PLANAR', 'THREE_D', 'DEFORMABLE_BODY', 'QUAD4', 'CPE4RT', 'STANDARD',
+    'STANDARD_EXPLICIT', 'MIDDLE_SURFACE', 'FROM_SECTION', 'JOHNSON_COOK', 'TABULAR', 'DISPLACEMENT',
+    'TEMPERATURE', 'EMBEDDED_COEFF', 'UNIFORM', 'UNSET', 'SET', 'XYZ', 'POINT', 'FIELD',
+    'CONSTANT_THROUGH_THICKNESS', 'SINGLE', 'DOUBLE', 'PERCENTAGE', 'DEFAULT', 'ODB', 'ANALYSIS',
+)
+
+for _name in _NAMES:
+    globals()[_name] = SymbolicConstant(_name)
+del _name
+
+__all__ = ['ON', 'OFF'] + list(_NAMES)
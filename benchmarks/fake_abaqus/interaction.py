@@ -0,0 +1,2 @@
+# -*- coding: utf-8 -*-
+"""Stand-in for the Abaqus CAE module `interaction`: its commands live on the `abaqus.mdb` objects."""
@@ -0,0 +1,12 @@
+# -*- coding: utf-8 -*-
+"""Stand-in for the Abaqus CAE module ``mesh``."""
+
+
+class ElemType(object):
+    def __init__(self, elemCode=None, elemLibrary=None, **kwargs):
+        self.elemCode = elemCode
+        self.elemLibrary = elemLibrary
+        self.options = kwargs
+
+
+__all__ = ['ElemType']
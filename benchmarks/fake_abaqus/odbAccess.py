@@ -0,0 +1,324 @@
+# -*- coding: utf-8 -*-
+"""Stand-in for the Abaqus ``odbAccess`` module, backed by ``synthetic``.
+
+Only the part of the ODB object model the framework uses is reproduced:
+``rootAssembly.instances``, instance ``nodes``/``elements``/sets, ``steps``,
+``frames`` and ``fieldOutputs`` with ``getSubset``, ``getScalarField``,
+``values`` and ``bulkDataBlocks``. Field data is generated per frame on first access.
+
+Precision of the stand-in data: node ``coordinates`` are float64 (the mesh
+of ``synthetic``); every field output is float32, like the single precision
+output of Abaqus: NT11, COORD (the node coordinates rounded to float32, the
+Eulerian mesh does not move), S, PE, PEEQ and EVF.
+"""
+import numpy as np
+
+from abaqusConstants import INTEGRATION_POINT, MAGNITUDE, MISES, NODAL, PRESS, SCALAR, TENSOR_3D_FULL, VECTOR
+from synthetic import SyntheticMesh, element_fields, node_temperature, read_spec
+
+
+class OdbError(Exception):
+    pass
+
+
+class OdbMeshNode(object):
+    __slots__ = ("label", "coordinates", "instanceName")
+
+    def __init__(self, label, coordinates, instance_name):
+        self.label = label
+        self.coordinates = coordinates
+        self.instanceName = instance_name
+
+
+class OdbMeshElement(object):
+    __slots__ = ("label", "connectivity", "type", "instanceName")
+
+    def __init__(self, label, connectivity, element_type, instance_name):
+        self.label = label
+        self.connectivity = connectivity
+        self.type = element_type
+        self.instanceName = instance_name
+
+
+class _MeshArray(object):
+    """Sequence of mesh objects built on access, like the ODB repositories."""
+
+    def __init__(self, count, build):
+        self._count = count
+        self._build = build
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._build(i) for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        return self._build(index)
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self._build(i)
+
+
+class OdbSet(object):
+    def __init__(self, name, instance, node_labels=None, element_labels=None):
+        self.name = name
+        self.instance = instance
+        self.node_labels = None if node_labels is None else np.unique(np.asarray(node_labels, dtype=np.int64))
+        self.element_labels = None if element_labels is None else np.unique(np.asarray(element_labels, dtype=np.int64))
+
+    @property
+    def nodes(self):
+        rows = self.node_labels - 1
+        return [self.instance.nodes[int(row)] for row in rows]
+
+    @property
+    def elements(self):
+        rows = self.element_labels - 1
+        return [self.instance.elements[int(row)] for row in rows]
+
+
+class OdbInstance(object):
+    def __init__(self, name, mesh):
+        self.name = name
+        self.mesh = mesh
+        self.embeddedSpace = 'THREE_D'
+        element_type = mesh.spec["element_type"]
+
+        coords = mesh.coords
+        connectivity = mesh.connectivity
+        self.nodes = _MeshArray(
+            mesh.n_nodes,
+            lambda i: OdbMeshNode(int(mesh.labels[i]), tuple(coords[i].tolist()), name))
+        self.elements = _MeshArray(
+            mesh.n_elements,
+            lambda i: OdbMeshElement(int(mesh.element_labels[i]), tuple(connectivity[i].tolist()),
+                                     element_type, name))
+
+        workpiece_elements = mesh.element_labels[mesh.workpiece]
+        self.nodeSets = {}
+        self.elementSets = {
+            mesh.spec["node_set_name"]: OdbSet(mesh.spec["node_set_name"], self, element_labels=workpiece_elements),
+        }
+
+    def NodeSetFromNodeLabels(self, name, nodeLabels):
+        if name in self.nodeSets:
+            raise OdbError("Set {} already exists.".format(name))
+        self.nodeSets[name] = OdbSet(name, self, node_labels=nodeLabels)
+        return self.nodeSets[name]
+
+    def ElementSetFromElementLabels(self, name, elementLabels):
+        if name in self.elementSets:
+            raise OdbError("Set {} already exists.".format(name))
+        self.elementSets[name] = OdbSet(name, self, element_labels=elementLabels)
+        return self.elementSets[name]
+
+    def region_node_labels(self, region):
+        if region is self:
+            return self.mesh.labels
+        if region.node_labels is not None:
+            return region.node_labels
+        connectivity = self.mesh.connectivity[region.element_labels - 1]
+        return np.unique(connectivity)
+
+    def region_element_labels(self, region):
+        if region is self:
+            return self.mesh.element_labels
+        if region.element_labels is not None:
+            return region.element_labels
+        return np.array([], dtype=np.int64)
+
+
+class OdbAssembly(object):
+    def __init__(self, instances):
+        self.instances = instances
+        self.nodeSets = {}
+        self.elementSets = {}
+
+
+class FieldValue(object):
+    __slots__ = ("nodeLabel", "elementLabel", "data", "instance", "position")
+
+    def __init__(self, node_label, element_label, data, instance, position):
+        self.nodeLabel = node_label
+        self.elementLabel = element_label
+        self.data = data
+        self.instance = instance
+        self.position = position
+
+
+class FieldBulkData(object):
+    def __init__(self, instance, position, labels, data, entity, element_type):
+        self.instance = instance
+        self.position = position
+        self.data = data
+        self.baseElementType = element_type
+        if entity == 'nodes':
+            self.nodeLabels = labels
+            self.elementLabels = None
+        else:
+            self.nodeLabels = None
+            self.elementLabels = labels
+        self.integrationPoints = None if entity == 'nodes' else np.ones(len(labels), dtype=np.int32)
+
+
+class FieldOutput(object):
+    def __init__(self, name, description, position, field_type, component_labels, instance, labels, data):
+        self.name = name
+        self.description = description
+        self.position = position
+        self.type = field_type
+        self.componentLabels = component_labels
+        self.instance = instance
+        self.labels = labels
+        self.data = data
+
+    @property
+    def entity(self):
+        return 'nodes' if self.position == NODAL else 'elements'
+
+    def getSubset(self, region=None, position=None):
+        if region is None:
+            return self
+
+        if self.entity == 'nodes':
+            keep = np.isin(self.labels, self.instance.region_node_labels(region))
+        else:
+            keep = np.isin(self.labels, self.instance.region_element_labels(region))
+
+        return FieldOutput(self.name, self.description, self.position, self.type, self.componentLabels,
+                           self.instance, self.labels[keep], self.data[keep])
+
+    def getScalarField(self, componentLabel=None, invariant=None):
+        """One component, or MISES / PRESS / MAGNITUDE, as a scalar field; other invariants are not generated."""
+        data = np.asarray(self.data, dtype=np.float64)
+        if componentLabel is not None:
+            values = data[:, list(self.componentLabels).index(componentLabel)]
+        elif invariant == MAGNITUDE:
+            values = np.sqrt((data ** 2).sum(axis=1))
+        elif invariant in (MISES, PRESS) and data.shape[1] == 6:
+            pressure = -data[:, :3].mean(axis=1)
+            deviator = data[:, :3] + pressure[:, None]
+            values = pressure if invariant == PRESS else np.sqrt(
+                1.5 * (deviator ** 2).sum(axis=1) + 3.0 * (data[:, 3:] ** 2).sum(axis=1))
+        else:
+            raise OdbError("Invariant {} is not available for {}.".format(invariant, self.name))
+
+        name = componentLabel or "{} {}".format(self.name, invariant)
+        return FieldOutput(name, self.description, self.position, SCALAR, (), self.instance,
+                           self.labels, values[:, None].astype(self.data.dtype))
+
+    @property
+    def bulkDataBlocks(self):
+        if len(self.labels) == 0:
+            return []
+        return [FieldBulkData(self.instance, self.position, self.labels, self.data, self.entity,
+                              self.instance.mesh.spec["element_type"])]
+
+    @property
+    def values(self):
+        nodes = self.entity == 'nodes'
+        scalar = self.data.shape[1] == 1
+        result = []
+        for label, row in zip(self.labels.tolist(), self.data):
+            data = float(row[0]) if scalar else tuple(row.tolist())
+            result.append(FieldValue(label if nodes else None, None if nodes else label,
+                                     data, self.instance, self.position))
+        return result
+
+
+TENSOR_COMPONENTS = ('11', '22', '33', '12', '13', '23')
+
+
+class _FieldOutputs(object):
+    """``frame.fieldOutputs``: the fields of a frame, generated when first read."""
+
+    def __init__(self, frame):
+        self._frame = frame
+        self._fields = None
+
+    def _load(self):
+        if self._fields is not None:
+            return self._fields
+
+        frame = self._frame
+        instance = frame.instance
+        mesh = instance.mesh
+        suffix = mesh.spec["material_suffix"]
+        index = frame.incrementNumber
+
+        fields = {}
+        fields['NT11'] = FieldOutput('NT11', 'Nodal temperature', NODAL, SCALAR, (), instance,
+                                     mesh.labels, node_temperature(mesh, index))
+        if mesh.spec.get("coord_output", True):
+            fields['COORD'] = FieldOutput('COORD', 'Coordinates', NODAL, VECTOR, ('COOR1', 'COOR2', 'COOR3'),
+                                          instance, mesh.labels, mesh.coords.astype(np.float32))
+
+        rows, values = element_fields(mesh, index)
+        labels = mesh.element_labels[rows]
+        for name, data in values.items():
+            tensor = data.shape[1] == 6
+            components = tuple(name + c for c in TENSOR_COMPONENTS) if tensor else ()
+            full_name = "{}_{}".format(name, suffix)
+            fields[full_name] = FieldOutput(full_name, name, INTEGRATION_POINT,
+                                            TENSOR_3D_FULL if tensor else SCALAR, components,
+                                            instance, labels, data)
+
+        self._fields = fields
+        return fields
+
+    def keys(self):
+        return list(self._load().keys())
+
+    def __getitem__(self, name):
+        return self._load()[name]
+
+    def __contains__(self, name):
+        return name in self._load()
+
+    def has_key(self, name):
+        return name in self._load()
+
+
+class OdbFrame(object):
+    def __init__(self, instance, index, frame_value):
+        self.instance = instance
+        self.incrementNumber = index
+        self.frameId = index
+        self.frameValue = frame_value
+        self.description = "Increment {}: Step Time = {:.4g}".format(index, frame_value)
+        self.fieldOutputs = _FieldOutputs(self)
+
+
+class OdbStep(object):
+    def __init__(self, name, instance, frame_count):
+        self.name = name
+        self.frames = [OdbFrame(instance, i, i * 1e-4) for i in range(frame_count)]
+
+
+class Odb(object):
+    def __init__(self, path, spec):
+        self.path = path
+        self.name = path
+        self.spec = spec
+
+        mesh = SyntheticMesh(spec)
+        instance = OdbInstance(spec["instance_name"], mesh)
+        self.rootAssembly = OdbAssembly({instance.name: instance})
+        self.steps = {spec["step_name"]: OdbStep(spec["step_name"], instance, spec["frames"])}
+        self.isClosed = False
+
+    def save(self):
+        pass
+
+    def close(self):
+        self.isClosed = True
+
+
+def openOdb(path, readOnly=False, readInternalSets=False):
+    """Builds the synthetic ODB described by the JSON spec at ``path``."""
+    return Odb(path, read_spec(path))
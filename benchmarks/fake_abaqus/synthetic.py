@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""Synthetic Eulerian cutting meshes and fields for the fake Abaqus modules.
+
+An ODB "file" is a small JSON spec; ``openOdb`` regenerates the mesh and the
+fields from it, so benchmarks never store large files. The mesh is one EC3D8RT
+element thick in Y, like the orthogonal-cutting models the framework reads:
+the workpiece fills the lower part of the domain in Z and the void above it.
+"""
+import json
+import math
+
+import numpy as np
+
+
+DEFAULT_SPEC = {
+    "instance_name": "EULERIAN-1",
+    "step_name": "orthogonalCutting",
+    "node_set_name": "SETINITWP",
+    "material_suffix": "ASSEMBLY_EULERIAN-1_DA718_PENG20-1",
+    "element_type": "EC3D8RT",
+    "ele_size": 5e-3,
+    "nodes_x": 11,
+    "nodes_z": 11,
+    "thickness": 0.05,
+    "workpiece_fraction": 0.8,
+    "frames": 3,
+    "coord_output": True,
+}
+
+
+def spec_for_nodes(target_nodes, **overrides):
+    """Returns a spec whose instance has about ``target_nodes`` nodes (two Y layers)."""
+    per_layer = max(4, int(target_nodes) // 2)
+    nodes_x = max(2, int(round(math.sqrt(per_layer * 2.0))))
+    nodes_z = max(2, int(round(per_layer / float(nodes_x))))
+
+    spec = dict(DEFAULT_SPEC)
+    spec.update(nodes_x=nodes_x, nodes_z=nodes_z)
+    spec.update(overrides)
+    return spec
+
+
+def write_spec(path, spec):
+    with open(path, 'w') as f:
+        json.dump(spec, f, indent=4)
+
+
+def read_spec(path):
+    with open(path, 'r') as f:
+        spec = dict(DEFAULT_SPEC)
+        spec.update(json.load(f))
+        return spec
+
+
+def zoi_config(spec, odb_path, margin=0.1, evf_threshold=None):
+    """Returns an ``odb_config.json`` entry whose ZOI is the workpiece minus ``margin`` in X."""
+    e = spec["ele_size"]
+    width = (spec["nodes_x"] - 1) * e
+    top = workpiece_top(spec)
+
+    return {
+        "odb_path": odb_path,
+        "step_index": 0,
+        "step_name": spec["step_name"],
+        "frame_target": -1,
+        "frames": None,
+        "instance_name": spec["instance_name"],
+        "node_set_name": spec["node_set_name"],
+        "zoi_coordinates": {
+            "x1": margin * width, "x2": (1.0 - margin) * width,
+            "y1": -0.01, "y2": 0.01,
+            "z1": 0.0, "z2": top,
+            "tolerance": e / 2.0,
+        },
+        "ele_size": e,
+        "evf_threshold": evf_threshold,
+        "field_precision": "float64",
+        "fields": [
+            {"name": "S", "position": "integration_point", "components": ["S11", "S22", "S33", "S13"]},
+            {"name": "PEEQ", "position": "integration_point"},
+            {"name": "PE", "position": "integration_point"},
+            {"name": "NT11", "position": "node"},
+        ],
+    }
+
+
+def workpiece_top(spec):
+    rows = int(round((spec["nodes_z"] - 1) * spec["workpiece_fraction"]))
+    return rows * spec["ele_size"]
+
+
+class SyntheticMesh(object):
+    """Node and element arrays of the synthetic Eulerian instance.
+
+    Nodes are numbered layer by layer (y = 0, then y = -thickness), row by row
+    in Z; elements are numbered row by row and follow the EC3D8RT node order.
+    """
+
+    def __init__(self, spec):
+        self.spec = spec
+        nx = spec["nodes_x"]
+        nz = spec["nodes_z"]
+        e = spec["ele_size"]
+        per_layer = nx * nz
+
+        self.labels = np.arange(1, 2 * per_layer + 1, dtype=np.int64)
+
+        ix = np.tile(np.arange(nx), nz)
+        iz = np.repeat(np.arange(nz), nx)
+        coords = np.empty((2 * per_layer, 3), dtype=np.float64)
+        coords[:per_layer, 0] = ix * e
+        coords[:per_layer, 1] = 0.0
+        coords[:per_layer, 2] = iz * e
+        coords[per_layer:] = coords[:per_layer]
+        coords[per_layer:, 1] = -spec["thickness"]
+        self.coords = coords
+
+        ex = np.tile(np.arange(nx - 1), nz - 1)
+        ez = np.repeat(np.arange(nz - 1), nx - 1)
+        first = ez * nx + ex + 1
+        front = np.column_stack([first, first + 1, first + nx + 1, first + nx])
+        self.connectivity = np.hstack([front, front + per_layer])
+        self.element_labels = np.arange(1, len(first) + 1, dtype=np.int64)
+
+        top_row = int(round((nz - 1) * spec["workpiece_fraction"]))
+        self.element_rows_z = ez
+        self.workpiece = ez < top_row
+
+    @property
+    def n_nodes(self):
+        return len(self.labels)
+
+    @property
+    def n_elements(self):
+        return len(self.element_labels)
+
+    def centroids(self):
+        return self.coords[self.connectivity - 1].mean(axis=1)
+
+
+def node_temperature(mesh, frame):
+    """NT11: a hot spot near the tool tip that cools down with the frame index."""
+    x = mesh.coords[:, 0]
+    z = mesh.coords[:, 2]
+    x_tip = x.max() * 0.5
+    z_tip = z.max() * mesh.spec["workpiece_fraction"]
+    scale = 10.0 * mesh.spec["ele_size"]
+    hot = 800.0 * np.exp(-((x - x_tip) ** 2 + (z - z_tip) ** 2) / (scale * scale))
+    return (25.0 + hot / (1.0 + frame)).astype(np.float32)[:, None]
+
+
+def element_fields(mesh, frame):
+    """Returns ``{suffix-less name: (n_workpiece x k) float32}`` for the workpiece elements."""
+    rows = np.nonzero(mesh.workpiece)[0]
+    c = mesh.centroids()[rows]
+    depth = (c[:, 2].max() - c[:, 2]) / max(c[:, 2].max(), 1e-12)
+    wave = np.sin(c[:, 0] / (25.0 * mesh.spec["ele_size"]))
+    decay = 1.0 / (1.0 + frame)
+
+    peeq = (0.5 * np.exp(-8.0 * depth) * (1.0 + 0.1 * wave)).astype(np.float32)
+    stress = np.empty((len(rows), 6), dtype=np.float32)
+    stress[:, 0] = -900.0 * np.exp(-6.0 * depth) * decay + 50.0 * wave
+    stress[:, 1] = 0.3 * stress[:, 0]
+    stress[:, 2] = -400.0 * np.exp(-6.0 * depth) * decay
+    stress[:, 3] = 5.0 * wave
+    stress[:, 4] = -120.0 * np.exp(-6.0 * depth) * decay
+    stress[:, 5] = 2.0 * wave
+    plastic = np.empty((len(rows), 6), dtype=np.float32)
+    plastic[:, 0] = 0.6 * peeq
+    plastic[:, 1] = -0.3 * peeq
+    plastic[:, 2] = -0.3 * peeq
+    plastic[:, 3:] = 0.1 * peeq[:, None]
+
+    evf = np.ones(len(rows), dtype=np.float32)
+    top = mesh.element_rows_z[rows] == mesh.element_rows_z[rows].max()
+    evf[top] = 0.5 + 0.5 * np.abs(wave[top]).astype(np.float32)
+
+    return rows, {
+        "PEEQ": peeq[:, None],
+        "PE": plastic,
+        "S": stress,
+        "EVF": evf[:, None],
+    }
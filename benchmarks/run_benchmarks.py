@@ -0,0 +1,363 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARKS_PATH = os.path.dirname(os.path.abspath(__file__))
+FRAMEWORK_PATH = os.path.dirname(BENCHMARKS_PATH)
+FAKE_ABAQUS_PATH = os.path.join(BENCHMARKS_PATH, "fake_abaqus")
+RESULTS_PATH = os.path.join(BENCHMARKS_PATH, "results")
+CONFIG_PATH = os.path.join(FRAMEWORK_PATH, "config")
+# Small synthetic ZOI and the ImplicitRelaxation deck of it in the Abaqus/CAE layout (CAE + INP modifier).
+REFERENCE_PATH = os.path.join(BENCHMARKS_PATH, "reference")
+REFERENCE_DECK = "ImplicitRelaxation_modified.inp"
+
+ODB_NAME = "SYNTHETIC"
+SIZES = ("10k", "100k", "1M", "10M")
+# Extraction always runs: the other stages read the arrays it writes.
+STAGES = ("relaxation_model", "inp_modifier", "inp_writer")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Times the framework stages on synthetic Eulerian ODBs, one process per size."
+    )
+    parser.add_argument("--sizes", nargs="*", default=list(SIZES), help="instance node counts (e.g. 10k 1M 2500000)")
+    parser.add_argument(
+        "--stages", nargs="*", default=list(STAGES), choices=STAGES,
+        help="stages run after the extraction (inp_modifier needs relaxation_model)"
+    )
+    parser.add_argument(
+        "--evf-threshold", type=float, default=None,
+        help="evf_threshold of the ZOI: drop the elements whose material volume fraction is below it"
+    )
+    parser.add_argument(
+        "--check", action="store_true",
+        help="check that the extracted ZOI nodes match the node loop of the original extractor exactly and "
+             "that inp_writer.py writes the reference deck of benchmarks/reference"
+    )
+    parser.add_argument("--label", default=None, help="results name (default: the current git commit)")
+    parser.add_argument("--keep", action="store_true", help="keep the work directories of every size")
+    parser.add_argument(
+        "--compare", nargs=2, metavar=("BASE", "NEW"), default=None,
+        help="compare two results files instead of running the benchmarks"
+    )
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--size", type=int, default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.check and args.evf_threshold is not None:
+        parser.error("--check compares the ZOI without the volume fraction filter; drop --evf-threshold")
+    return args
+
+
+def parse_size(text):
+    text = str(text).strip().lower()
+    factor = {"k": 10 ** 3, "m": 10 ** 6}.get(text[-1:], 1)
+    number = text[:-1] if factor > 1 else text
+    return int(float(number) * factor)
+
+
+def git_label():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=FRAMEWORK_PATH, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], cwd=FRAMEWORK_PATH,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return time.strftime("local_%Y%m%d_%H%M%S")
+    return commit + ("-dirty" if dirty else "")
+
+
+def relaxation_model_config(odb_config):
+    with open(os.path.join(CONFIG_PATH, "model_config.json"), 'r') as file:
+        model_config = json.load(file)
+
+    model_config["generalInformation"]["odbOrtCutName"] = ODB_NAME
+    part = model_config["partData"]["createPartInformation"]
+    part["Dimensions"] = odb_config["zoi_coordinates"]
+    part["eleSize"] = odb_config["ele_size"]
+    return model_config
+
+
+def baseline_zoi_nodes(instance, zoi):
+    """Labels and coordinates of the ZOI nodes selected like the original extractor: one loop over instance.nodes."""
+    bounds = [sorted([zoi[axis + "1"], zoi[axis + "2"]]) for axis in "xyz"]
+    tolerance = zoi["tolerance"]
+    labels, coords = [], []
+    for node in instance.nodes:
+        if all(low - tolerance <= value <= high + tolerance for value, (low, high) in zip(node.coordinates, bounds)):
+            labels.append(node.label)
+            coords.append(tuple(float(value) for value in node.coordinates))
+    return labels, coords
+
+
+def check_zoi_nodes(odb_path, odb_config, mesh):
+    """Raises when the ZOI node labels or coordinates differ from the original extractor's, bit for bit."""
+    import numpy as np
+    from odbAccess import openOdb
+
+    odb = openOdb(odb_path, readOnly=True)
+    try:
+        labels, coords = baseline_zoi_nodes(odb.rootAssembly.instances[odb_config["instance_name"]],
+                                            odb_config["zoi_coordinates"])
+    finally:
+        odb.close()
+
+    if not np.array_equal(mesh.labels, np.asarray(labels, dtype=np.int64)):
+        raise AssertionError(f"ZOI node labels differ from the original extractor "
+                             f"({mesh.n_nodes} extracted, {len(labels)} expected)")
+    different = np.any(mesh.coords != np.asarray(coords, dtype=np.float64).reshape(-1, 3), axis=1)
+    if different.any():
+        raise AssertionError(f"Coordinates of {int(different.sum())} ZOI nodes differ from the original extractor "
+                             f"(first: node {mesh.labels[different][0]})")
+    return len(labels)
+
+
+def add_framework_paths():
+    for path in (os.path.join(FRAMEWORK_PATH, "relaxation"), os.path.join(FRAMEWORK_PATH, "relaxation", "backend"),
+                 os.path.join(FRAMEWORK_PATH, "extraction", "backend"), FRAMEWORK_PATH, FAKE_ABAQUS_PATH):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+
+
+def check_reference_deck(workdir):
+    """Writes the deck of the reference ZOI with inp_writer.py and compares it with the reference deck.
+
+    Returns the list of differences reported by ``compare_decks`` (empty when equivalent).
+    """
+    add_framework_paths()
+    import synthetic
+    from common.array_store import ArrayStore
+    from common.zoi_model import ZoiFields
+    from data_extractor import DataExtractor
+    from inp_writer import RelaxationDeck, compare_decks
+
+    spec = synthetic.read_spec(os.path.join(REFERENCE_PATH, "synthetic.json"))
+    odb_path = os.path.join(workdir, "reference.odb")
+    synthetic.write_spec(odb_path, spec)
+    odb_config = synthetic.zoi_config(spec, odb_path)
+    store_path = os.path.join(workdir, "config", "data")
+    DataExtractor({ODB_NAME: odb_config}, workdir, os.path.join(workdir, "config"), store_path)
+
+    with open(os.path.join(REFERENCE_PATH, "model_config.json"), 'r') as file:
+        model_config = json.load(file)
+    fields = ZoiFields.from_store(ArrayStore(store_path), ODB_NAME, ("S", "PEEQ", "NT11"))
+    inp_path = RelaxationDeck(model_config, fields).write(os.path.join(workdir, "inp_writer"))
+    return compare_decks(os.path.join(REFERENCE_PATH, REFERENCE_DECK), inp_path)
+
+
+def run_size(target_nodes, stages, workdir, evf_threshold=None, check=False):
+    """Runs every stage on one synthetic ODB inside this process; returns the stage records."""
+    add_framework_paths()
+
+    import synthetic
+    from common import tracing
+    from common.array_store import ArrayStore
+    from common.zoi_model import ZoiFields
+    from data_extractor import DataExtractor
+
+    spec = synthetic.spec_for_nodes(target_nodes)
+    odb_path = os.path.join(workdir, "synthetic.odb")
+    synthetic.write_spec(odb_path, spec)
+    odb_config = synthetic.zoi_config(spec, odb_path, evf_threshold=evf_threshold)
+
+    config_dir = os.path.join(workdir, "config")
+    store_path = os.path.join(config_dir, "data")
+    inp_dir = os.path.join(workdir, "inp")
+    os.makedirs(inp_dir, exist_ok=True)
+
+    tracer = tracing.configure(os.path.join(workdir, "trace.jsonl"))
+
+    with tracer.span("extraction"):
+        DataExtractor({ODB_NAME: odb_config}, workdir, config_dir, store_path)
+
+    fields = ZoiFields.from_store(ArrayStore(store_path), ODB_NAME, ("S", "PEEQ", "NT11"))
+    if check:
+        with tracer.span("check_zoi_nodes") as span:
+            span.count(nodes=check_zoi_nodes(odb_path, odb_config, fields.mesh))
+    model_config = relaxation_model_config(odb_config)
+    model_name = model_config["generalInformation"]["modelName"]
+    instance_name = model_config["partData"]["createPartInformation"]["Name"] + "-1"
+
+    if "relaxation_model" in stages:
+        from rename_model import RenameModel
+        from create_material import CreateMaterial
+        from rebuild_mesh import RebuildMesh
+        from assembly_and_simulation import AssemblyModel
+
+        os.environ["BACKEND_PROJECT_PATH"] = workdir
+        os.environ["RELAXATION_INP_PATH"] = inp_dir
+        with tracer.span("relaxation_model"):
+            with tracer.span("rename_model"):
+                RenameModel(model_config)
+            with tracer.span("create_material"):
+                CreateMaterial(model_config)
+            with tracer.span("rebuild_mesh") as span:
+                RebuildMesh(model_config, fields)
+                span.count(nodes=fields.mesh.n_nodes, elements=fields.mesh.n_elements)
+            with tracer.span("assembly_and_inp"):
+                AssemblyModel(model_config, fields)
+
+    if "inp_modifier" in stages and "relaxation_model" in stages:
+        import numpy as np
+        from inp_modifier_initial_conditions import (
+            STRESS_COMPONENTS, add_includes, write_hardening_block, write_stress_block, write_temperature_block
+        )
+
+        mesh = fields.mesh
+        paths = [os.path.join(inp_dir, f"{model_name}_initial_{kind}.inp")
+                 for kind in ("temperature", "stress", "hardening")]
+        with tracer.span("inp_modifier") as span:
+            span.count(values=write_temperature_block(paths[0], instance_name, mesh.labels, np.asarray(fields["NT11"])))
+            span.count(values=write_stress_block(
+                paths[1], instance_name, mesh.element_labels, fields.columns("S", STRESS_COMPONENTS)))
+            span.count(values=write_hardening_block(
+                paths[2], instance_name, mesh.element_labels, np.asarray(fields["PEEQ"])))
+            add_includes(os.path.join(inp_dir, f"{model_name}.inp"),
+                         os.path.join(inp_dir, f"{model_name}_modified.inp"), paths)
+
+    if "inp_writer" in stages:
+        from inp_writer import RelaxationDeck
+
+        with tracer.span("inp_writer") as span:
+            RelaxationDeck(model_config, fields).write(os.path.join(workdir, "inp_writer"))
+            span.count(nodes=fields.mesh.n_nodes, elements=fields.mesh.n_elements)
+
+    result = {
+        "target_nodes": target_nodes,
+        "nodes": 2 * spec["nodes_x"] * spec["nodes_z"],
+        "elements": (spec["nodes_x"] - 1) * (spec["nodes_z"] - 1),
+        "zoi_nodes": fields.mesh.n_nodes,
+        "zoi_elements": fields.mesh.n_elements,
+        "stages": tracer.stages(),
+    }
+    tracer.close()
+    return result
+
+
+def run_worker(args):
+    result = run_size(args.size, args.stages, args.workdir, args.evf_threshold, args.check)
+    with open(os.path.join(args.workdir, "result.json"), 'w') as file:
+        json.dump(result, file)
+
+
+def run_all(args):
+    results = []
+    for size in args.sizes:
+        target_nodes = parse_size(size)
+        workdir = tempfile.mkdtemp(prefix=f"bench_{size}_")
+        print(f"[Benchmark] {size} nodes: {workdir}", flush=True)
+
+        started = time.time()
+        command = [sys.executable, os.path.abspath(__file__), "--worker", "--size", str(target_nodes),
+                   "--workdir", workdir, "--stages"] + list(args.stages)
+        if args.evf_threshold is not None:
+            command += ["--evf-threshold", str(args.evf_threshold)]
+        if args.check:
+            command.append("--check")
+        process = subprocess.run(command, capture_output=True, text=True)
+        result_path = os.path.join(workdir, "result.json")
+        if process.returncode == 0 and os.path.exists(result_path):
+            with open(result_path, 'r') as file:
+                result = json.load(file)
+        else:
+            result = {"target_nodes": target_nodes, "error": process.stderr.strip().splitlines()[-5:]}
+            print(f"[Benchmark] {size} failed (return code {process.returncode})", flush=True)
+        result["size"] = size
+        result["wall_clock_s"] = time.time() - started
+        results.append(result)
+
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    return results
+
+
+def print_results(results):
+    print(f"\n{'size':<7}{'stage':<46}{'calls':>6}{'wall [s]':>11}{'cpu [s]':>11}{'rss [MB]':>10}  items")
+    for result in results:
+        if "error" in result:
+            print(f"{result['size']:<7}{'ERROR':<46}  {' | '.join(result['error'])}")
+            continue
+        for stage in result["stages"]:
+            name = "  " * stage["depth"] + stage["path"].split("/")[-1]
+            rss = f"{stage['peak_rss_mb']:.0f}" if stage["peak_rss_mb"] is not None else "-"
+            items = ", ".join(f"{key}={value}" for key, value in sorted(stage["counts"].items()))
+            print(f"{result['size']:<7}{name[:45]:<46}{stage['calls']:>6}{stage['wall_s']:>11.3f}"
+                  f"{stage['cpu_s']:>11.3f}{rss:>10}  {items}")
+
+
+def compare(base_path, new_path):
+    with open(base_path, 'r') as file:
+        base = json.load(file)
+    with open(new_path, 'r') as file:
+        new = json.load(file)
+
+    def stage_times(report):
+        times = {}
+        for result in report["results"]:
+            for stage in result.get("stages", []):
+                times[(result["size"], stage["path"])] = (stage["wall_s"], stage["peak_rss_mb"])
+        return times
+
+    base_times = stage_times(base)
+    new_times = stage_times(new)
+
+    print(f"\n=== {base['label']} -> {new['label']} ===\n")
+    print(f"{'size':<7}{'stage':<46}{'base [s]':>10}{'new [s]':>10}{'ratio':>8}{'rss base':>10}{'rss new':>9}")
+    for key in sorted(set(base_times) & set(new_times), key=lambda k: (parse_size(k[0]), k[1])):
+        (base_wall, base_rss), (new_wall, new_rss) = base_times[key], new_times[key]
+        ratio = new_wall / base_wall if base_wall > 0 else float("nan")
+        print(f"{key[0]:<7}{key[1][:45]:<46}{base_wall:>10.3f}{new_wall:>10.3f}{ratio:>8.2f}"
+              f"{base_rss or 0:>10.0f}{new_rss or 0:>9.0f}")
+    print("==========================")
+
+
+def main():
+    args = parse_args()
+    if args.worker:
+        run_worker(args)
+        return
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    if args.check:
+        workdir = tempfile.mkdtemp(prefix="bench_reference_")
+        try:
+            differences = check_reference_deck(workdir)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        print(f"[Benchmark] Reference deck: " + ("equivalent" if not differences else "; ".join(differences)),
+              flush=True)
+        if differences:
+            sys.exit(1)
+
+    label = args.label or git_label()
+    results = run_all(args)
+    print_results(results)
+
+    os.makedirs(RESULTS_PATH, exist_ok=True)
+    output_path = os.path.join(RESULTS_PATH, f"{label}.json")
+    with open(output_path, 'w') as file:
+        json.dump({
+            "label": label,
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "results": results,
+        }, file, indent=4)
+    print(f"\nResults written to: {output_path}")
+
+
+if __name__ == "__main__":
+    main()
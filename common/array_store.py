@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import shutil
+
+import numpy as np
+
+
+MANIFEST_NAME = "manifest.json"
+FORMAT_VERSION = 1
+
+NODE_ARRAYS = ('labels', 'coords')
+ELEMENT_ARRAYS = ('element_labels', 'connectivity')
+
+
+class ArrayStore(object):
+    """Columnar on-disk store of the extracted ZOI data.
+
+    Every ODB key is a directory of ``.npy`` files next to a ``manifest.json``
+    that lists the ODB keys and, for every field, the entity it belongs to
+    (and the labels of its columns when it has several)::
+
+        data/
+            manifest.json
+            BIGGER/labels.npy, coords.npy, NT11.npy,
+                   element_labels.npy, connectivity.npy, S.npy, PE.npy, PEEQ.npy
+                   series/S.npy, ...   (optional, one row per extracted frame)
+
+    Node fields are aligned with ``labels`` and element fields with
+    ``element_labels``. Arrays are read memory-mapped, so consumers only pay
+    for the fields and rows they actually touch.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def _manifest_path(self):
+        return os.path.join(self.root, MANIFEST_NAME)
+
+    def read_manifest(self):
+        path = self._manifest_path()
+        if not os.path.exists(path):
+            return {"format": FORMAT_VERSION, "odbs": {}}
+
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def write_manifest(self, manifest):
+        if not os.path.exists(self.root):
+            os.makedirs(self.root)
+
+        with open(self._manifest_path(), 'w') as f:
+            json.dump(manifest, f, indent=4, sort_keys=True)
+
+    def reset(self):
+        """Starts a new extraction: the manifest is emptied, stale arrays become unreachable."""
+        self.write_manifest({"format": FORMAT_VERSION, "odbs": {}})
+
+    def odb_names(self):
+        manifest = self.read_manifest()
+        return sorted(manifest["odbs"].keys(), key=lambda name: manifest["odbs"][name].get("order", 0))
+
+    def fields(self, odb_name):
+        """Returns ``{field name: entity}`` of the fields stored for ``odb_name``."""
+        return dict(self.read_manifest()["odbs"][odb_name]["fields"])
+
+    def components(self, odb_name):
+        """Returns ``{field name: column labels}`` of the fields stored with them."""
+        return dict(self.read_manifest()["odbs"][odb_name].get("components", {}))
+
+    def write(self, odb_name, node_arrays, element_arrays, components=None):
+        """Writes the arrays of one ODB and registers them in the manifest.
+
+        ``node_arrays`` must hold ``labels`` and ``coords``; ``element_arrays``
+        must hold ``element_labels`` and ``connectivity``. Any other entry is
+        stored as a field of the corresponding entity. ``components`` maps
+        field names to the labels of their columns.
+        """
+        odb_dir = os.path.join(self.root, odb_name)
+        if not os.path.exists(odb_dir):
+            os.makedirs(odb_dir)
+
+        fields = {}
+        for entity, arrays in (('nodes', node_arrays), ('elements', element_arrays)):
+            for name, array in arrays.items():
+                np.save(os.path.join(odb_dir, name + ".npy"), np.ascontiguousarray(array))
+                if name not in NODE_ARRAYS and name not in ELEMENT_ARRAYS:
+                    fields[name] = entity
+
+        manifest = self.read_manifest()
+        previous = manifest["odbs"].get(odb_name, {})
+        manifest["odbs"][odb_name] = {
+            "order": previous.get("order", len(manifest["odbs"])),
+            "nodes": int(len(node_arrays['labels'])),
+            "elements": int(len(element_arrays['element_labels'])),
+            "fields": fields,
+            "components": dict((name, list(labels)) for name, labels in (components or {}).items()
+                               if name in fields),
+        }
+        self.write_manifest(manifest)
+
+    def create_series(self, odb_name, name, shape, dtype):
+        """Creates a writable memory-mapped ``series/<name>.npy`` of ``shape``.
+
+        The first axis is the frame axis; callers fill one frame at a time.
+        """
+        series_dir = os.path.join(self.root, odb_name, "series")
+        if not os.path.exists(series_dir):
+            os.makedirs(series_dir)
+
+        path = os.path.join(series_dir, name + ".npy")
+        return np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=shape)
+
+    def register_series(self, odb_name, frames, times, fields):
+        """Records the frame indices, frame times and ``{name: entity}`` of the series."""
+        manifest = self.read_manifest()
+        manifest["odbs"][odb_name]["series"] = {
+            "frames": [int(frame) for frame in frames],
+            "times": [float(time) for time in times],
+            "fields": fields,
+        }
+        self.write_manifest(manifest)
+
+    def series(self, odb_name):
+        """Returns the series entry of the manifest (``None`` when only one frame was extracted)."""
+        return self.read_manifest()["odbs"][odb_name].get("series", None)
+
+    def load_series(self, odb_name, name, mmap=True):
+        path = os.path.join(self.root, odb_name, "series", name + ".npy")
+        return np.load(path, mmap_mode='r' if mmap else None)
+
+    def load(self, odb_name, name, mmap=True):
+        path = os.path.join(self.root, odb_name, name + ".npy")
+        return np.load(path, mmap_mode='r' if mmap else None)
+
+    def read(self, odb_name, names, mmap=True):
+        """Returns ``{name: array}`` for the requested arrays of ``odb_name``."""
+        return dict((name, self.load(odb_name, name, mmap)) for name in names)
+
+
+def export_json(store, output_json_path):
+    """Writes the whole store in the legacy ``data.json`` layout (debug output)."""
+    data = {}
+    for odb_name in store.odb_names():
+        fields = store.fields(odb_name)
+        node_fields = [name for name, entity in fields.items() if entity == 'nodes']
+        element_fields = [name for name, entity in fields.items() if entity == 'elements']
+
+        arrays = store.read(odb_name, NODE_ARRAYS + ELEMENT_ARRAYS + tuple(fields.keys()))
+
+        elements = {}
+        for row, label in enumerate(arrays['element_labels'].tolist()):
+            connectivity = [int(n) for n in arrays['connectivity'][row] if n > 0]
+            elements[str(label)] = {'connectivity': connectivity}
+            _add_field_values(elements[str(label)], arrays, element_fields, row)
+
+        nodes = {}
+        for row, label in enumerate(arrays['labels'].tolist()):
+            nodes[str(label)] = {'coords': tuple(arrays['coords'][row].tolist())}
+            _add_field_values(nodes[str(label)], arrays, node_fields, row)
+
+        data[odb_name] = {'elements': elements, 'nodes': nodes}
+
+    with open(output_json_path, "w") as f:
+        json.dump(data, f, indent=4)
+
+
+def _add_field_values(record, arrays, field_names, row):
+    for name in field_names:
+        value = arrays[name][row]
+        if np.any(np.isnan(value)):
+            continue
+        record[name] = float(value) if np.ndim(value) == 0 else tuple(value.tolist())
+
+
+def merge_stores(target_root, part_roots, order=None):
+    """Moves the ODB arrays of every part store into ``target_root``.
+
+    The target manifest is rebuilt from the part manifests; ``order`` (a list
+    of ODB keys, usually the order of ``odb_config.json``) sets the order in
+    which the ODBs are listed. Returns the merged ODB keys.
+    """
+    target = ArrayStore(target_root)
+    target.reset()
+    manifest = target.read_manifest()
+
+    for part_root in part_roots:
+        part = ArrayStore(part_root)
+        part_manifest = part.read_manifest()
+        for odb_name, entry in part_manifest["odbs"].items():
+            target_dir = os.path.join(target_root, odb_name)
+            if os.path.exists(target_dir):
+                shutil.rmtree(target_dir)
+            shutil.move(os.path.join(part_root, odb_name), target_dir)
+            manifest["odbs"][odb_name] = entry
+
+    names = list(manifest["odbs"].keys())
+    if order is not None:
+        names.sort(key=lambda name: order.index(name) if name in order else len(order))
+    for position, name in enumerate(names):
+        manifest["odbs"][name]["order"] = position
+
+    target.write_manifest(manifest)
+    return names
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+import fnmatch
+
+
+# Catalog position -> mesh entity the extracted values are aligned with.
+ENTITIES = {
+    'node': 'nodes',
+    'element': 'elements',
+    'integration_point': 'elements',
+}
+
+DTYPES = ('float32', 'float64')
+
+TENSOR_COMPONENTS = ('11', '22', '33', '12', '13', '23')
+
+# Material-specific outputs of an Eulerian instance, e.g.
+# S_ASSEMBLY_EULERIAN-1_DA718_PENG20-1 (field, instance, material instance).
+EULERIAN_PATTERN = "{name}_ASSEMBLY_{instance}_*"
+
+# Catalog of an odb_config.json entry without ``fields``: every component of
+# the fields the extraction has always read.
+DEFAULT_FIELDS = (
+    {"name": "PEEQ", "position": "integration_point"},
+    {"name": "PE", "position": "integration_point"},
+    {"name": "S", "position": "integration_point"},
+    {"name": "NT11", "position": "node"},
+)
+
+
+def default_components(name, n_columns):
+    """Component labels of a field stored without them, in the Abaqus order."""
+    if n_columns == 1:
+        return [name]
+    if n_columns in (4, 6):
+        return [name + component for component in TENSOR_COMPONENTS[:n_columns]]
+    return [name + str(i + 1) for i in range(n_columns)]
+
+
+class FieldSpec(object):
+    """One entry of the ``fields`` catalog of an odb_config.json entry.
+
+    ``name`` is the key the values are stored under. ``pattern`` is the
+    field output name in the ODB (``fnmatch`` wildcards, ``{name}`` and
+    ``{instance}`` are substituted); without it the Eulerian
+    material-specific outputs of the instance are tried before the plain
+    name for element and integration point fields (the plain name first for
+    nodal ones), narrowed to ``material`` when several materials have the field. ``components`` keeps
+    only those component labels (all when ``None``) and ``invariants``
+    (``MISES``, ``PRESS``, ...) are appended as extra columns. ``dtype``
+    overrides the ``field_precision`` of the entry.
+    """
+
+    def __init__(self, name, position='integration_point', pattern=None, components=None,
+                 invariants=(), dtype=None, material=None):
+        if position not in ENTITIES:
+            raise ValueError("Unknown position '{}' of field '{}' (expected one of: {}).".format(
+                position, name, ", ".join(sorted(ENTITIES))))
+        if dtype is not None and dtype not in DTYPES:
+            raise ValueError("Unknown dtype '{}' of field '{}' (expected one of: {}).".format(
+                dtype, name, ", ".join(DTYPES)))
+
+        self.name = str(name)
+        self.position = str(position)
+        self.pattern = None if pattern is None else str(pattern)
+        self.components = None if components is None else [str(label) for label in components]
+        self.invariants = [str(invariant).upper() for invariant in invariants]
+        self.dtype = None if dtype is None else str(dtype)
+        self.material = None if material is None else str(material)
+
+    @classmethod
+    def from_config(cls, entry, material=None):
+        entry = dict(entry)
+        entry.setdefault("material", material)
+        return cls(**entry)
+
+    @property
+    def entity(self):
+        return ENTITIES[self.position]
+
+    def resolve(self, output_names, instance_name):
+        """Returns the field output of ``output_names`` this field is read from."""
+        if self.pattern is not None:
+            patterns = [self.pattern]
+        elif self.position == 'node':
+            patterns = [self.name, EULERIAN_PATTERN]
+        else:
+            patterns = [EULERIAN_PATTERN, self.name]
+        for pattern in patterns:
+            pattern = pattern.format(name=self.name, instance=instance_name)
+            matches = sorted(name for name in output_names if fnmatch.fnmatchcase(name, pattern))
+            if self.material is not None and len(matches) > 1:
+                matches = [name for name in matches if name.upper().endswith("_" + self.material.upper())]
+
+            if len(matches) == 1:
+                return matches[0]
+            if matches:
+                raise ValueError("Field '{}' matches several outputs ({}); set its 'material'.".format(
+                    self.name, ", ".join(matches)))
+
+        raise ValueError("No field output of the ODB matches field '{}' ({}).".format(
+            self.name, ", ".join(p.format(name=self.name, instance=instance_name) for p in patterns)))
+
+    def columns(self, component_labels):
+        """Returns the columns of the declared components (``None`` to keep them all)."""
+        if self.components is None:
+            return None
+
+        available = list(component_labels) or [self.name]
+        missing = [label for label in self.components if label not in available]
+        if missing:
+            raise ValueError("Field '{}' has no component {} (available: {}).".format(
+                self.name, ", ".join(missing), ", ".join(available)))
+        return [available.index(label) for label in self.components]
+
+    def labels(self, component_labels):
+        """Returns the labels of the stored columns: the kept components, then the invariants."""
+        if self.components is not None:
+            kept = list(self.components)
+        else:
+            kept = list(component_labels) or [self.name]
+        return kept + self.invariants
+
+
+def read_catalog(odb_config):
+    """Returns the FieldSpec list of one odb_config.json entry (DEFAULT_FIELDS without ``fields``)."""
+    entries = odb_config.get("fields") or DEFAULT_FIELDS
+    material = odb_config.get("material", None)
+
+    specs = [FieldSpec.from_config(entry, material) for entry in entries]
+    names = [spec.name for spec in specs]
+    duplicated = sorted(set(name for name in names if names.count(name) > 1))
+    if duplicated:
+        raise ValueError("Fields declared more than once: {}".format(", ".join(duplicated)))
+    return specs
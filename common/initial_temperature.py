@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+
+# 'label': the INP modifier writes *Initial Conditions, type=TEMPERATURE from
+# NT11 by node label. 'mapped': NT11 is interpolated onto the nodes through a
+# MappedField, for meshes whose nodes do not match the extracted ones.
+INITIAL_TEMPERATURE_METHODS = ("label", "mapped")
+DEFAULT_INITIAL_TEMPERATURE = "label"
+
+
+def initial_temperature_method(model_config):
+    """Method of ``assemblyAndSimulationData.initialTemperature``, one of INITIAL_TEMPERATURE_METHODS."""
+    method = str(model_config["assemblyAndSimulationData"].get("initialTemperature", DEFAULT_INITIAL_TEMPERATURE))
+    if method not in INITIAL_TEMPERATURE_METHODS:
+        raise ValueError("Unknown initialTemperature method: {}".format(method))
+    return method
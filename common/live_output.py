@@ -0,0 +1,86 @@
+import locale
+import os
+import subprocess
+import threading
+import time
+
+
+class FileTailer:
+    """Reads the lines appended to a file since the previous call.
+
+    The file may not exist yet; a partial last line is kept until its newline
+    arrives, so callers only ever see complete lines. Offsets are byte
+    offsets; every complete line is decoded on its own, CRLF endings stripped.
+    """
+
+    def __init__(self, path, encoding=None):
+        self.path = path
+        self.encoding = encoding or locale.getpreferredencoding(False)
+        self.offset = 0
+        self.pending = b""
+
+    def read_lines(self):
+        if not os.path.exists(self.path):
+            return []
+
+        size = os.path.getsize(self.path)
+        if size < self.offset:
+            self.offset = 0
+            self.pending = b""
+        if size == self.offset:
+            return []
+
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            chunk = f.read()
+        self.offset += len(chunk)
+
+        lines = (self.pending + chunk).split(b"\n")
+        self.pending = lines.pop()
+        return [line.rstrip(b"\r").decode(self.encoding, errors="replace") for line in lines]
+
+
+def run_streaming(command, env=None, cwd=None, tail_paths=(), prefix="", poll_interval=0.5):
+    """Runs ``command`` in a shell and prints its output and the ``tail_paths`` lines as they arrive.
+
+    Returns a ``subprocess.CompletedProcess`` with the collected stdout;
+    raises ``subprocess.CalledProcessError`` on a non-zero return code, like
+    ``subprocess.run(..., check=True)``.
+    """
+    tailers = [FileTailer(path) for path in tail_paths]
+    for tailer in tailers:
+        if os.path.exists(tailer.path):
+            tailer.offset = os.path.getsize(tailer.path)
+
+    process = subprocess.Popen(
+        command, shell=True, env=env, cwd=cwd, text=True, errors="replace",
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT
+    )
+
+    output = []
+
+    def pump():
+        for line in process.stdout:
+            output.append(line)
+            print(prefix + line.rstrip("\n"), flush=True)
+
+    reader = threading.Thread(target=pump, daemon=True)
+    reader.start()
+
+    def drain():
+        for tailer in tailers:
+            for line in tailer.read_lines():
+                print(prefix + line, flush=True)
+
+    while process.poll() is None:
+        drain()
+        time.sleep(poll_interval)
+
+    reader.join()
+    drain()
+
+    stdout = "".join(output)
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, command, output=stdout, stderr="")
+
+    return subprocess.CompletedProcess(command, process.returncode, stdout=stdout, stderr="")
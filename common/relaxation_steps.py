@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+
+# Named time points the field output of a relaxation step is written at.
+TIME_POINTS_NAME = "RelaxationTimes"
+TIME_POINTS_PER_LINE = 8
+
+# Restart data of every increment, overlaid so that the restart file only
+# holds the last converged increment; a continuation job restarts from it.
+DEFAULT_RESTART = {"frequency": 1, "overlay": True}
+
+
+def time_points(step_time, points=None):
+    """Sorted output times of a step of ``step_time``; the end of the step is always one of them.
+
+    Returns an empty list when no points are requested, i.e. the field
+    output keeps its default frequency.
+    """
+    if not points:
+        return []
+
+    points = sorted(set(float(point) for point in points) | set([float(step_time)]))
+    outside = [point for point in points if not 0.0 < point <= step_time]
+    if outside:
+        raise ValueError("Time points {} are outside the step time (0, {:g}].".format(
+            ", ".join("{:g}".format(point) for point in outside), step_time))
+    return points
+
+
+def step_time_points(steps_information):
+    """Time points of the relaxation step, from ``stepsAndHistoryInformation.timePoints``."""
+    return time_points(steps_information["timePeriod"], steps_information.get("timePoints"))
+
+
+def restart_options(steps_information):
+    restart = dict(DEFAULT_RESTART)
+    restart.update(steps_information.get("restart", {}))
+    return restart
+
+
+def restart_keyword(restart):
+    """``*Restart, write`` line of the restart options (frequency 0 writes no restart data)."""
+    line = "*Restart, write, frequency={}".format(int(restart["frequency"]))
+    if restart["overlay"] and restart["frequency"]:
+        line += ", overlay"
+    return line + "\n"
+
+
+def time_points_block(points, name=TIME_POINTS_NAME):
+    """``*Time Points`` block of ``points``."""
+    lines = ["*Time Points, name={}\n".format(name)]
+    for start in range(0, len(points), TIME_POINTS_PER_LINE):
+        lines.append(", ".join("%.10g" % point for point in points[start:start + TIME_POINTS_PER_LINE]) + "\n")
+    return "".join(lines)
+
+
+def field_output_keyword(points, name=TIME_POINTS_NAME):
+    line = "*Output, field, variable=PRESELECT"
+    if points:
+        line += ", time points={}".format(name)
+    return line + "\n"
@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+import json
+import math
+import multiprocessing
+import os
+
+
+# Degrees of freedom per node of the CPE4RT relaxation elements (u1, u2, T).
+DOFS_PER_NODE = 3
+
+FRAMEWORK_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Bands and memory coefficients (read-only) and the runs measured on this host (not versioned).
+CALIBRATION_PATH = os.path.join(FRAMEWORK_PATH, "config", "solver_calibration.json")
+RUNS_PATH = os.path.join(FRAMEWORK_PATH, "relaxation", "backend", "files", "job", "solver_runs.json")
+SETTINGS_SUFFIX = "_solver.json"
+
+# Settings of the "fixed" mode: the values the relaxation model was always built with.
+FIXED_SETTINGS = {
+    "cpus": 12,
+    "domains": 12,
+    "memoryPercent": 90,
+    "initialInc": 1e-5,
+    "minInc": 1e-6,
+    "maxNumInc": 1000,
+    "deltmx": 20.0,
+}
+
+# Past runs count as similar when their DOFs are within this factor of the model's.
+SIMILAR_DOFS = 2.0
+# Share of the host memory a relaxation job may be given.
+MAX_MEMORY_FRACTION = 0.9
+# maxNumInc is kept this much above the increments similar runs needed.
+INCREMENT_MARGIN = 1.5
+# Runs kept in the runs file.
+MAX_RUNS = 200
+
+
+def host_cores():
+    try:
+        return multiprocessing.cpu_count()
+    except NotImplementedError:
+        return 1
+
+
+def host_memory_mb():
+    """Total physical memory of the host in MB, or None when it cannot be read."""
+    try:
+        import psutil
+        return psutil.virtual_memory().total // (1024 * 1024)
+    except ImportError:
+        pass
+
+    if hasattr(os, "sysconf") and "SC_PHYS_PAGES" in os.sysconf_names:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // (1024 * 1024)
+
+    return _windows_memory_mb()
+
+
+def _windows_memory_mb():
+    try:
+        import ctypes
+    except ImportError:
+        return None
+
+    class MemoryStatusEx(ctypes.Structure):
+        _fields_ = [
+            ("dwLength", ctypes.c_ulong),
+            ("dwMemoryLoad", ctypes.c_ulong),
+            ("ullTotalPhys", ctypes.c_ulonglong),
+            ("ullAvailPhys", ctypes.c_ulonglong),
+            ("ullTotalPageFile", ctypes.c_ulonglong),
+            ("ullAvailPageFile", ctypes.c_ulonglong),
+            ("ullTotalVirtual", ctypes.c_ulonglong),
+            ("ullAvailVirtual", ctypes.c_ulonglong),
+            ("ullAvailExtendedVirtual", ctypes.c_ulonglong),
+        ]
+
+    try:
+        status = MemoryStatusEx()
+        status.dwLength = ctypes.sizeof(MemoryStatusEx)
+        if not ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return None
+    except AttributeError:
+        return None
+    return int(status.ullTotalPhys // (1024 * 1024))
+
+
+def read_runs(path=RUNS_PATH):
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def read_calibration(path=CALIBRATION_PATH, runs_path=RUNS_PATH):
+    """Calibration table of ``path`` with the recorded runs of ``runs_path`` as its ``runs``."""
+    with open(path, 'r') as f:
+        table = json.load(f)
+    table["runs"] = table.get("runs", []) + read_runs(runs_path)
+    return table
+
+
+def record_run(record, path=RUNS_PATH):
+    """Appends the timings of a finished run to the runs file (the last MAX_RUNS are kept)."""
+    runs = (read_runs(path) + [record])[-MAX_RUNS:]
+
+    directory = os.path.dirname(path)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory)
+    temporary = path + ".tmp"
+    with open(temporary, 'w') as f:
+        json.dump(runs, f, indent=4)
+    if os.path.exists(path):
+        os.remove(path)
+    os.rename(temporary, path)
+
+
+def similar_runs(table, dofs):
+    """Recorded runs within SIMILAR_DOFS of ``dofs``; restart runs (``restart_of``) start mid-step and are left out."""
+    return [run for run in table["runs"]
+            if run.get("dofs") and not run.get("restart_of")
+            and 1.0 / SIMILAR_DOFS <= run["dofs"] / float(dofs) <= SIMILAR_DOFS]
+
+
+def choose_cpus(band_cpus, dofs, runs):
+    """Returns the CPU count of the fastest completed similar runs, scaled to ``dofs``.
+
+    Counts never tried keep the calibration band value, so every band is
+    measured before the runs can overrule it.
+    """
+    best = {}
+    for run in runs:
+        if not run.get("completed") or not run.get("wall_clock_s"):
+            continue
+        scaled = run["wall_clock_s"] * dofs / float(run["dofs"])
+        best[run["cpus"]] = min(best.get(run["cpus"], scaled), scaled)
+
+    if band_cpus not in best:
+        return band_cpus
+    return min(best, key=lambda cpus: (best[cpus], cpus))
+
+
+def estimate_memory_mb(dofs, table, runs):
+    """Solver memory of ``dofs``: a line fitted on the measured runs, else the table coefficients."""
+    memory = table["memory"]
+    measured = [(float(run["dofs"]), float(run["memory_mb"])) for run in runs if run.get("memory_mb")]
+
+    if len(set(d for d, _ in measured)) >= 2:
+        mean_d = sum(d for d, _ in measured) / len(measured)
+        mean_m = sum(m for _, m in measured) / len(measured)
+        slope = (sum((d - mean_d) * (m - mean_m) for d, m in measured) /
+                 sum((d - mean_d) ** 2 for d, _ in measured))
+        estimate = mean_m + max(slope, 0.0) * (dofs - mean_d)
+    elif measured:
+        estimate = measured[0][1] * dofs / measured[0][0]
+    else:
+        estimate = memory["base_mb"] + memory["mb_per_kdof"] * dofs / 1000.0
+
+    return max(estimate, memory["base_mb"]) * memory["safety"]
+
+
+def tune_increments(band, runs, time_period):
+    """Increment controls of the band, corrected by the increments of the similar runs.
+
+    The initial increment starts where similar runs first converged, the
+    minimum stays below the smallest increment they needed and maxNumInc
+    keeps INCREMENT_MARGIN above their increment count (doubled when a run
+    ran out of increments), scaled by the time period.
+    """
+    controls = dict((key, band[key]) for key in ("initialInc", "minInc", "maxNumInc", "deltmx"))
+
+    first = [run["first_increment"] for run in runs if run.get("first_increment")]
+    if first:
+        controls["initialInc"] = math.exp(sum(math.log(value) for value in first) / len(first))
+
+    smallest = [run["min_increment"] for run in runs if run.get("min_increment")]
+    if smallest:
+        controls["minInc"] = min(controls["minInc"], 0.1 * min(smallest))
+
+    for run in runs:
+        if not run.get("increments"):
+            continue
+        needed = run["increments"] * time_period / float(run.get("time_period") or time_period)
+        if not run.get("completed") and run["increments"] >= run.get("settings", {}).get("maxNumInc", float("inf")):
+            needed *= 2.0
+        controls["maxNumInc"] = max(controls["maxNumInc"], int(math.ceil(INCREMENT_MARGIN * needed)))
+
+    controls["initialInc"] = min(max(controls["initialInc"], controls["minInc"]), time_period)
+    return controls
+
+
+def tune(dofs, time_period, table, cores, memory_mb):
+    """Picks CPUs, domains, memory and increment controls for a model of ``dofs`` on this host."""
+    band = [b for b in table["bands"] if b["max_dofs"] is None or dofs <= b["max_dofs"]][0]
+    runs = similar_runs(table, dofs)
+
+    cpus = max(1, min(choose_cpus(band["cpus"], dofs, runs), cores))
+    needed_mb = estimate_memory_mb(dofs, table, runs)
+    if memory_mb:
+        percent = int(math.ceil(100.0 * needed_mb / memory_mb))
+        percent = min(max(percent, 1), int(100 * MAX_MEMORY_FRACTION))
+        job_memory_mb = int(memory_mb * percent / 100.0)
+    else:
+        percent = FIXED_SETTINGS["memoryPercent"]
+        job_memory_mb = int(math.ceil(needed_mb))
+
+    settings = {
+        "cpus": cpus,
+        "domains": cpus,
+        "memoryPercent": percent,
+        "memory_mb": job_memory_mb,
+        "estimated_memory_mb": int(math.ceil(needed_mb)),
+        "similar_runs": len(runs),
+    }
+    settings.update(tune_increments(band, runs, time_period))
+    return settings
+
+
+def solver_settings(model_config, n_nodes, calibration_path=CALIBRATION_PATH, runs_path=RUNS_PATH):
+    """Solver resources and increment controls of the relaxation model, from ``solverControls``.
+
+    ``"mode": "fixed"`` (the default) uses FIXED_SETTINGS, overridden by any
+    of its keys set in ``solverControls``; ``"mode": "auto"`` tunes them from
+    the calibration table, the recorded runs and the host cores and memory.
+    """
+    simulation = model_config["assemblyAndSimulationData"]
+    controls = simulation.get("solverControls", {})
+    dofs = DOFS_PER_NODE * n_nodes
+    time_period = simulation["stepsAndHistoryInformation"]["timePeriod"]
+
+    if controls.get("mode", "fixed") == "auto":
+        cores = host_cores()
+        memory_mb = host_memory_mb()
+        settings = tune(dofs, time_period, read_calibration(calibration_path, runs_path), cores, memory_mb)
+        settings["host"] = {"cores": cores, "memory_mb": memory_mb}
+    else:
+        settings = dict(FIXED_SETTINGS)
+        settings.update((key, value) for key, value in controls.items() if key in FIXED_SETTINGS)
+
+    settings.update(mode=controls.get("mode", "fixed"), dofs=dofs, nodes=n_nodes, time_period=time_period)
+    return settings
+
+
+def settings_path(inp_dir, model_name):
+    return os.path.join(inp_dir, model_name + SETTINGS_SUFFIX)
+
+
+def write_settings(path, settings):
+    """Writes the settings next to the deck, for the job launcher and the calibration feedback."""
+    with open(path, 'w') as f:
+        json.dump(settings, f, indent=4, sort_keys=True)
+
+
+def read_settings(path):
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
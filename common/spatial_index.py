@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import shutil
+
+import numpy as np
+
+from common.zoi_model import label_index, lookup_rows
+
+
+INDEX_FORMAT = 2
+INDEX_KEY_NAME = "index.json"
+INDEX_ARRAYS = (
+    'labels', 'coords', 'element_labels', 'connectivity',
+    'node_order', 'node_cells', 'node_starts',
+    'element_order', 'element_cells', 'element_starts',
+)
+
+
+def index_cache_path(odb_path):
+    """Directory of the cached index of ``odb_path``, next to the ODB."""
+    return os.path.splitext(odb_path)[0] + ".zoi_index"
+
+
+def index_key(odb_path, instance_name):
+    """Identifies the ODB contents an index was built from (path and modification time)."""
+    return {
+        "format": INDEX_FORMAT,
+        "odb_path": os.path.normcase(os.path.abspath(odb_path)),
+        "mtime": os.path.getmtime(odb_path),
+        "instance": instance_name,
+    }
+
+
+def cell_ids(points, origin, shape, cell_size):
+    """Flat id of the grid cell of every point; points outside the grid fall in the border cells."""
+    cells = np.floor((points - origin) / cell_size).astype(np.int64)
+    cells = np.clip(cells, 0, shape - 1)
+    return (cells[:, 0] * shape[1] + cells[:, 1]) * shape[2] + cells[:, 2]
+
+
+class GridIndex(object):
+    """Uniform-grid index of the nodes and elements of an ODB instance.
+
+    Nodes are bucketed by their coordinates and elements by their centroid
+    into cubic cells of ``cell_size``; a box query only tests the members of
+    the cells the box overlaps. ``labels`` must be sorted and ``connectivity``
+    holds node labels, padded with 0. The arrays are saved as ``.npy`` files
+    and read back memory-mapped, so a cached index only pages in the cells a
+    query touches.
+    """
+
+    def __init__(self, arrays, origin, shape, cell_size, reach):
+        self.labels = arrays['labels']
+        self.coords = arrays['coords']
+        self.element_labels = arrays['element_labels']
+        self.connectivity = arrays['connectivity']
+        self.arrays = arrays
+
+        self.origin = np.asarray(origin, dtype=np.float64)
+        self.shape = np.asarray(shape, dtype=np.int64)
+        self.cell_size = float(cell_size)
+        self.reach = np.asarray(reach, dtype=np.float64)
+
+    @classmethod
+    def build(cls, labels, coords, element_labels, connectivity, cell_size):
+        labels = np.asarray(labels, dtype=np.int64)
+        coords = np.asarray(coords, dtype=np.float64)
+        element_labels = np.asarray(element_labels, dtype=np.int64)
+        connectivity = np.asarray(connectivity, dtype=np.int64)
+
+        if len(coords):
+            origin = coords.min(axis=0)
+            extent = coords.max(axis=0) - origin
+        else:
+            origin = np.zeros(3)
+            extent = np.zeros(3)
+        shape = np.floor(extent / cell_size).astype(np.int64) + 1
+
+        # Centroids and the largest node-to-centroid offset, one connectivity
+        # column at a time to keep the temporaries at (n_elements x 3).
+        rows = lookup_rows(label_index(labels), connectivity)
+        valid = rows >= 0
+        counts = np.maximum(valid.sum(axis=1), 1)[:, None]
+        centroids = np.zeros((len(rows), 3), dtype=np.float64)
+        for column in range(rows.shape[1]):
+            centroids += coords[rows[:, column]] * valid[:, column, None]
+        centroids /= counts
+
+        reach = np.zeros(3, dtype=np.float64)
+        for column in range(rows.shape[1]):
+            offsets = np.abs(coords[rows[:, column]] - centroids)[valid[:, column]]
+            if len(offsets):
+                reach = np.maximum(reach, offsets.max(axis=0))
+
+        arrays = {
+            'labels': labels, 'coords': coords,
+            'element_labels': element_labels, 'connectivity': connectivity,
+        }
+        for prefix, points in (('node', coords), ('element', centroids)):
+            cells = cell_ids(points, origin, shape, cell_size)
+            order = np.argsort(cells, kind='mergesort')
+            arrays[prefix + '_order'] = order
+            arrays[prefix + '_cells'], arrays[prefix + '_starts'] = np.unique(cells[order], return_index=True)
+
+        return cls(arrays, origin, shape, cell_size, reach)
+
+    def _candidates(self, prefix, lower, upper):
+        """Rows bucketed under ``prefix`` whose cells overlap the box [lower, upper]."""
+        order = self.arrays[prefix + '_order']
+        cells = np.asarray(self.arrays[prefix + '_cells'])
+        starts = np.asarray(self.arrays[prefix + '_starts'])
+        if len(order) == 0:
+            return np.empty(0, dtype=np.int64)
+
+        if np.any(upper < self.origin) or np.any(lower > self.origin + self.shape * self.cell_size):
+            return np.empty(0, dtype=np.int64)
+
+        first = np.clip(np.floor((lower - self.origin) / self.cell_size).astype(np.int64), 0, self.shape - 1)
+        last = np.clip(np.floor((upper - self.origin) / self.cell_size).astype(np.int64), 0, self.shape - 1)
+        ix, iy, iz = np.meshgrid(*[np.arange(first[a], last[a] + 1) for a in range(3)], indexing='ij')
+        wanted = ((ix * self.shape[1] + iy) * self.shape[2] + iz).ravel()
+
+        positions = np.searchsorted(cells, wanted)
+        found = positions < len(cells)
+        found[found] = cells[positions[found]] == wanted[found]
+        positions = positions[found]
+
+        cell_starts = starts[positions]
+        cell_ends = np.append(starts[1:], len(order))[positions]
+        lengths = cell_ends - cell_starts
+        if lengths.sum() == 0:
+            return np.empty(0, dtype=np.int64)
+
+        shifts = np.repeat(cell_starts - np.cumsum(lengths) + lengths, lengths)
+        return np.asarray(order[shifts + np.arange(lengths.sum())])
+
+    def query_nodes(self, lower, upper):
+        """Returns the sorted node rows inside the box [lower, upper]."""
+        lower = np.asarray(lower, dtype=np.float64)
+        upper = np.asarray(upper, dtype=np.float64)
+
+        rows = self._candidates('node', lower, upper)
+        points = self.coords[rows]
+        inside = np.all((points >= lower) & (points <= upper), axis=1)
+        return np.sort(rows[inside])
+
+    def query_elements(self, lower, upper):
+        """Returns the sorted rows of the elements that may have nodes inside the box [lower, upper]."""
+        lower = np.asarray(lower, dtype=np.float64) - self.reach
+        upper = np.asarray(upper, dtype=np.float64) + self.reach
+        return np.sort(self._candidates('element', lower, upper))
+
+    def save(self, path, key):
+        """Writes the index to the directory ``path``, renamed into place once complete."""
+        temporary = path + ".tmp"
+        if os.path.exists(temporary):
+            shutil.rmtree(temporary)
+        os.makedirs(temporary)
+
+        for name in INDEX_ARRAYS:
+            np.save(os.path.join(temporary, name + ".npy"), np.ascontiguousarray(self.arrays[name]))
+
+        metadata = dict(key)
+        metadata.update({
+            "origin": self.origin.tolist(),
+            "shape": self.shape.tolist(),
+            "cell_size": self.cell_size,
+            "reach": self.reach.tolist(),
+        })
+        with open(os.path.join(temporary, INDEX_KEY_NAME), 'w') as f:
+            json.dump(metadata, f, indent=4)
+
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        os.rename(temporary, path)
+
+    @classmethod
+    def load(cls, path, key):
+        """Returns the index cached in ``path``, or ``None`` when it is missing or was built from other contents."""
+        key_path = os.path.join(path, INDEX_KEY_NAME)
+        if not os.path.exists(key_path):
+            return None
+
+        try:
+            with open(key_path, 'r') as f:
+                metadata = json.load(f)
+            if any(metadata.get(name) != value for name, value in key.items()):
+                return None
+
+            arrays = dict((name, np.load(os.path.join(path, name + ".npy"), mmap_mode='r')) for name in INDEX_ARRAYS)
+        except (IOError, OSError, ValueError):
+            return None
+
+        return cls(arrays, metadata["origin"], metadata["shape"], metadata["cell_size"], metadata["reach"])
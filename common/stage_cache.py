@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import json
+import os
+import shutil
+import time
+
+
+ENTRY_NAME = "entry.json"
+OUTPUTS_NAME = "outputs"
+STATS_NAME = "stats.json"
+
+
+def hash_inputs(inputs):
+    """SHA-256 of ``inputs`` (any JSON-serializable value), independent of the key order."""
+    text = json.dumps(inputs, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def file_fingerprint(path):
+    """Identifies a large input file by its path, modification time and size, without reading it."""
+    path = os.path.normcase(os.path.abspath(path))
+    if not os.path.exists(path):
+        return {"path": path, "missing": True}
+    return {"path": path, "mtime": os.path.getmtime(path), "size": os.path.getsize(path)}
+
+
+def code_version(paths):
+    """SHA-256 of the contents of the source files ``paths``, so any edit changes the version."""
+    digest = hashlib.sha256()
+    for path in sorted(paths):
+        digest.update(os.path.basename(path).encode('utf-8'))
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def path_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+def _replace(source, target):
+    """Copies the file or directory ``source`` to ``target``, replacing what is there."""
+    if os.path.isdir(target):
+        shutil.rmtree(target)
+    elif os.path.exists(target):
+        os.remove(target)
+
+    if os.path.isdir(source):
+        shutil.copytree(source, target)
+    else:
+        shutil.copy2(source, target)
+
+
+class StageCache(object):
+    """Content-addressed cache of pipeline stage outputs.
+
+    Every entry is a directory named after the stage key (the hash of the
+    stage inputs) that holds copies of the stage outputs and an
+    ``entry.json`` with its size and last use. When the cache grows over
+    ``max_bytes`` the least recently used entries are evicted. Hits and
+    misses are counted per stage for this run and accumulated in
+    ``stats.json``.
+    """
+
+    def __init__(self, root, max_bytes):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = {}
+        self.misses = {}
+        self.evicted = []
+
+        if not os.path.exists(self.root):
+            os.makedirs(self.root)
+
+    def key(self, stage, inputs):
+        return hash_inputs({"stage": stage, "inputs": inputs})
+
+    def _entry_path(self, key):
+        return os.path.join(self.root, key)
+
+    def _read_entry(self, key):
+        path = os.path.join(self._entry_path(key), ENTRY_NAME)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def _write_entry(self, key, entry):
+        with open(os.path.join(self._entry_path(key), ENTRY_NAME), 'w') as f:
+            json.dump(entry, f, indent=4, sort_keys=True)
+
+    def lookup(self, stage, key):
+        """Returns True when ``key`` is cached, and counts the hit or miss of ``stage``."""
+        found = self._read_entry(key) is not None
+        counter = self.hits if found else self.misses
+        counter[stage] = counter.get(stage, 0) + 1
+        return found
+
+    def restore(self, key, target_dir):
+        """Copies the outputs of ``key`` back into ``target_dir``; returns their names."""
+        entry = self._read_entry(key)
+        outputs_path = os.path.join(self._entry_path(key), OUTPUTS_NAME)
+        for name in entry["outputs"]:
+            _replace(os.path.join(outputs_path, name), os.path.join(target_dir, name))
+
+        entry["last_used"] = time.time()
+        self._write_entry(key, entry)
+        return entry["outputs"]
+
+    def save(self, stage, key, outputs, inputs=None):
+        """Stores copies of ``outputs`` ({name: file or directory path}) under ``key``, then evicts."""
+        temporary = self._entry_path(key) + ".tmp"
+        if os.path.exists(temporary):
+            shutil.rmtree(temporary)
+        os.makedirs(os.path.join(temporary, OUTPUTS_NAME))
+
+        for name, path in outputs.items():
+            _replace(path, os.path.join(temporary, OUTPUTS_NAME, name))
+
+        now = time.time()
+        entry = {
+            "stage": stage,
+            "key": key,
+            "outputs": sorted(outputs),
+            "size": path_size(os.path.join(temporary, OUTPUTS_NAME)),
+            "created": now,
+            "last_used": now,
+            "inputs": inputs,
+        }
+        with open(os.path.join(temporary, ENTRY_NAME), 'w') as f:
+            json.dump(entry, f, indent=4, sort_keys=True)
+
+        if os.path.exists(self._entry_path(key)):
+            shutil.rmtree(self._entry_path(key))
+        os.rename(temporary, self._entry_path(key))
+
+        self.evict(keep=key)
+
+    def entries(self):
+        entries = []
+        for name in os.listdir(self.root):
+            if os.path.isdir(os.path.join(self.root, name)) and not name.endswith(".tmp"):
+                entry = self._read_entry(name)
+                if entry is not None:
+                    entries.append(entry)
+        return entries
+
+    def size(self):
+        return sum(entry["size"] for entry in self.entries())
+
+    def evict(self, keep=None):
+        """Removes the least recently used entries until the cache fits in ``max_bytes``.
+
+        The entry ``keep`` (the one just stored) is never evicted, even when
+        it alone is larger than the budget.
+        """
+        entries = sorted(self.entries(), key=lambda entry: entry["last_used"])
+        total = sum(entry["size"] for entry in entries)
+        for entry in entries:
+            if total <= self.max_bytes:
+                break
+            if entry["key"] == keep:
+                continue
+            shutil.rmtree(self._entry_path(entry["key"]))
+            total -= entry["size"]
+            self.evicted.append(entry)
+
+    def record_stats(self):
+        """Adds the hits and misses of this run to ``stats.json``; returns the accumulated counts."""
+        path = os.path.join(self.root, STATS_NAME)
+        stats = {"hits": {}, "misses": {}}
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                stats = json.load(f)
+
+        for name, counts in (("hits", self.hits), ("misses", self.misses)):
+            for stage, count in counts.items():
+                stats[name][stage] = stats[name].get(stage, 0) + count
+
+        with open(path, 'w') as f:
+            json.dump(stats, f, indent=4, sort_keys=True)
+        return stats
+
+    def summary(self):
+        """Text report of this run's hits and misses, the evictions and the accumulated hit rate."""
+        stats = self.record_stats()
+        lines = []
+        for stage in sorted(set(self.hits) | set(self.misses)):
+            lines.append("  {:<22}{:>6} hit(s){:>6} miss(es)".format(
+                stage, self.hits.get(stage, 0), self.misses.get(stage, 0)))
+
+        total_hits = sum(stats["hits"].values())
+        total = total_hits + sum(stats["misses"].values())
+        entries = self.entries()
+        lines.append("  {} entr{} in {} ({:.1f} of {:.1f} MB), {} evicted this run".format(
+            len(entries), "y" if len(entries) == 1 else "ies", self.root,
+            sum(entry["size"] for entry in entries) / 1e6, self.max_bytes / 1e6, len(self.evicted)))
+        if total:
+            lines.append("  Hit rate since the cache was created: {:.0%} ({} of {})".format(
+                total_hits / float(total), total_hits, total))
+        return "\n".join(lines)
@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import sys
+import threading
+import time
+
+
+TRACE_BUFFER_SIZE = 1 << 16
+
+
+def cpu_time():
+    """User + system CPU seconds of this process (works on py2 and py3, Windows included)."""
+    times = os.times()
+    return times[0] + times[1]
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None when it cannot be read."""
+    try:
+        import resource
+    except ImportError:
+        return _windows_peak_rss_mb()
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KB elsewhere.
+    return peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0
+
+
+def _windows_peak_rss_mb():
+    try:
+        import ctypes
+        from ctypes import wintypes
+    except ImportError:
+        return None
+
+    class ProcessMemoryCounters(ctypes.Structure):
+        _fields_ = [
+            ("cb", wintypes.DWORD),
+            ("PageFaultCount", wintypes.DWORD),
+            ("PeakWorkingSetSize", ctypes.c_size_t),
+            ("WorkingSetSize", ctypes.c_size_t),
+            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+            ("PagefileUsage", ctypes.c_size_t),
+            ("PeakPagefileUsage", ctypes.c_size_t),
+        ]
+
+    try:
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        get_current_process = ctypes.windll.kernel32.GetCurrentProcess
+        get_current_process.restype = wintypes.HANDLE
+        ok = ctypes.windll.psapi.GetProcessMemoryInfo(
+            get_current_process(), ctypes.byref(counters), counters.cb)
+    except (AttributeError, OSError):
+        return None
+
+    return counters.PeakWorkingSetSize / (1024.0 * 1024.0) if ok else None
+
+
+class Span(object):
+    """One timed stage; use it through ``Tracer.span`` as a context manager."""
+
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.counts = {}
+        self.path = None
+
+    def count(self, **counts):
+        """Adds item counts (nodes, elements, values, ...) to the span."""
+        for key, value in counts.items():
+            self.counts[key] = self.counts.get(key, 0) + int(value)
+
+    def __enter__(self):
+        stack = self.tracer._stack()
+        self.path = "/".join([span.name for span in stack] + [self.name])
+        self.depth = len(stack)
+        stack.append(self)
+        self.tracer._register(self.path, self.depth)
+
+        self.start = time.time()
+        self.start_cpu = cpu_time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        wall = time.time() - self.start
+        cpu = cpu_time() - self.start_cpu
+        self.tracer._stack().pop()
+
+        record = {
+            "type": "span",
+            "name": self.name,
+            "path": self.path,
+            "depth": self.depth,
+            "start": self.start,
+            "wall_s": wall,
+            "cpu_s": cpu,
+            "peak_rss_mb": peak_rss_mb(),
+        }
+        if self.attrs:
+            record["attrs"] = self.attrs
+        if self.counts:
+            record["counts"] = self.counts
+        if exc_type is not None:
+            record["error"] = "{}: {}".format(exc_type.__name__, exc_value)
+
+        self.tracer._finish(record)
+        return False
+
+
+class Tracer(object):
+    """Nested stage spans and log messages of one run.
+
+    Span records (wall and CPU time, peak RSS, item counts) and log messages
+    go to ``trace_path`` as JSON lines through one buffered handle. Log
+    messages are also appended to ``log_path`` through one handle, flushed
+    per message so the launchers can tail it. Both paths are optional.
+    ``summary()`` aggregates the spans by path.
+    """
+
+    def __init__(self, trace_path=None, log_path=None):
+        self.trace_path = trace_path
+        self.log_path = log_path
+        self.started = time.time()
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._totals = {}
+        self._order = []
+
+        self._trace_file = self._open(trace_path, 'w', TRACE_BUFFER_SIZE)
+        self._log_file = self._open(log_path, 'a', -1)
+
+    @staticmethod
+    def _open(path, mode, buffering):
+        if path is None:
+            return None
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        return open(path, mode, buffering)
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def span(self, name, **attrs):
+        return Span(self, name, attrs)
+
+    def _write(self, record):
+        if self._trace_file is not None:
+            self._trace_file.write(json.dumps(record) + "\n")
+
+    def _register(self, path, depth):
+        # Stages are listed in the order they are first entered, parents first.
+        with self._lock:
+            if path not in self._totals:
+                self._totals[path] = {
+                    "depth": depth, "calls": 0, "wall_s": 0.0, "cpu_s": 0.0,
+                    "peak_rss_mb": None, "counts": {}, "errors": 0,
+                }
+                self._order.append(path)
+
+    def _finish(self, record):
+        with self._lock:
+            self._write(record)
+
+            totals = self._totals[record["path"]]
+            totals["calls"] += 1
+            totals["wall_s"] += record["wall_s"]
+            totals["cpu_s"] += record["cpu_s"]
+            if record["peak_rss_mb"] is not None:
+                totals["peak_rss_mb"] = max(totals["peak_rss_mb"] or 0.0, record["peak_rss_mb"])
+            for key, value in record.get("counts", {}).items():
+                totals["counts"][key] = totals["counts"].get(key, 0) + value
+            if "error" in record:
+                totals["errors"] += 1
+
+    def log(self, msg):
+        with self._lock:
+            self._write({"type": "log", "time": time.time(), "msg": msg})
+            if self._log_file is not None:
+                self._log_file.write(msg + "\n")
+                self._log_file.flush()
+
+    def stages(self):
+        """Returns the aggregated spans, one dict per stage path, in summary order."""
+        with self._lock:
+            return [dict(self._totals[path], path=path, counts=dict(self._totals[path]["counts"]))
+                    for path in self._order]
+
+    def summary(self):
+        """Returns the per-stage summary table as text."""
+        lines = [
+            "{:<48}{:>7}{:>11}{:>11}{:>10}  {}".format("stage", "calls", "wall [s]", "cpu [s]", "rss [MB]", "items"),
+        ]
+        with self._lock:
+            for path in self._order:
+                totals = self._totals[path]
+                name = "  " * totals["depth"] + path.split("/")[-1]
+                rss = "{:.0f}".format(totals["peak_rss_mb"]) if totals["peak_rss_mb"] is not None else "-"
+                items = ", ".join("{}={}".format(key, value) for key, value in sorted(totals["counts"].items()))
+                if totals["errors"]:
+                    items = (items + ", " if items else "") + "errors={}".format(totals["errors"])
+                lines.append("{:<48}{:>7}{:>11.3f}{:>11.3f}{:>10}  {}".format(
+                    name[:47], totals["calls"], totals["wall_s"], totals["cpu_s"], rss, items))
+
+        lines.append("total wall clock: {:.3f} s".format(time.time() - self.started))
+        return "\n".join(lines)
+
+    def close(self):
+        with self._lock:
+            for f in (self._trace_file, self._log_file):
+                if f is not None:
+                    f.close()
+            self._trace_file = None
+            self._log_file = None
+
+
+_tracer = None
+
+
+def configure(trace_path=None, log_path=None):
+    """Starts the tracer of this process, closing the previous one."""
+    global _tracer
+    if _tracer is not None:
+        _tracer.close()
+    _tracer = Tracer(trace_path, log_path)
+    return _tracer
+
+
+def get_tracer():
+    """Returns the tracer of this process (one without output files until ``configure`` is called)."""
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer()
+    return _tracer
+
+
+def span(name, **attrs):
+    return get_tracer().span(name, **attrs)
+
+
+def log(msg):
+    get_tracer().log(msg)
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+
+from common.array_store import NODE_ARRAYS, ELEMENT_ARRAYS
+from common.field_catalog import default_components
+
+
+PRECISIONS = {
+    'float32': np.float32,
+    'float64': np.float64,
+}
+
+REMESHED_SUFFIX = "_remeshed"
+
+
+def label_index(labels):
+    """Returns an array mapping each label to its row in ``labels`` (-1 when absent)."""
+    size = int(labels.max()) + 1 if len(labels) else 1
+    index = np.full(size, -1, dtype=np.int64)
+    index[labels] = np.arange(len(labels))
+    return index
+
+
+def lookup_rows(index, labels):
+    """Returns the rows of ``labels`` in a ``label_index`` array (-1 when absent)."""
+    labels = np.asarray(labels, dtype=np.int64)
+    rows = np.full(labels.shape, -1, dtype=np.int64)
+    in_range = (labels >= 0) & (labels < len(index))
+    rows[in_range] = index[labels[in_range]]
+    return rows
+
+
+def odb_zois(odb_config):
+    """Returns ``[(zoi name, zoi coordinates)]`` of one ``odb_config.json`` entry.
+
+    An entry either has a single ``zoi_coordinates`` box (name ``None``) or a
+    ``zois`` list of boxes, each with a ``name`` next to its coordinates.
+    """
+    if "zois" in odb_config:
+        return [(str(zoi["name"]), zoi) for zoi in odb_config["zois"]]
+    return [(None, odb_config["zoi_coordinates"])]
+
+
+def zoi_store_name(odb_name, zoi_name):
+    """Key under which a ZOI is stored: the ODB key, suffixed with the ZOI name when it has one."""
+    return odb_name if zoi_name is None else "{}_{}".format(odb_name, zoi_name)
+
+
+def expand_zois(config_odb):
+    """Returns ``odb_config.json`` with one single-ZOI entry per ZOI, keyed by its store name."""
+    expanded = {}
+    for odb_name, odb_config in config_odb.items():
+        for zoi_name, zoi_coordinates in odb_zois(odb_config):
+            entry = dict((key, value) for key, value in odb_config.items() if key != "zois")
+            entry["zoi_coordinates"] = zoi_coordinates
+            expanded[zoi_store_name(odb_name, zoi_name)] = entry
+    return expanded
+
+
+def relaxation_odb_name(model_config, odb_name):
+    """Store key the relaxation model is built from: the ZOI ``odb_name``, or its graded remesh when enabled."""
+    remesh = model_config["partData"].get("remeshInformation", {})
+    return odb_name + REMESHED_SUFFIX if remesh.get("enabled", False) else odb_name
+
+
+class ZoiMesh(object):
+    """Nodes and elements of a ZOI as flat arrays.
+
+    ``coords`` is (n_nodes x 3) in the Eulerian frame (X, Y, Z) and
+    ``connectivity`` is (n_elements x k), counter-clockwise in X-Z and padded
+    with 0 when an element has fewer than k ZOI nodes.
+    """
+
+    def __init__(self, labels, coords, element_labels, connectivity):
+        self.labels = np.asarray(labels, dtype=np.int64)
+        self.coords = np.asarray(coords, dtype=np.float64)
+        self.element_labels = np.asarray(element_labels, dtype=np.int64)
+        self.connectivity = np.asarray(connectivity, dtype=np.int64)
+
+        self._node_index = None
+        self._element_index = None
+
+    @classmethod
+    def from_store(cls, store, odb_name):
+        arrays = store.read(odb_name, NODE_ARRAYS + ELEMENT_ARRAYS)
+        return cls(arrays['labels'], arrays['coords'], arrays['element_labels'], arrays['connectivity'])
+
+    @property
+    def n_nodes(self):
+        return len(self.labels)
+
+    @property
+    def n_elements(self):
+        return len(self.element_labels)
+
+    def node_rows(self, labels):
+        if self._node_index is None:
+            self._node_index = label_index(self.labels)
+        return lookup_rows(self._node_index, labels)
+
+    def element_rows(self, labels):
+        if self._element_index is None:
+            self._element_index = label_index(self.element_labels)
+        return lookup_rows(self._element_index, labels)
+
+    def quads(self):
+        """Returns the (n_elements x 4) connectivity used by the 2D relaxation mesh."""
+        return self.connectivity[:, :4]
+
+    def plane_coords(self):
+        """Returns the (n_nodes x 2) X-Z coordinates used by the 2D relaxation mesh."""
+        return self.coords[:, (0, 2)]
+
+    def node_arrays(self):
+        return {'labels': self.labels, 'coords': self.coords}
+
+    def element_arrays(self):
+        return {'element_labels': self.element_labels, 'connectivity': self.connectivity}
+
+
+class ZoiFields(object):
+    """Field arrays of a ZOI, aligned row by row with the nodes or elements of ``mesh``.
+
+    Scalar fields are 1-D and tensor fields are (n_rows x n_components); rows
+    without data hold NaN. Values are kept in ``precision`` (``'float32'`` or
+    ``'float64'``) unless a field is set with its own dtype. ``components``
+    holds the column labels of the fields extracted with only some of them.
+    """
+
+    def __init__(self, mesh, precision='float64'):
+        self.mesh = mesh
+        self.dtype = PRECISIONS[precision]
+        self.values = {}
+        self.entities = {}
+        self.components = {}
+
+    @classmethod
+    def from_store(cls, store, odb_name, names, precision=None, mesh=None):
+        """Loads ``names`` memory-mapped; ``precision`` casts them (and copies into memory)."""
+        mesh = mesh if mesh is not None else ZoiMesh.from_store(store, odb_name)
+        entities = store.fields(odb_name)
+        components = store.components(odb_name)
+
+        fields = cls(mesh, precision or 'float64')
+        for name in names:
+            values = store.load(odb_name, name)
+            if precision is not None:
+                values = values.astype(fields.dtype)
+            fields.values[name] = values
+            fields.entities[name] = entities[name]
+            if name in components:
+                fields.components[name] = components[name]
+        return fields
+
+    def set(self, name, entity, values, dtype=None, components=None):
+        self.values[name] = np.asarray(values, dtype=PRECISIONS[dtype] if dtype else self.dtype)
+        self.entities[name] = entity
+        if components is not None:
+            self.components[name] = list(components)
+
+    def columns(self, name, labels):
+        """Returns the (n_rows x len(labels)) columns ``labels`` of field ``name``, in that order."""
+        values = self.values[name]
+        values = values.reshape(len(values), -1)
+        available = self.components.get(name) or default_components(name, values.shape[1])
+
+        missing = [label for label in labels if label not in available]
+        if missing:
+            raise ValueError("Field '{}' was extracted without {} (stored: {}).".format(
+                name, ", ".join(missing), ", ".join(available)))
+        return values[:, [available.index(label) for label in labels]]
+
+    def __getitem__(self, name):
+        return self.values[name]
+
+    def __contains__(self, name):
+        return name in self.values
+
+    def names(self):
+        return list(self.values.keys())
+
+    def node_arrays(self):
+        return dict((name, values) for name, values in self.values.items() if self.entities[name] == 'nodes')
+
+    def element_arrays(self):
+        return dict((name, values) for name, values in self.values.items() if self.entities[name] == 'elements')
+
+    def save(self, store, odb_name):
+        node_arrays = self.mesh.node_arrays()
+        node_arrays.update(self.node_arrays())
+        element_arrays = self.mesh.element_arrays()
+        element_arrays.update(self.element_arrays())
+        store.write(odb_name, node_arrays, element_arrays, self.components)
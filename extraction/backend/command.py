@@ -1,48 +1,58 @@
 # -*- coding: utf-8 -*-
+import time
+
+SCRIPT_START = time.time()
+
 import sys
 import os
 import json
 
 os.chdir(os.getenv("BACKEND_PROJECT_PATH", None))
 sys.dont_write_bytecode = True
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.getcwd())))
 
+# Only the ODB API is needed, so the extraction also runs under the plain
+# `abaqus python` interpreter without starting the CAE kernel.
 from data_extractor import DataExtractor
+from common import tracing
 
-from abaqus import *
-from abaqusConstants import *
-from part import *
-from step import *
-from material import *
-from section import *
-from assembly import *
-from interaction import *
-from mesh import *
-from visualization import *
-from connectorBehavior import *
+IMPORT_END = time.time()
+
+LOG_PATH = os.getenv("EXTRACTION_LOG_PATH", os.path.join("log", "abaqus_log.txt"))
+TRACE_PATH = os.path.splitext(LOG_PATH)[0] + "_trace.jsonl"
+EXTRACTION_MODE = os.getenv("EXTRACTION_MODE", "cae")
 
 
 class Command:
     def __init__(self):
-        log_path = "log/abaqus_log.txt"
-        if os.path.exists(log_path):
-            os.remove(log_path)
+        if os.path.exists(LOG_PATH):
+            os.remove(LOG_PATH)
 
-        Command.log("[Command] Starting execution...\n")
+        tracer = tracing.configure(TRACE_PATH, LOG_PATH)
+        try:
+            with tracer.span("extraction"):
+                Command.log("[Command] Starting execution...\n")
+                self.log_startup()
 
-        self.create_paths()
-        self.start_extractor()
+                self.create_paths()
+                self.start_extractor()
 
-        Command.log("[Command] End.")
+                Command.log("[Command] End.")
+        finally:
+            Command.log("\n[Command] Stage summary (trace: {}):\n{}".format(TRACE_PATH, tracer.summary()))
+            tracer.close()
 
     @staticmethod
     def log(msg):
-        log_dir = "log"
-        if not os.path.exists(log_dir):
-            os.makedirs(log_dir)
-        log_path = os.path.join(log_dir, "abaqus_log.txt")
-        with open(log_path, "a") as f:
-            f.write(msg + "\n")
-            f.flush()
+        tracing.log(msg)
+
+    def log_startup(self):
+        Command.log("[Command] Mode: abaqus " + EXTRACTION_MODE)
+
+        launch_time = os.getenv("EXTRACTION_LAUNCH_TIME", None)
+        if launch_time is not None:
+            Command.log("       - Interpreter startup: {:.2f} s".format(SCRIPT_START - float(launch_time)))
+        Command.log("       - ODB API import: {:.2f} s".format(IMPORT_END - SCRIPT_START))
 
     def create_paths(self):
         self.backend_project_path = os.getenv("BACKEND_PROJECT_PATH", None)
@@ -63,13 +73,19 @@ class Command:
         with open(path_config_odb, 'r') as file:
             config_odb = json.load(file)
 
+        odb_keys = os.getenv("EXTRACTION_ODB_KEYS", None)
+        if odb_keys is not None:
+            selected = json.loads(odb_keys)
+            config_odb = dict((key, config_odb[key]) for key in selected)
+
         return config_odb
 
     def start_extractor(self):
         Command.log("[Command] Beginning extraction....")
 
         config_odb = self.read_data()
-        DataExtractor(config_odb, self.backend_project_path, self.path_dir_config)
+        store_path = os.getenv("EXTRACTION_STORE_PATH", None) or os.path.join(self.path_dir_config, "data")
+        DataExtractor(config_odb, self.backend_project_path, self.path_dir_config, store_path)
 
         Command.log("       [Extraction] The extraction was completed.")
 
@@ -80,14 +96,18 @@ if __name__ == "__main__":
     except Exception as e:
         import traceback
         
-        log_dir = "log"
-        if not os.path.exists(log_dir):
+        log_dir = os.path.dirname(LOG_PATH)
+        if log_dir and not os.path.exists(log_dir):
             os.makedirs(log_dir)
-        log_path = os.path.join(log_dir, "abaqus_log.txt")
 
-        with open(log_path, "a") as f:
+        with open(LOG_PATH, "a") as f:
             f.write("\n====================================================\n")
             f.write("\n[COMMAND ERROR] An exception occurred during execution:\n")
             traceback.print_exc(file=f)
             f.write("\n====================================================\n")
 
+        # Under `abaqus python` the return code tells the launcher that this
+        # worker failed; the CAE session is left open for inspection.
+        if EXTRACTION_MODE == "python":
+            sys.exit(1)
+
@@ -1,15 +1,53 @@
 # -*- coding: utf-8 -*-
 from odbAccess import openOdb
 from abaqusConstants import *
-from abaqus import session
-import math
-import visualization
-import json
+import numpy as np
+import hashlib
 import os
 
+from common import tracing
+from common.array_store import ArrayStore
+from common.field_catalog import FieldSpec, read_catalog
+from common.spatial_index import GridIndex, index_cache_path, index_key
+from common.zoi_model import ZoiMesh, ZoiFields, label_index, lookup_rows, odb_zois, zoi_store_name
+
+ZOI_NODE_SET_NAME = 'ZOI_NODES'
+ZOI_ELEMENT_SET_NAME = 'ZOI_ELEMENTS'
+SET_DIGEST_LENGTH = 12
+
+# Edge of the spatial index cells, in elements.
+GRID_CELL_ELEMENTS = 8
+
+# Eulerian material volume fraction, read to drop the empty and partly filled elements.
+VOLUME_FRACTION = 'EVF'
+
+# Catalog position -> output position the element fields are read at.
+OUTPUT_POSITIONS = {
+    'element': CENTROID,
+    'integration_point': INTEGRATION_POINT,
+}
+
+# Catalog invariant -> invariant passed to ``getScalarField``.
+INVARIANTS = {
+    'MISES': MISES,
+    'TRESCA': TRESCA,
+    'PRESS': PRESS,
+    'INV3': INV3,
+    'MAX_PRINCIPAL': MAX_PRINCIPAL,
+    'MID_PRINCIPAL': MID_PRINCIPAL,
+    'MIN_PRINCIPAL': MIN_PRINCIPAL,
+    'MAGNITUDE': MAGNITUDE,
+}
+
+
+def zoi_set_name(prefix, labels):
+    """Name of the ODB set of the sorted ``labels``: ``prefix`` and a digest of the labels."""
+    digest = hashlib.sha1(np.ascontiguousarray(labels, dtype=np.int64).tobytes()).hexdigest()
+    return "{}_{}".format(prefix, digest[:SET_DIGEST_LENGTH].upper())
+
 
 class DataExtractor:
-    def __init__(self, config_odb, backend_project_path, path_dir_config):
+    def __init__(self, config_odb, backend_project_path, path_dir_config, store_path):
         self.config_odb = config_odb
 
         self.backend_project_path = backend_project_path
@@ -18,9 +56,20 @@ class DataExtractor:
         self.odb = None
         self.odb_name = None
         self.odb_config = None
-        self.data = {}
+        self.field_specs = None
+        self.field_outputs = None
+        self.field_components = None
+        self.index = None
+        self.volume_fraction = None
+        self.zois = None
+        self.union_labels = None
+        self.zoi_rows = None
+        self.target_fields = None
         self.path_name = None
 
+        self.store = ArrayStore(store_path)
+        self.store.reset()
+
         for odb_name, odb_config in self.config_odb.items():
             self.odb_name = str(odb_name)
             self.odb_config = odb_config
@@ -29,33 +78,63 @@ class DataExtractor:
 
             self.ODB_PATH = str(self.odb_config['odb_path'])
 
+            with tracing.span("odb", odb=self.odb_name):
+                self.extract_odb()
+
+            self.field_outputs = None
+            self.field_components = None
+            self.index = None
+            self.volume_fraction = None
+            self.zois = None
+            self.union_labels = None
+            self.zoi_rows = None
+            self.target_fields = None
+
+    def extract_odb(self):
+        with tracing.span("open_odb"):
             self.open_odb()
             self.get_parameters()
-            self.data[self.odb_name] = {}
-            self.data[self.odb_name]['elements'] = {}
-            self.data[self.odb_name]['nodes'] = {}
-
-            self.filter_nodes()
-            DataExtractor.log("  [Extraction] Nodes had been filtered")
-            self.filter_elements()
-            DataExtractor.log("  [Extraction] Elements had been filtered")
-            self.extract_equivalent_plastic_strain()
-            DataExtractor.log("  [Extraction] Equivalent plastic strain had been extracted")
-            self.extract_plastic_strain()
-            DataExtractor.log("  [Extraction] Plastic strain had been extracted")
-            self.extract_stress()
-            DataExtractor.log("  [Extraction] Stresses had been extracted")
-            self.extract_temperature()
-            DataExtractor.log("  [Extraction] Temperatures had been extracted")
-
-        self.process_path_data()
+            self.open_frame()
+            self.resolve_fields()
+
+        with tracing.span("spatial_index") as span:
+            self.load_index()
+            span.count(nodes=len(self.index.labels), elements=len(self.index.element_labels))
+
+        if self.evf_threshold is not None:
+            with tracing.span("read_volume_fraction") as span:
+                self.read_volume_fraction()
+                span.count(elements=len(self.volume_fraction))
+
+        self.zois = []
+        for zoi_name, zoi_coordinates in odb_zois(self.odb_config):
+            with tracing.span("filter_zoi", zoi=zoi_name) as span:
+                mesh, removed = self.filter_zoi(zoi_coordinates)
+                span.count(nodes=mesh.n_nodes, elements=mesh.n_elements, **removed)
+            self.zois.append((zoi_store_name(self.odb_name, zoi_name), mesh, ZoiFields(mesh, self.precision)))
+            DataExtractor.log("  [Extraction] ZOI {} had been filtered ({} nodes, {} elements)".format(
+                zoi_name or self.odb_name, mesh.n_nodes, mesh.n_elements))
+            if removed:
+                DataExtractor.log("  [Extraction] {} elements below EVF {:g} removed, {} nodes pruned".format(
+                    removed['evf_removed'], self.evf_threshold, removed['nodes_pruned']))
+
+        with tracing.span("register_zoi_sets"):
+            self.register_zoi_sets()
+        DataExtractor.log("  [Extraction] ZOI sets had been registered in the ODB")
+
+        with tracing.span("extract_fields"):
+            self.extract_fields()
+        with tracing.span("save_arrays"):
+            self.process_path_data()
+        with tracing.span("extract_frame_series"):
+            self.extract_frame_series()
+
+        with tracing.span("close_odb"):
+            self.odb.close()
 
     @staticmethod
     def log(msg):
-        log_path = "log/abaqus_log.txt"
-        with open(log_path, "a") as f:
-            f.write(msg + "\n")
-            f.flush()
+        tracing.log(msg)
 
     def open_odb(self):
         DataExtractor.log("  [Extraction] Opening ODB: {}".format(self.ODB_PATH))
@@ -67,134 +146,380 @@ class DataExtractor:
         self.frame_target = self.odb_config["frame_target"]
         self.instance_name = str(self.odb_config["instance_name"])
         self.node_set_name = str(self.odb_config["node_set_name"])
-        self.tolerance = self.odb_config["zoi_coordinates"]["tolerance"]
-
-        self.zoi_coordinates = self.odb_config["zoi_coordinates"]
-
-    def filter_nodes(self):
+        self.ele_size = self.odb_config["ele_size"]
+        self.index_cache = self.odb_config.get("index_cache", True)
+        self.evf_threshold = self.odb_config.get("evf_threshold", None)
+
+        self.precision = str(self.odb_config.get("field_precision", "float64"))
+        self.frames_range = self.odb_config.get("frames", None)
+        self.field_specs = read_catalog(self.odb_config)
+
+    def open_frame(self):
+        self.step = self.odb.steps[self.step_name]
+        self.frame = self.step.frames[self.frame_target]
+
+    def resolve_fields(self):
+        """Finds the field output of every catalog field in the target frame.
+
+        Eulerian fields are written once per material, so their ODB names
+        carry the instance and the material; they are resolved once per ODB
+        and reused for every frame.
+        """
+        output_names = list(self.frame.fieldOutputs.keys())
+        self.field_outputs = dict(
+            (spec.name, spec.resolve(output_names, self.instance_name)) for spec in self.field_specs)
+        self.field_components = {}
+
+        for spec in self.field_specs:
+            DataExtractor.log("  [Extraction] Field {} read from: {}".format(spec.name, self.field_outputs[spec.name]))
+
+    def _series_frame_indices(self):
+        """Resolves ``frames`` ([start, stop] or [start, stop, stride], stop included)."""
+        if not self.frames_range:
+            return []
+
+        frame_count = len(self.step.frames)
+        start = self.frames_range[0] % frame_count
+        stop = self.frames_range[1] % frame_count
+        stride = self.frames_range[2] if len(self.frames_range) > 2 else 1
+
+        return list(range(start, stop + 1, stride))
+
+    def load_index(self):
+        """Loads the spatial index of the instance, from the cache next to the ODB when it is current.
+
+        The Eulerian mesh does not move, so the index of an ODB only changes
+        when the ODB file does; it is keyed by the ODB path and mtime.
+        """
         self.instance = self.odb.rootAssembly.instances[self.instance_name]
-        zoi = self.zoi_coordinates
-        tolerance = self.tolerance
-        valid_labels = []
 
+        cache_path = index_cache_path(self.ODB_PATH)
+        key = index_key(self.ODB_PATH, self.instance_name)
+        if self.index_cache:
+            self.index = GridIndex.load(cache_path, key)
+            if self.index is not None:
+                DataExtractor.log("  [Extraction] Spatial index read from: {}".format(cache_path))
+                return
+
+        with tracing.span("read_nodes") as span:
+            labels, coords = self._read_node_arrays()
+            span.count(nodes=len(labels))
+        with tracing.span("read_elements") as span:
+            element_labels, connectivity = self._read_element_arrays()
+            span.count(elements=len(element_labels))
+
+        with tracing.span("build_index"):
+            self.index = GridIndex.build(
+                labels, coords, element_labels, connectivity, GRID_CELL_ELEMENTS * self.ele_size)
+        DataExtractor.log("  [Extraction] Spatial index built")
+
+        if self.index_cache:
+            try:
+                with tracing.span("save_index"):
+                    self.index.save(cache_path, key)
+                DataExtractor.log("  [Extraction] Spatial index saved to: {}".format(cache_path))
+            except (IOError, OSError) as e:
+                DataExtractor.log("  [Extraction] The spatial index could not be cached: {}".format(e))
+
+    def read_volume_fraction(self):
+        """Reads the material volume fraction of every instance element in the target frame, in bulk.
+
+        EVF is written per material like the other Eulerian outputs, so it is
+        resolved with the catalog rules (``material`` picks the workpiece
+        material). ``self.volume_fraction`` follows the rows of the spatial
+        index; elements without a value count as empty.
+        """
+        spec = FieldSpec(VOLUME_FRACTION, position='element', material=self.odb_config.get("material", None))
+        name = spec.resolve(list(self.frame.fieldOutputs.keys()), self.instance_name)
+        fdo = self.frame.fieldOutputs[name].getSubset(region=self.instance, position=OUTPUT_POSITIONS[spec.position])
+
+        values, found = self._gather_field(fdo, np.asarray(self.index.element_labels), 'elements')
+        self.volume_fraction = np.where(found, values[:, 0], 0.0)
+        DataExtractor.log("  [Extraction] {} read from: {}".format(VOLUME_FRACTION, name))
+
+    def filter_zoi(self, zoi):
+        """Returns the ZoiMesh of the nodes inside the ``zoi`` box and of the elements with 4+ of them.
+
+        With ``evf_threshold`` the elements whose volume fraction is below it
+        are dropped too and the nodes no longer referenced by any element are
+        pruned; the second value is then ``{'evf_removed': n, 'nodes_pruned':
+        m}`` (empty otherwise).
+        """
         x_values = sorted([zoi['x1'], zoi['x2']])
         y_values = sorted([zoi['y1'], zoi['y2']])
         z_values = sorted([zoi['z1'], zoi['z2']])
 
-        min_x = x_values[0] - tolerance
-        max_x = x_values[1] + tolerance
-        min_y = y_values[0] - tolerance
-        max_y = y_values[1] + tolerance
-        min_z = z_values[0] - tolerance
-        max_z = z_values[1] + tolerance
-
-        for node in self.instance.nodes:
-            coords = node.coordinates
-            if (min_x <= coords[0] <= max_x and
-                    min_y <= coords[1] <= max_y and
-                    min_z <= coords[2] <= max_z):
-                valid_labels.append(node.label)
-                self.data[self.odb_name]['nodes'][str(node.label)] = {}
-                self.data[self.odb_name]['nodes'][str(node.label)]['coords'] = tuple(float(x) for x in coords)
-
-        self.zoi_nodeLabels = tuple(valid_labels)
-
-    def filter_elements(self):
-        valid_nodes_set = set(self.zoi_nodeLabels)
-        valid_elements = []
-
-        for element in self.instance.elements:
-            valid_element_nodes = [
-                node for node in element.connectivity if node in valid_nodes_set
-            ]
-
-            if len(valid_element_nodes) >= 4:
-                valid_elements.append(element.label)
-                
-                str_label = str(element.label)
-                connectivity_ordered = self._order_connectivity(valid_element_nodes, self.data[self.odb_name]['nodes'])
-                self.data[self.odb_name]['elements'][str_label] = {}
-                self.data[self.odb_name]['elements'][str_label]['connectivity'] = connectivity_ordered
-
-        valid_elements = tuple(valid_elements)
-        self.zoi_elementLabels = set(valid_elements)
-
-    def extract_equivalent_plastic_strain(self):
-        step = self.odb.steps[self.step_name]
-        frame = step.frames[self.frame_target]
-        field_name = 'PEEQ_ASSEMBLY_EULERIAN-1_DA718_PENG20-1'
-        fdo = frame.fieldOutputs[field_name]
-
-        for value in fdo.values:
-            if value.elementLabel in self.zoi_elementLabels:
-                str_label = str(value.elementLabel)
-                data_value = float(value.data)
-
-                self.data[self.odb_name]['elements'][str_label]['PEEQ'] = data_value
-
-    def extract_plastic_strain(self):
-        step = self.odb.steps[self.step_name]
-        frame = step.frames[self.frame_target]
-        field_name = 'PE_ASSEMBLY_EULERIAN-1_DA718_PENG20-1'
-        fdo = frame.fieldOutputs[field_name]
-
-        for value in fdo.values:
-            if value.elementLabel in self.zoi_elementLabels:
-                str_label = str(value.elementLabel)
-                data_tuple = tuple(float(x) for x in value.data)
-
-                self.data[self.odb_name]['elements'][str_label]['PE'] = data_tuple
-
-    def extract_stress(self):
-        step = self.odb.steps[self.step_name]
-        frame = step.frames[self.frame_target]
-        fdo = frame.fieldOutputs['S_ASSEMBLY_EULERIAN-1_DA718_PENG20-1']
-
-        for value in fdo.values:
-            if value.elementLabel in self.zoi_elementLabels:
-                str_label = str(value.elementLabel)
-                data_tuple = tuple(float(x) for x in value.data)
-
-                self.data[self.odb_name]['elements'][str_label]['S'] = data_tuple
-
-    def extract_temperature(self):
-        step = self.odb.steps[self.step_name]
-        frame = step.frames[self.frame_target]
-        node_set = self.instance.elementSets[self.node_set_name]
-        fdo = frame.fieldOutputs['NT11'].getSubset(region=node_set)
-
-        for value in fdo.values:
-            if value.nodeLabel in self.zoi_nodeLabels and value.instance.name == self.instance_name:
-                str_label = str(value.nodeLabel)
-                data_value = float(value.data)
-                self.data[self.odb_name]['nodes'][str_label]['NT11'] = data_value
-
-    def _order_connectivity(self, valid_element_nodes, node_coords_data):
-        connectivity_data = []
-        for node_id in valid_element_nodes:
-            connectivity_data.append({
-                'nid': node_id,
-                'coord': node_coords_data[str(node_id)]['coords']
-            })
-
-        x_sum = sum(d['coord'][0] for d in connectivity_data)
-        z_sum = sum(d['coord'][2] for d in connectivity_data)
-        centroid = (x_sum / 4.0, z_sum / 4.0)
-
-        connectivity_data.sort(key=lambda node: math.atan2(
-            node['coord'][2] - centroid[1],
-            node['coord'][0] - centroid[0]
-        ))
-
-        return [d['nid'] for d in connectivity_data]
+        lower = np.array([x_values[0], y_values[0], z_values[0]], dtype=np.float64) - zoi['tolerance']
+        upper = np.array([x_values[1], y_values[1], z_values[1]], dtype=np.float64) + zoi['tolerance']
+
+        node_rows = self.index.query_nodes(lower, upper)
+        zoi_labels = np.asarray(self.index.labels[node_rows])
+        zoi_coords = np.asarray(self.index.coords[node_rows])
+
+        element_rows = self.index.query_elements(lower, upper)
+        labels = np.asarray(self.index.element_labels[element_rows])
+        connectivity = np.asarray(self.index.connectivity[element_rows])
+
+        in_zoi = np.isin(connectivity, zoi_labels)
+        zoi_node_count = in_zoi.sum(axis=1)
+        keep = zoi_node_count >= 4
+
+        removed = {}
+        if self.volume_fraction is not None:
+            below = keep & (self.volume_fraction[element_rows] < self.evf_threshold)
+            keep &= ~below
+            referenced = np.isin(zoi_labels, connectivity[keep])
+            zoi_labels = zoi_labels[referenced]
+            zoi_coords = zoi_coords[referenced]
+            removed = {'evf_removed': int(below.sum()), 'nodes_pruned': int((~referenced).sum())}
+
+        kept_labels = labels[keep]
+        kept_connectivity = connectivity[keep]
+        kept_in_zoi = in_zoi[keep]
+        kept_count = zoi_node_count[keep]
+
+        zoi_node_rows = label_index(zoi_labels)
+        width = int(kept_count.max()) if len(kept_count) else 4
+        ordered = np.zeros((len(kept_labels), width), dtype=np.int64)
+        for count in np.unique(kept_count).tolist():
+            rows = np.nonzero(kept_count == count)[0]
+            group_nodes = kept_connectivity[rows][kept_in_zoi[rows]].reshape(len(rows), count)
+            ordered[rows, :count] = self._order_connectivity(group_nodes, zoi_node_rows, zoi_coords)
+
+        return ZoiMesh(zoi_labels, zoi_coords, kept_labels, ordered), removed
+
+    def _read_node_arrays(self):
+        """Returns (labels, coords) of the instance nodes as contiguous arrays, in one pass over instance.nodes.
+
+        The original coordinates are read in float64; the COORD field output
+        is not used, as it holds the (single precision) positions of its frame.
+        Rows follow the order of ``instance.nodes``.
+        """
+        nodes = self.instance.nodes
+        count = len(nodes)
+        labels = np.empty(count, dtype=np.int64)
+        coords = np.empty((count, 3), dtype=np.float64)
+        for i, node in enumerate(nodes):
+            labels[i] = node.label
+            coords[i] = node.coordinates
+
+        return labels, coords
+
+    def _read_element_arrays(self):
+        """Returns (labels, connectivity) of the instance elements as arrays.
+
+        Connectivity is an (n_elements x nodes_per_element) array; rows of
+        elements with fewer nodes are padded with 0, which is never a node label.
+        """
+        elements = self.instance.elements
+        count = len(elements)
+        labels = np.empty(count, dtype=np.int64)
+        rows = []
+        for i, element in enumerate(elements):
+            labels[i] = element.label
+            rows.append(element.connectivity)
+
+        width = max(len(row) for row in rows) if rows else 0
+        connectivity = np.zeros((count, width), dtype=np.int64)
+        for i, row in enumerate(rows):
+            connectivity[i, :len(row)] = row
+
+        return labels, connectivity
+
+    def register_zoi_sets(self):
+        """Registers the union of the ZOI labels as ODB sets so field subsets are cut by the ODB library.
+
+        Every field is then read once for all the ZOIs; ``self.zoi_rows``
+        keeps the rows of each ZOI in the union arrays. The set names carry a
+        digest of their labels, so a set left by an earlier open of the ODB
+        (or one of the model) is only reused when it holds the same labels.
+        """
+        for store_name, mesh, _ in self.zois:
+            if mesh.n_nodes == 0 or mesh.n_elements == 0:
+                raise ValueError("The ZOI of '{}' does not contain any node or element.".format(store_name))
+
+        self.union_labels = {
+            'nodes': np.unique(np.concatenate([mesh.labels for _, mesh, _ in self.zois])),
+            'elements': np.unique(np.concatenate([mesh.element_labels for _, mesh, _ in self.zois])),
+        }
+        union_index = dict((entity, label_index(labels)) for entity, labels in self.union_labels.items())
+        self.zoi_rows = [{
+            'nodes': lookup_rows(union_index['nodes'], mesh.labels),
+            'elements': lookup_rows(union_index['elements'], mesh.element_labels),
+        } for _, mesh, _ in self.zois]
+
+        node_set_name = zoi_set_name(ZOI_NODE_SET_NAME, self.union_labels['nodes'])
+        if node_set_name in self.instance.nodeSets.keys():
+            self.zoi_node_set = self.instance.nodeSets[node_set_name]
+        else:
+            self.zoi_node_set = self.instance.NodeSetFromNodeLabels(
+                name=node_set_name, nodeLabels=tuple(self.union_labels['nodes'].tolist()))
+
+        element_set_name = zoi_set_name(ZOI_ELEMENT_SET_NAME, self.union_labels['elements'])
+        if element_set_name in self.instance.elementSets.keys():
+            self.zoi_element_set = self.instance.elementSets[element_set_name]
+        else:
+            self.zoi_element_set = self.instance.ElementSetFromElementLabels(
+                name=element_set_name, elementLabels=tuple(self.union_labels['elements'].tolist()))
+
+    def extract_fields(self):
+        self.target_fields = self._read_frame_fields(self.frame)
+        dtypes = dict((spec.name, spec.dtype) for spec in self.field_specs)
+        for (_, _, fields), zoi_fields in zip(self.zois, self._split_fields(self.target_fields)):
+            for key, (entity, values) in zoi_fields.items():
+                fields.set(key, entity, values, dtypes[key], self.field_components[key])
+
+    def _split_fields(self, fields):
+        """Returns, for every ZOI, ``{key: (entity, values)}`` cut from the union ``fields``."""
+        return [
+            dict((key, (entity, values[rows[entity]])) for key, (entity, values) in fields.items())
+            for rows in self.zoi_rows
+        ]
+
+    def _read_frame_fields(self, frame):
+        """Reads every catalog field on the union of the ZOIs of ``frame``.
+
+        Only the declared components are kept, block by block, and the
+        declared invariants are appended after them; the column labels are
+        kept in ``self.field_components``. Returns ``{key: (entity, values)}``
+        with one row per union label; rows without data are NaN.
+        """
+        fields = {}
+        for spec in self.field_specs:
+            key = spec.name
+            entity = spec.entity
+            with tracing.span("read_field", field=key, frame=int(frame.incrementNumber)) as span:
+                fdo = frame.fieldOutputs[self.field_outputs[key]]
+                if entity == 'nodes':
+                    fdo = fdo.getSubset(region=self.instance.elementSets[self.node_set_name])
+                    fdo = fdo.getSubset(region=self.zoi_node_set)
+                else:
+                    fdo = fdo.getSubset(region=self.zoi_element_set, position=OUTPUT_POSITIONS[spec.position])
+
+                component_labels = tuple(fdo.componentLabels)
+                labels = self.union_labels[entity]
+                columns = [self._gather_field(fdo, labels, entity, spec.columns(component_labels))]
+                for invariant in spec.invariants:
+                    scalar = fdo.getScalarField(invariant=INVARIANTS[invariant])
+                    columns.append(self._gather_field(scalar, labels, entity))
+
+                values = np.column_stack([column_values for column_values, _ in columns])
+                found = np.logical_and.reduce([column_found for _, column_found in columns])
+                values[~found] = np.nan
+                span.count(values=values.size)
+
+            self.field_components[key] = spec.labels(component_labels)
+            fields[key] = (entity, values[:, 0] if values.shape[1] == 1 else values)
+
+            DataExtractor.log("  [Extraction] {} had been extracted from frame {} ({} values)".format(
+                key, frame.incrementNumber, int(found.sum())))
+
+        return fields
+
+    def extract_frame_series(self):
+        """Streams the fields of the ``frames`` range into time-indexed arrays, per ZOI.
+
+        The ZOI geometry and sets are reused for every frame, every frame is
+        read once for all the ZOIs and only one frame of field data is held in
+        memory at a time.
+        """
+        frame_indices = self._series_frame_indices()
+        if not frame_indices:
+            return
+
+        DataExtractor.log("  [Extraction] Extracting {} frames of {}...".format(len(frame_indices), self.odb_name))
+
+        series = [{} for _ in self.zois]
+        entities = {}
+        times = []
+        for position, frame_index in enumerate(frame_indices):
+            if frame_index == self.frame_target % len(self.step.frames):
+                frame = self.frame
+                fields = self.target_fields
+            else:
+                frame = self.step.frames[frame_index]
+                fields = self._read_frame_fields(frame)
+
+            for (store_name, _, zoi_fields), arrays, values_of in zip(self.zois, series, self._split_fields(fields)):
+                for key, (entity, values) in values_of.items():
+                    if key not in arrays:
+                        arrays[key] = self.store.create_series(
+                            store_name, key, (len(frame_indices),) + values.shape, zoi_fields[key].dtype)
+                        entities[key] = entity
+                    arrays[key][position] = values
+
+            times.append(float(frame.frameValue))
+
+        for arrays in series:
+            for array in arrays.values():
+                array.flush()
+        del series
+
+        for store_name, _, _ in self.zois:
+            self.store.register_series(store_name, frame_indices, times, entities)
+            DataExtractor.log("  [Extraction] Frame series saved to: {}".format(
+                os.path.join(self.store.root, store_name, "series")))
+
+    def _gather_field(self, fdo, zoi_labels, entity, columns=None):
+        """Scatters the bulk data of ``fdo`` into one row per ZOI label.
+
+        ``columns`` selects the components kept from every block (all when
+        ``None``). Returns ``(values, found)``: a (n_labels, n_columns) float
+        array and a boolean mask of the rows that received data.
+        """
+        count = len(zoi_labels)
+        found = np.zeros(count, dtype=bool)
+        values = None
+        if count == 0:
+            return np.empty((0, 1)), found
+
+        row_of_label = label_index(zoi_labels)
+
+        for block in fdo.bulkDataBlocks:
+            if block.instance is not None and block.instance.name != self.instance_name:
+                continue
+
+            block_labels = block.nodeLabels if entity == 'nodes' else block.elementLabels
+            block_labels = np.asarray(block_labels, dtype=np.int64)
+            block_data = np.asarray(block.data).reshape(len(block_labels), -1)
+            if columns is not None:
+                block_data = block_data[:, columns]
+
+            rows = lookup_rows(row_of_label, block_labels)
+            hit = rows >= 0
+
+            if values is None:
+                values = np.zeros((count, block_data.shape[1]), dtype=np.float64)
+            values[rows[hit]] = block_data[hit]
+            found[rows[hit]] = True
+
+        if values is None:
+            values = np.zeros((count, 1 if columns is None else len(columns)), dtype=np.float64)
+
+        return values, found
+
+    def _order_connectivity(self, element_nodes, zoi_node_rows, zoi_node_coords):
+        """Orders every row of ``element_nodes`` counter-clockwise in the X-Z plane.
+
+        ``element_nodes`` is an (n_elements x n) array of ZOI node labels,
+        ``zoi_node_rows`` their ``label_index`` in ``zoi_node_coords``; the
+        centroid of each row is the mean over its n nodes.
+        """
+        rows = zoi_node_rows[element_nodes]
+        x = zoi_node_coords[rows, 0]
+        z = zoi_node_coords[rows, 2]
+
+        centroid_x = x.mean(axis=1, keepdims=True)
+        centroid_z = z.mean(axis=1, keepdims=True)
+
+        angles = np.arctan2(z - centroid_z, x - centroid_x)
+        order = np.argsort(angles, axis=1, kind='mergesort')
+
+        return element_nodes[np.arange(len(element_nodes))[:, None], order]
 
     def process_path_data(self):
-            DataExtractor.log("[Extractor] Saving all extracted data to JSON file...")
-
-            output_file_name = "data.json"
-            output_json_path = os.path.join(self.path_dir_config, output_file_name)
-
-            with open(output_json_path, "w") as f:
-                json.dump(self.data, f, indent=4)
+        DataExtractor.log("  [Extraction] Saving the extracted arrays of {}...".format(self.odb_name))
 
-            DataExtractor.log("  [Extraction] File saved to: {}".format(output_json_path))
+        for store_name, _, fields in self.zois:
+            fields.save(self.store, store_name)
+            DataExtractor.log("  [Extraction] Arrays saved to: {}".format(os.path.join(self.store.root, store_name)))
@@ -1,34 +1,143 @@
+import argparse
+import json
 import os
+import shutil
 import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from utilities.clean_files import clean_files
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common import tracing
+from common.array_store import ArrayStore, export_json, merge_stores
+from common.live_output import run_streaming
+from common.zoi_model import expand_zois
+
 ABAQUS_CMD_PATH = r'C:\SIMULIA\Commands\abq2023.bat'
 
+# The backend only needs the ODB API: `abaqus python` skips the CAE kernel
+# start and its license token; `abaqus cae` is kept as a fallback.
+BACKEND_COMMANDS = {
+    "python": '"{abaqus}" python "extraction/backend/command.py"',
+    "cae": '"{abaqus}" cae startup="extraction/backend/command.py"',
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Extracts the ZOI data of the ODBs listed in config/odb_config.json.")
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="number of Abaqus extraction processes running at the same time"
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=1,
+        help="number of ODBs handled by each extraction process"
+    )
+    parser.add_argument(
+        "--mode", choices=sorted(BACKEND_COMMANDS), default="python",
+        help="Abaqus interpreter the extraction runs under (default: python)"
+    )
+    parser.add_argument(
+        "--debug-json", action="store_true",
+        help="also export the extracted arrays to config/data.json"
+    )
+    return parser.parse_args()
+
+
+def read_odb_config(path_dir_config):
+    with open(os.path.join(path_dir_config, "odb_config.json"), 'r') as file:
+        return json.load(file)
 
-def main():
-    os.environ["BACKEND_PROJECT_PATH"] = os.path.join(os.getcwd(), "extraction/backend")
-    
-    abaqus_command = f'"{ABAQUS_CMD_PATH}" cae startup="extraction/backend/command.py"'
 
+def split_chunks(keys, chunk_size):
+    chunk_size = max(1, chunk_size)
+    return [keys[i:i + chunk_size] for i in range(0, len(keys), chunk_size)]
+
+
+def run_worker(worker_id, odb_keys, part_store_path, mode):
+    env = dict(os.environ)
+    env["BACKEND_PROJECT_PATH"] = os.path.join(os.getcwd(), "extraction/backend")
+    env["EXTRACTION_ODB_KEYS"] = json.dumps(odb_keys)
+    env["EXTRACTION_STORE_PATH"] = part_store_path
+    env["EXTRACTION_LOG_PATH"] = os.path.join("log", f"abaqus_log_{worker_id}.txt")
+    env["EXTRACTION_MODE"] = mode
+    log_path = os.path.join(env["BACKEND_PROJECT_PATH"], env["EXTRACTION_LOG_PATH"])
+
+    abaqus_command = BACKEND_COMMANDS[mode].format(abaqus=ABAQUS_CMD_PATH)
+
+    started = time.time()
+    env["EXTRACTION_LAUNCH_TIME"] = repr(started)
     try:
-        result = subprocess.run(
-            abaqus_command, shell=True, check=True, capture_output=True, text=True
-        )
-        print("\n=== Abaqus Outputs ===\n")
-        print('Retorno:', result.returncode, "\n")
-        print('STDOUT:', result.stdout, "\n")
-        print('STDERR:', result.stderr)
+        # Worker threads have their own span stack, so these are top-level stages.
+        with tracing.span("abaqus_worker", worker=worker_id, mode=mode) as span:
+            result = run_streaming(
+                abaqus_command, env=env, tail_paths=[log_path], prefix=f"[worker {worker_id}] "
+            )
+            span.count(odbs=len(odb_keys))
+        print(f"\n=== Abaqus finished (worker {worker_id}: {', '.join(odb_keys)}) ===")
+        print('Retorno:', result.returncode)
+        print(f"Wall clock (abaqus {mode}): {time.time() - started:.1f} s")
         print("==========================")
-        clean_files()
+        return True
 
     except subprocess.CalledProcessError as e:
-        print("=== Abaqus 'except' error ===\n")
-        print('Retorno:', e.returncode, "\n")
-        print('STDOUT:', e.stdout, "\n")
-        print('STDERR:', e.stderr)
+        print(f"=== Abaqus 'except' error (worker {worker_id}: {', '.join(odb_keys)}) ===\n")
+        print('Retorno:', e.returncode)
+        print(f"Wall clock (abaqus {mode}): {time.time() - started:.1f} s")
         print("==========================\n")
+        return False
+
+
+def main():
+    args = parse_args()
+
+    path_dir_config = os.path.join(os.getcwd(), "config")
+    trace_path = os.path.join(os.getcwd(), "extraction", "backend", "log", "launcher_trace.jsonl")
+    tracer = tracing.configure(trace_path)
+    store_path = os.path.join(path_dir_config, "data")
+    parts_path = os.path.join(path_dir_config, "data_parts")
+
+    odb_config = read_odb_config(path_dir_config)
+    odb_keys = list(odb_config.keys())
+    store_names = list(expand_zois(odb_config).keys())
+    chunks = split_chunks(odb_keys, args.chunk_size)
+    part_store_paths = [os.path.join(parts_path, str(i)) for i in range(len(chunks))]
+
+    if os.path.exists(parts_path):
+        shutil.rmtree(parts_path)
+
+    with tracer.span("workers") as span:
+        with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+            succeeded = list(pool.map(
+                run_worker, range(len(chunks)), chunks, part_store_paths, [args.mode] * len(chunks)
+            ))
+        span.count(workers=len(chunks))
+
+    with tracer.span("merge_stores") as span:
+        merged = merge_stores(
+            store_path,
+            [path for path, ok in zip(part_store_paths, succeeded) if ok],
+            order=store_names
+        )
+        shutil.rmtree(parts_path, ignore_errors=True)
+        span.count(zois=len(merged))
+    print(f"Merged {len(merged)} of {len(store_names)} ZOI(s) from {len(odb_keys)} ODB(s) into: {store_path}")
+
+    if args.debug_json:
+        output_json_path = os.path.join(path_dir_config, "data.json")
+        with tracer.span("export_json"):
+            export_json(ArrayStore(store_path), output_json_path)
+        print(f"Debug JSON written to: {output_json_path}")
+
+    clean_files()
+
+    print(f"\n=== Launcher stages (trace: {trace_path}) ===")
+    print(tracer.summary())
+    print("==========================")
+    tracer.close()
 
 
 if __name__ == "__main__":
     main()
-
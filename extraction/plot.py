@@ -1,76 +1,286 @@
-import json
-import matplotlib.pyplot as plt
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+
+matplotlib.use("Agg")
+
 import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import PolyCollection
+from matplotlib.figure import Figure
+from matplotlib.tri import Triangulation
 
-def plot_element_stress_s11(file_path):
-    with open(file_path, 'r') as f:
-        raw_data = json.load(f)
+FRAMEWORK_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, FRAMEWORK_PATH)
 
-    data = raw_data.get('BIGGER', raw_data)
-    nodes_data = data['nodes']
-    elements_data = data['elements']
+from common.array_store import ArrayStore
+from common.field_catalog import default_components
+from common.zoi_model import ZoiMesh
 
-    node_coords = {}
-    for node_id, values in nodes_data.items():
-        node_coords[int(node_id)] = (
-            values['coords'][0],
-            values['coords'][2]
-        )
+STORE_PATH = os.path.join(FRAMEWORK_PATH, "config", "data")
+PLOTS_PATH = os.path.join(FRAMEWORK_PATH, "extraction", "plots")
 
-    centroids_x = []
-    centroids_z = []
-    s11_values = []
-
-    for elem_id, values in elements_data.items():
-        if 'S' in values and 'connectivity' in values:
-            s11 = values['S'][0]
-            elem_x = []
-            elem_z = []
-            valid_element = True
-            for node_id in values['connectivity']:
-                if node_id in node_coords:
-                    x, z = node_coords[node_id]
-                    elem_x.append(x)
-                    elem_z.append(z)
-                else:
-                    valid_element = False
-                    break
-            
-            if valid_element and elem_x:
-                center_x = sum(elem_x) / len(elem_x)
-                center_z = sum(elem_z) / len(elem_z)
-                centroids_x.append(center_x)
-                centroids_z.append(center_z)
-                s11_values.append(s11)
-
-    if not s11_values:
-        print("No S11 data found to plot.")
-        return
-
-    min_val = min(s11_values)
-    max_val = max(s11_values)
-    levels = np.linspace(min_val, max_val, 11)
-
-    plt.figure(figsize=(10, 6))
-
-    contour = plt.tricontourf(
-        centroids_x,
-        centroids_z,
-        s11_values,
-        levels=levels,
-        cmap='jet'
+# Figure name -> (stored field, component label or None for scalar fields).
+# Figures whose field or component was not extracted are skipped.
+FIGURES = {
+    "S11": ("S", "S11"), "S22": ("S", "S22"), "S33": ("S", "S33"), "S12": ("S", "S12"), "S13": ("S", "S13"),
+    "PE11": ("PE", "PE11"), "PE22": ("PE", "PE22"), "PE33": ("PE", "PE33"), "PE12": ("PE", "PE12"),
+    "PEEQ": ("PEEQ", None),
+    "NT11": ("NT11", None),
+}
+
+LABELS = {"S": "Stress", "PE": "Plastic strain", "PEEQ": "Equivalent plastic strain", "NT11": "Temperature"}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Renders the extracted ZOI fields of every ODB and frame to PNG.")
+    parser.add_argument("--store", default=STORE_PATH, help="array store written by the extraction")
+    parser.add_argument("--out", default=PLOTS_PATH, help="output directory, one sub-directory per ODB")
+    parser.add_argument("--odbs", nargs="*", default=None, help="ODB keys to render (default: all)")
+    parser.add_argument(
+        "--figures", nargs="*", default=list(FIGURES), choices=list(FIGURES), metavar="FIGURE",
+        help="figures to render (default: all of " + ", ".join(FIGURES) + ")"
+    )
+    parser.add_argument(
+        "--mode", choices=("quads", "contour"), default="quads",
+        help="quads: element values on the mesh quads, node values by Gouraud shading (no re-triangulation); "
+             "contour: filled contours interpolated over a Delaunay triangulation"
     )
+    parser.add_argument("--levels", type=int, default=11, help="contour levels in contour mode")
+    parser.add_argument("--no-series", action="store_true", help="only render the target frame")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="rendering processes")
+    parser.add_argument("--dpi", type=int, default=150)
+    return parser.parse_args()
+
+
+class MeshGeometry(object):
+    """Plot geometry of one ZOI, computed once per ODB with vectorized gathers."""
+
+    def __init__(self, mesh):
+        xz = mesh.plane_coords()
+        rows = mesh.node_rows(mesh.quads())
+        valid = rows >= 0
+
+        counts = valid.sum(axis=1)
+        gathered = xz[np.where(valid, rows, 0)] * valid[:, :, None]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self.centroids = gathered.sum(axis=1) / counts[:, None]
+
+        self.xz = xz
+        self.full_quads = valid.all(axis=1)
+        self.quad_rows = rows[self.full_quads]
+        self.polygons = xz[self.quad_rows]
+        # Every quad split along its 0-2 diagonal: the mesh is its own triangulation.
+        self.triangles = np.concatenate([self.quad_rows[:, (0, 1, 2)], self.quad_rows[:, (0, 2, 3)]])
+
+
+_geometry_cache = {}
+
+
+def load_geometry(store, odb_name):
+    key = (store.root, odb_name)
+    if key not in _geometry_cache:
+        _geometry_cache[key] = MeshGeometry(ZoiMesh.from_store(store, odb_name))
+    return _geometry_cache[key]
+
+
+def component_column(store, odb_name, field, component, n_columns):
+    """Column of ``component`` in the stored ``field`` (None for scalars, -1 when it was not extracted)."""
+    if component is None:
+        return None
+    labels = store.components(odb_name).get(field) or default_components(field, n_columns)
+    return labels.index(component) if component in labels else -1
+
+
+def figure_values(array, column):
+    return np.asarray(array if column is None or array.ndim == 1 else array[:, column], dtype=np.float64)
+
+
+class FrameCanvas(object):
+    """Agg figure reused for every PNG a worker renders.
+
+    The layout is fixed (no tight_layout pass) and, in quads mode, the
+    element PolyCollection of an ODB is built once and only gets new
+    values; node fields and contours are drawn and removed per figure.
+    """
+
+    def __init__(self):
+        self.fig = Figure(figsize=(10, 6))
+        FigureCanvasAgg(self.fig)
+        self.ax = self.fig.add_axes([0.08, 0.1, 0.74, 0.8])
+        self.ax.set_xlabel("X Coordinate")
+        self.ax.set_ylabel("Z Coordinate")
+
+        self.geometry = None
+        self.quads = None
+        self.artist = None
+
+    def set_geometry(self, geometry):
+        if geometry is self.geometry:
+            return
+
+        if self.quads is not None:
+            self.quads.remove()
+            self.quads = None
+        self.geometry = geometry
+
+        x_min, z_min = np.nanmin(geometry.xz, axis=0)
+        x_max, z_max = np.nanmax(geometry.xz, axis=0)
+        self.ax.set_xlim(x_min, x_max)
+        self.ax.set_ylim(z_min, z_max)
+        self.ax.set_aspect("equal")
+
+    def draw_quads(self, values, entity):
+        geometry = self.geometry
+        if entity == "nodes":
+            finite = np.isfinite(values)
+            triangles = geometry.triangles[finite[geometry.triangles].all(axis=1)]
+            triangulation = Triangulation(geometry.xz[:, 0], geometry.xz[:, 1], triangles)
+            self.artist = self.ax.tripcolor(
+                triangulation, np.where(finite, values, 0.0), shading="gouraud", cmap="jet"
+            )
+            return self.artist
+
+        if self.quads is None:
+            self.quads = PolyCollection(geometry.polygons, cmap="jet", edgecolors="face", linewidths=0.0,
+                                        antialiaseds=False)
+            self.ax.add_collection(self.quads)
+
+        shown = values[geometry.full_quads]
+        self.quads.set_array(np.ma.masked_invalid(shown))
+        self.quads.set_clim(np.nanmin(shown), np.nanmax(shown))
+        self.quads.set_visible(True)
+        return self.quads
+
+    def draw_contour(self, values, entity, levels):
+        geometry = self.geometry
+        points = geometry.centroids if entity == "elements" else geometry.xz
+        keep = np.isfinite(values) & np.isfinite(points).all(axis=1)
+        if keep.sum() < 3:
+            return None
+
+        levels = np.linspace(values[keep].min(), values[keep].max(), levels)
+        if levels[0] == levels[-1]:
+            levels = levels[0] + np.array([-0.5, 0.5])
+        self.artist = self.ax.tricontourf(
+            points[keep, 0], points[keep, 1], values[keep], levels=levels, cmap="jet"
+        )
+        return self.artist
+
+    def render(self, geometry, values, entity, title, label, output_path, mode, levels, dpi):
+        if not np.isfinite(values).any():
+            return False
+
+        self.set_geometry(geometry)
+        if self.quads is not None:
+            self.quads.set_visible(False)
+
+        if mode == "quads":
+            mappable = self.draw_quads(values, entity)
+        else:
+            mappable = self.draw_contour(values, entity, levels)
+        if mappable is None:
+            return False
+
+        colorbar = self.fig.colorbar(mappable, cax=self.fig.add_axes([0.86, 0.1, 0.025, 0.8]), label=label)
+        colorbar.formatter.set_useOffset(False)
+        self.ax.set_title(title)
+
+        self.fig.savefig(output_path, dpi=dpi, pil_kwargs={"compress_level": 1})
+
+        # The colorbar follows its mappable: it goes before the next values are set.
+        colorbar.remove()
+        if self.artist is not None:
+            self.artist.remove()
+            self.artist = None
+        return True
+
+
+_canvas = None
+
+
+def get_canvas():
+    global _canvas
+    if _canvas is None:
+        _canvas = FrameCanvas()
+    return _canvas
+
+
+def render_frame(task):
+    """Renders every requested figure of one ODB frame; returns the number of PNGs written.
+
+    ``task`` is ``(store root, odb, frame position or None for the target
+    frame, frame label, figures, output dir, mode, levels, dpi)``.
+    """
+    store_root, odb_name, position, frame_label, figures, out_dir, mode, levels, dpi = task
+    store = ArrayStore(store_root)
+    geometry = load_geometry(store, odb_name)
+    entities = store.fields(odb_name)
+    if position is not None:
+        entities = store.series(odb_name)["fields"]
+
+    written = 0
+    for figure in figures:
+        field, component = FIGURES[figure]
+        if field not in entities:
+            continue
+
+        if position is None:
+            array = store.load(odb_name, field)
+        else:
+            array = store.load_series(odb_name, field)[position]
+
+        column = component_column(store, odb_name, field, component, array.shape[-1] if array.ndim > 1 else 1)
+        if column == -1:
+            continue
+
+        output_path = os.path.join(out_dir, f"{figure}_{frame_label}.png")
+        title = f"{odb_name} - {figure} ({frame_label})"
+        if get_canvas().render(geometry, figure_values(array, column), entities[field], title,
+                               f"{LABELS[field]} {figure}", output_path, mode, levels, dpi):
+            written += 1
+    return written
+
+
+def build_tasks(store, odb_names, figures, out_root, mode, levels, dpi, series=True):
+    tasks = []
+    for odb_name in odb_names:
+        out_dir = os.path.join(out_root, odb_name)
+        os.makedirs(out_dir, exist_ok=True)
+        tasks.append((store.root, odb_name, None, "target", figures, out_dir, mode, levels, dpi))
+
+        entry = store.series(odb_name) if series else None
+        if entry is None:
+            continue
+        for position, frame in enumerate(entry["frames"]):
+            tasks.append((store.root, odb_name, position, f"frame{frame:04d}", figures, out_dir, mode, levels, dpi))
+    return tasks
+
+
+def main():
+    args = parse_args()
+    store = ArrayStore(args.store)
+    odb_names = args.odbs or store.odb_names()
+
+    started = time.time()
+    tasks = build_tasks(store, odb_names, args.figures, args.out, args.mode, args.levels, args.dpi,
+                        series=not args.no_series)
+
+    if args.workers > 1 and len(tasks) > 1:
+        # Tasks of the same ODB stay together so each worker builds a geometry once.
+        chunksize = max(1, len(tasks) // (args.workers * 4))
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            written = sum(pool.map(render_frame, tasks, chunksize=chunksize))
+    else:
+        written = sum(render_frame(task) for task in tasks)
 
-    colorbar = plt.colorbar(contour, label='Stress S11 (Pa)', ticks=levels)
-    colorbar.ax.set_yticklabels([f"{t:.6g}" for t in levels])
-    
-    plt.axis('equal')
-    plt.title('2D Element Stress Contour (S11)')
-    plt.xlabel('X Coordinate')
-    plt.ylabel('Z Coordinate')
+    print(f"{written} figure(s) of {len(odb_names)} ODB(s) and {len(tasks)} frame(s) "
+          f"rendered in {time.time() - started:.1f} s: {args.out}")
 
-    plt.tight_layout()
-    plt.show()
 
 if __name__ == "__main__":
-    plot_element_stress_s11("C:\\Users\\adam-jd1r2h3ttnmecz9\\Desktop\\arthur\\EXTRACTIONEXPMODEL\\backend\\data\\datateste.json")
\ No newline at end of file
+    main()
@@ -0,0 +1,299 @@
+import argparse
+import fnmatch
+import glob
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+
+FRAMEWORK_PATH = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, FRAMEWORK_PATH)
+
+from common import tracing
+from common.array_store import MANIFEST_NAME, ArrayStore
+from common.solver_tuning import (
+    CALIBRATION_PATH, DOFS_PER_NODE, host_cores, host_memory_mb, read_runs, settings_path, similar_runs,
+)
+from common.stage_cache import StageCache, code_version, file_fingerprint
+from common.zoi_model import expand_zois, relaxation_odb_name
+
+ABAQUS_CMD_PATH = r'C:\SIMULIA\Commands\abq2023.bat'
+
+CONFIG_PATH = os.path.join(FRAMEWORK_PATH, "config")
+STORE_PATH = os.path.join(CONFIG_PATH, "data")
+BACKEND_PATH = os.path.join(FRAMEWORK_PATH, "relaxation", "backend")
+INP_PATH = os.path.join(BACKEND_PATH, "files", "inp")
+JOB_PATH = os.path.join(BACKEND_PATH, "files", "job")
+CACHE_PATH = os.path.join(FRAMEWORK_PATH, ".stage_cache")
+
+# model_config.json entries read by the INP modifier (the rest reaches it through the CAE deck).
+INITIAL_CONDITION_KEYS = (
+    ("generalInformation", "modelName"),
+    ("generalInformation", "odbOrtCutName"),
+    ("partData", "createPartInformation", "Name"),
+    ("assemblyAndSimulationData", "initialTemperature"),
+    ("partData", "remeshInformation"),
+)
+
+# model_config.json entries read by the remeshing stage.
+REMESH_KEYS = (
+    ("generalInformation", "odbOrtCutName"),
+    ("partData", "remeshInformation"),
+)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Runs extraction -> relaxation deck -> solve, skipping the stages whose inputs are cached."
+    )
+    parser.add_argument(
+        "--deck", choices=("cae", "writer"), default="cae",
+        help="build the deck with Abaqus CAE + the INP modifier, or with relaxation/inp_writer.py"
+    )
+    parser.add_argument("--until", default=None, help="last stage to run (default: solve)")
+    parser.add_argument("--force", nargs="*", default=[], help="stages to run even when they are cached")
+    parser.add_argument("--workers", type=int, default=1, help="extraction processes running at the same time")
+    parser.add_argument("--cpus", type=int, default=None, help="cpus passed to the solver")
+    parser.add_argument("--cache-dir", default=CACHE_PATH, help="stage cache directory")
+    parser.add_argument("--cache-size-gb", type=float, default=20.0, help="size of the stage cache before eviction")
+    parser.add_argument("--no-cache", action="store_true", help="run every stage and leave the cache untouched")
+    parser.add_argument("--dry-run", action="store_true", help="only print which stages would hit or miss")
+    return parser.parse_args()
+
+
+def read_json(path):
+    with open(path, 'r') as file:
+        return json.load(file)
+
+
+def config_subset(config, paths):
+    subset = {}
+    for path in paths:
+        value = config
+        for key in path:
+            value = value.get(key) if isinstance(value, dict) else None
+        subset["/".join(path)] = value
+    return subset
+
+
+def source_files(*patterns):
+    return [path for pattern in patterns for path in glob.glob(os.path.join(FRAMEWORK_PATH, pattern))]
+
+
+def run(command, cwd=FRAMEWORK_PATH, env=None):
+    print(f"[Pipeline] $ {command if isinstance(command, str) else ' '.join(command)}", flush=True)
+    subprocess.run(command, cwd=cwd, env=env, check=True, shell=isinstance(command, str))
+
+
+class Stage:
+    """One node of the pipeline.
+
+    ``inputs`` returns everything the stage output depends on besides the
+    upstream stage (config subsets, input file fingerprints); ``code`` lists
+    the source files whose contents version the stage. The outputs are the
+    entries of ``output_dir`` that match ``output_patterns``.
+    """
+
+    def __init__(self, name, inputs, code, output_dir, output_patterns, command):
+        self.name = name
+        self.inputs = inputs
+        self.code = code
+        self.output_dir = output_dir
+        self.output_patterns = output_patterns
+        self.command = command
+
+    def outputs(self):
+        names = sorted(name for name in os.listdir(self.output_dir)
+                       if any(fnmatch.fnmatch(name, pattern) for pattern in self.output_patterns))
+        return dict((name, os.path.join(self.output_dir, name)) for name in names)
+
+
+def relaxation_entry(model_config, odb_config):
+    """Store key of the relaxation ZOI (``odbOrtCutName``, else the first ZOI), remeshed when enabled."""
+    odb_name = model_config["generalInformation"]["odbOrtCutName"] or list(expand_zois(odb_config).keys())[0]
+    return relaxation_odb_name(model_config, odb_name)
+
+
+def similar_runs_summary(model_config, odb_config, job_name):
+    """Count and digest of the recorded runs similar in size to the extracted relaxation mesh.
+
+    Runs of ``job_name`` itself are left out: recording the solve of a deck
+    must not invalidate that deck, while a run of another job of the same
+    size (a sweep, another model) retunes it.
+    """
+    entry = ArrayStore(STORE_PATH).read_manifest()["odbs"].get(relaxation_entry(model_config, odb_config))
+    if entry is None:
+        return None
+
+    runs = [run for run in similar_runs({"runs": read_runs()}, DOFS_PER_NODE * entry["nodes"])
+            if run.get("job") != job_name]
+    digest = hashlib.sha256(json.dumps(runs, sort_keys=True).encode('utf-8')).hexdigest()
+    return {"count": len(runs), "digest": digest}
+
+
+def solver_inputs(model_config, odb_config, job_name):
+    """What the solver settings of the deck depend on besides model_config.json.
+
+    In auto mode they are tuned from the calibration table, the host and the
+    recorded runs of a similar size (see similar_runs_summary).
+    """
+    controls = model_config["assemblyAndSimulationData"].get("solverControls", {})
+    if controls.get("mode", "fixed") != "auto":
+        return None
+
+    return {
+        "calibration": read_json(CALIBRATION_PATH),
+        "cores": host_cores(),
+        "memory_mb": host_memory_mb(),
+        "runs": similar_runs_summary(model_config, odb_config, job_name),
+    }
+
+
+def build_stages(args, model_config, odb_config):
+    model_name = str(model_config["generalInformation"]["modelName"])
+    job_name = f"{model_name}_modified"
+    model_config_path = os.path.join(CONFIG_PATH, "model_config.json")
+    monitor_config_path = os.path.join(CONFIG_PATH, "monitor_config.json")
+    deck_patterns = [f"{job_name}.inp", f"{model_name}_initial_*.inp", f"{model_name}_solver.json"]
+
+    backend_env = dict(os.environ)
+    backend_env["BACKEND_PROJECT_PATH"] = BACKEND_PATH
+    backend_env["RELAXATION_MODEL_CONFIG"] = model_config_path
+    backend_env["RELAXATION_INP_PATH"] = INP_PATH
+
+    solve_command = [sys.executable, os.path.join(FRAMEWORK_PATH, "relaxation", "monitor.py"),
+                     "--job-dir", JOB_PATH, "--job", job_name, "--input", os.path.join(INP_PATH, f"{job_name}.inp"),
+                     "--settings", settings_path(INP_PATH, model_name)]
+    if args.cpus:
+        solve_command += ["--cpus", str(args.cpus)]
+
+    stages = [Stage(
+        "extraction",
+        lambda: {
+            "odb_config": odb_config,
+            "odbs": [file_fingerprint(entry["odb_path"]) for entry in odb_config.values()],
+        },
+        source_files("extraction/backend/*.py", "common/array_store.py", "common/zoi_model.py",
+                     "common/spatial_index.py", "common/field_catalog.py"),
+        CONFIG_PATH, ["data"],
+        lambda: run([sys.executable, os.path.join("extraction", "main.py"), "--workers", str(args.workers)]),
+    )]
+
+    if model_config["partData"].get("remeshInformation", {}).get("enabled", False):
+        stages.append(Stage(
+            "remesh",
+            lambda: {"model_config": config_subset(model_config, REMESH_KEYS)},
+            source_files("relaxation/remesh.py", "relaxation/inp_writer.py", "common/zoi_model.py",
+                         "common/array_store.py", "common/solver_tuning.py", "common/relaxation_steps.py"),
+            STORE_PATH, [relaxation_entry(model_config, odb_config), MANIFEST_NAME],
+            lambda: run([sys.executable, os.path.join("relaxation", "remesh.py"), "--model-config", model_config_path]),
+        ))
+
+    if args.deck == "cae":
+        stages.append(Stage(
+            "relaxation_model",
+            lambda: {"model_config": model_config, "solver": solver_inputs(model_config, odb_config, job_name)},
+            source_files("relaxation/backend/command.py", "relaxation/backend/rename_model.py",
+                         "relaxation/backend/create_material.py", "relaxation/backend/rebuild_mesh.py",
+                         "relaxation/backend/assembly_and_simulation.py", "common/zoi_model.py",
+                         "common/solver_tuning.py", "common/relaxation_steps.py",
+                         "common/initial_temperature.py"),
+            INP_PATH, [f"{model_name}.inp", f"{model_name}_solver.json"],
+            lambda: run(f'"{ABAQUS_CMD_PATH}" cae noGUI="relaxation/backend/command.py"', env=backend_env),
+        ))
+        stages.append(Stage(
+            "initial_conditions",
+            lambda: {"model_config": config_subset(model_config, INITIAL_CONDITION_KEYS)},
+            source_files("relaxation/inp_modifier_initial_conditions.py", "common/zoi_model.py",
+                         "common/initial_temperature.py"),
+            INP_PATH, deck_patterns,
+            lambda: run([sys.executable, os.path.join("relaxation", "inp_modifier_initial_conditions.py"),
+                         "--model-config", model_config_path, "--inp-dir", INP_PATH]),
+        ))
+    else:
+        stages.append(Stage(
+            "relaxation_deck",
+            lambda: {"model_config": model_config, "solver": solver_inputs(model_config, odb_config, job_name)},
+            source_files("relaxation/inp_writer.py", "relaxation/inp_modifier_initial_conditions.py",
+                         "common/zoi_model.py", "common/solver_tuning.py", "common/relaxation_steps.py",
+                         "common/initial_temperature.py"),
+            INP_PATH, deck_patterns,
+            lambda: run([sys.executable, os.path.join("relaxation", "inp_writer.py"),
+                         "--model-config", model_config_path, "--inp-dir", INP_PATH]),
+        ))
+
+    stages.append(Stage(
+        "solve",
+        lambda: {
+            "cpus": args.cpus,
+            "monitor_config": read_json(monitor_config_path) if os.path.exists(monitor_config_path) else None,
+        },
+        source_files("relaxation/monitor.py", "common/solver_tuning.py"),
+        JOB_PATH, [f"{job_name}.*"],
+        lambda: run(solve_command, cwd=JOB_PATH),
+    ))
+
+    return stages
+
+
+def main():
+    args = parse_args()
+    model_config = read_json(os.path.join(CONFIG_PATH, "model_config.json"))
+    odb_config = read_json(os.path.join(CONFIG_PATH, "odb_config.json"))
+
+    stages = build_stages(args, model_config, odb_config)
+    names = [stage.name for stage in stages]
+    if args.until is not None:
+        if args.until not in names:
+            raise SystemExit(f"Unknown stage '{args.until}'; the stages are: {', '.join(names)}")
+        stages = stages[:names.index(args.until) + 1]
+
+    cache = StageCache(args.cache_dir, int(args.cache_size_gb * 1e9))
+    tracer = tracing.configure(os.path.join(BACKEND_PATH, "log", "pipeline_trace.jsonl"))
+
+    # Each key chains the key of the previous stage, so a changed input
+    # invalidates every stage downstream of it.
+    upstream = None
+    rows = []
+    for stage in stages:
+        inputs = {
+            "upstream": upstream,
+            "code": code_version(stage.code),
+            "inputs": stage.inputs(),
+        }
+        key = cache.key(stage.name, inputs)
+        upstream = key
+
+        cached = not args.no_cache and cache.lookup(stage.name, key)
+        forced = stage.name in args.force
+        status = "HIT" if cached and not forced else ("FORCED" if forced else "MISS")
+        if args.dry_run:
+            rows.append((stage.name, status, key, 0.0))
+            continue
+
+        started = time.time()
+        with tracer.span(stage.name, status=status):
+            if status == "HIT":
+                restored = cache.restore(key, stage.output_dir)
+                print(f"[Pipeline] {stage.name}: cached ({', '.join(restored)})", flush=True)
+            else:
+                stage.command()
+                if not args.no_cache:
+                    cache.save(stage.name, key, stage.outputs(), inputs)
+        rows.append((stage.name, status, key, time.time() - started))
+
+    print("\n=== Pipeline ===\n")
+    print(f"{'stage':<22}{'status':<8}{'key':<14}{'wall [s]':>10}")
+    for name, status, key, wall in rows:
+        print(f"{name:<22}{status:<8}{key[:12]:<14}{wall:>10.1f}")
+    if not args.no_cache and not args.dry_run:
+        print("\nStage cache:")
+        print(cache.summary())
+    print("==========================")
+    tracer.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 import os
+import numpy as np
 from abaqus import *
 from abaqusConstants import *
 from part import *
@@ -12,6 +13,10 @@ from mesh import *
 from visualization import *
 from connectorBehavior import *
 
+from common.initial_temperature import initial_temperature_method
+from common.relaxation_steps import TIME_POINTS_NAME, restart_options, step_time_points
+from common.solver_tuning import settings_path, solver_settings, write_settings
+
 
 class AssemblyModel():
     def __init__(self, data_model, data_mesh):
@@ -26,6 +31,8 @@ class AssemblyModel():
         self.modelName = str(data_model['generalInformation']['modelName'])
         self.PartName = str(data_model['partData']['createPartInformation']['Name'])
         self.TimePeriod = data_model['assemblyAndSimulationData']['stepsAndHistoryInformation']['timePeriod']
+        self.TimePoints = step_time_points(data_model['assemblyAndSimulationData']['stepsAndHistoryInformation'])
+        self.Restart = restart_options(data_model['assemblyAndSimulationData']['stepsAndHistoryInformation'])
         self.Dimensions = data_model['partData']['createPartInformation']['Dimensions']
         self.xPoints = sorted([self.Dimensions['x1'], self.Dimensions['x2']])
         self.yPoints = sorted([self.Dimensions['z1'], self.Dimensions['z2']])
@@ -33,7 +40,9 @@ class AssemblyModel():
         self.sinkTemp = data_model['assemblyAndSimulationData']['convBC']['sinkTemp']
         self.eleSize = data_model['partData']['createPartInformation']['eleSize']
         self.odbOrtCutName = str(data_model['generalInformation']['odbOrtCutName'])
-        self.NodesInfo = data_mesh[self.odbOrtCutName]['nodes']
+        self.initialTemperature = initial_temperature_method(data_model)
+        self.Fields = data_mesh
+        self.Solver = solver_settings(data_model, data_mesh.mesh.n_nodes)
 
         self.m = mdb.models[self.modelName]
 
@@ -43,8 +52,17 @@ class AssemblyModel():
 
     def stepsAndHistory(self):
         self.m.CoupledTempDisplacementStep(
-            deltmx=20.0, name='RelaxationStep', previous='Initial', 
-            timePeriod=self.TimePeriod, initialInc=1e-5, maxNumInc=1000, minInc=1e-6)
+            deltmx=self.Solver['deltmx'], name='RelaxationStep', previous='Initial', 
+            timePeriod=self.TimePeriod, initialInc=self.Solver['initialInc'],
+            maxNumInc=self.Solver['maxNumInc'], minInc=self.Solver['minInc'])
+
+        self.m.steps['RelaxationStep'].Restart(
+            frequency=self.Restart['frequency'], numberIntervals=0,
+            overlay=ON if self.Restart['overlay'] else OFF, timeMarks=OFF)
+
+        if self.TimePoints:
+            self.m.TimePoint(name=TIME_POINTS_NAME, points=tuple((point, ) for point in self.TimePoints))
+            self.m.fieldOutputRequests['F-Output-1'].setValues(timePoint=TIME_POINTS_NAME)
 
     def setFilmCondition(self):
         xMin = self.xPoints[0] - self.eleSize
@@ -142,8 +160,16 @@ class AssemblyModel():
             u1=SET, u2=SET, ur3=UNSET
             )
         
-        di = self.NodesInfo
-        tempField = tuple((di[str(nid)]['coords'][0], di[str(nid)]['coords'][2], 0.0, di[str(nid)]['NT11']) for nid in di.keys())
+        if self.initialTemperature == 'mapped':
+            self.setMappedTemperature(allNodesSet)
+
+    def setMappedTemperature(self, allNodesSet):
+        nt11 = self.Fields['NT11']
+        has_temp = ~np.isnan(nt11)
+        coords = self.Fields.mesh.plane_coords()[has_temp]
+        tempField = tuple(
+            (x, z, 0.0, t) for x, z, t in zip(coords[:, 0].tolist(), coords[:, 1].tolist(), nt11[has_temp].tolist())
+        )
         
         self.m.MappedField(description='', fieldDataType=
             SCALAR, localCsys=None, name='mapTempField', partLevelData=False, 
@@ -157,17 +183,18 @@ class AssemblyModel():
     def inpCreation(self):
         job = mdb.Job(atTime=None, contactPrint=OFF, description='', echoPrint=OFF, 
             explicitPrecision=SINGLE, getMemoryFromAnalysis=True, historyPrint=OFF, 
-            memory=90, memoryUnits=PERCENTAGE, model=self.modelName, modelPrint=
+            memory=self.Solver['memoryPercent'], memoryUnits=PERCENTAGE, model=self.modelName, modelPrint=
             OFF, multiprocessingMode=DEFAULT, name=self.modelName, 
-            nodalOutputPrecision=SINGLE, numCpus=12, numDomains=12, numGPUs=0, 
+            nodalOutputPrecision=SINGLE, numCpus=self.Solver['cpus'], numDomains=self.Solver['domains'], numGPUs=0, 
             numThreadsPerMpiProcess=1, queue=None, resultsFormat=ODB, scratch='', type=
             ANALYSIS, userSubroutine='', waitHours=0, waitMinutes=0)
         
         backend_path = os.getenv("BACKEND_PROJECT_PATH", None)
-        inp_folder_path = os.path.join(backend_path, 'files', 'inp')
+        inp_folder_path = os.getenv("RELAXATION_INP_PATH", None) or os.path.join(backend_path, 'files', 'inp')
         
         os.chdir(inp_folder_path)
         job.writeInput(consistencyChecking=OFF)
+        write_settings(settings_path(inp_folder_path, self.modelName), self.Solver)
 
         os.chdir(backend_path)
 
@@ -5,11 +5,15 @@ import json
 
 os.chdir(os.getenv("BACKEND_PROJECT_PATH", None))
 sys.dont_write_bytecode = True
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.getcwd())))
 
 from rebuild_mesh import RebuildMesh
 from rename_model import RenameModel
 from create_material import CreateMaterial
 from assembly_and_simulation import AssemblyModel
+from common import tracing
+from common.array_store import ArrayStore
+from common.zoi_model import ZoiFields, expand_zois, relaxation_odb_name
 
 from abaqus import *
 from abaqusConstants import *
@@ -23,22 +27,18 @@ from mesh import *
 from visualization import *
 from connectorBehavior import *
 
+LOG_PATH = os.path.join("log", "abaqus_log.txt")
+TRACE_PATH = os.path.join("log", "abaqus_log_trace.jsonl")
+
 
 class Command:
     def __init__(self):
-        log_path = "log/abaqus_log.txt"
-        if os.path.exists(log_path):
-            os.remove(log_path)
+        if os.path.exists(LOG_PATH):
+            os.remove(LOG_PATH)
 
     @staticmethod
     def log(msg):
-        log_dir = "log"
-        if not os.path.exists(log_dir):
-            os.makedirs(log_dir)
-        log_path = os.path.join(log_dir, "abaqus_log.txt")
-        with open(log_path, "a") as f:
-            f.write(msg + "\n")
-            f.flush()
+        tracing.log(msg)
 
     def _create_paths(self):
         self.backend_project_path = os.getenv("BACKEND_PROJECT_PATH", None)
@@ -52,7 +52,7 @@ class Command:
         Command.log("       - Extraction Dir Config Path: " + self.path_dir_config)
 
     def _read_model_config(self):
-        path_model_config = os.path.join(
+        path_model_config = os.getenv("RELAXATION_MODEL_CONFIG", None) or os.path.join(
             self.path_dir_config, "model_config.json"
         )
 
@@ -69,49 +69,64 @@ class Command:
         with open(path_odb_config, 'r') as file:
             odb_config = json.load(file)
 
-        return odb_config
+        return expand_zois(odb_config)
 
-    def _read_nodes_ele_data(self):
+    def _read_nodes_ele_data(self, odb_name):
         path_nodes_ele_data = os.path.join(
-            self.path_dir_config, "data.json"
+            self.path_dir_config, "data"
         )
 
-        with open(path_nodes_ele_data, 'r') as file:
-            nodes_ele_data = json.load(file)
-
-        return nodes_ele_data
+        return ZoiFields.from_store(ArrayStore(path_nodes_ele_data), odb_name, ('NT11',))
 
     def transfer_parameters_config(self, model_config, odb_config):
-        model_config["generalInformation"]["odbOrtCutName"] = list(odb_config.keys())[0]
+        if not model_config["generalInformation"]["odbOrtCutName"]:
+            model_config["generalInformation"]["odbOrtCutName"] = list(odb_config.keys())[0]
         model_config["partData"]["createPartInformation"]["Dimensions"] = odb_config[model_config["generalInformation"]["odbOrtCutName"]]["zoi_coordinates"]
         model_config["partData"]["createPartInformation"]["eleSize"] = odb_config[model_config["generalInformation"]["odbOrtCutName"]]["ele_size"]
 
         return model_config
 
     def run_command(self):
+        tracer = tracing.configure(TRACE_PATH, LOG_PATH)
+        try:
+            with tracer.span("relaxation_model"):
+                self._build_model()
+        finally:
+            Command.log("\n[Command] Stage summary (trace: {}):\n{}".format(TRACE_PATH, tracer.summary()))
+            tracer.close()
+
+    def _build_model(self):
         Command.log("[Command] Start model creation...\n")
 
         Command.log("   [Command] Creating path.\n")
         self._create_paths()
 
         Command.log("   [Command] Reading required data.\n")
-        data_model = self._read_model_config()
-        data_odb = self._read_odb_config()
-        data_nodes_ele = self._read_nodes_ele_data()
+        with tracing.span("read_data") as span:
+            data_model = self._read_model_config()
+            data_odb = self._read_odb_config()
 
-        data_model = self.transfer_parameters_config(data_model, data_odb)
+            data_model = self.transfer_parameters_config(data_model, data_odb)
+            data_nodes_ele = self._read_nodes_ele_data(
+                relaxation_odb_name(data_model, data_model["generalInformation"]["odbOrtCutName"]))
+            span.count(nodes=data_nodes_ele.mesh.n_nodes, elements=data_nodes_ele.mesh.n_elements)
 
         Command.log("       [Command] Renaming model.\n")
-        RenameModel(data_model)
+        with tracing.span("rename_model"):
+            RenameModel(data_model)
 
         Command.log("       [Command] Creating Material.\n")
-        CreateMaterial(data_model)
+        with tracing.span("create_material"):
+            CreateMaterial(data_model)
 
         Command.log("       [Command] Rebuilding mesh.\n")
-        RebuildMesh(data_model, data_nodes_ele)
+        with tracing.span("rebuild_mesh") as span:
+            RebuildMesh(data_model, data_nodes_ele)
+            span.count(nodes=data_nodes_ele.mesh.n_nodes, elements=data_nodes_ele.mesh.n_elements)
 
         Command.log("       [Command] Creating Assembly.\n")
-        AssemblyModel(data_model, data_nodes_ele)
+        with tracing.span("assembly_and_inp"):
+            AssemblyModel(data_model, data_nodes_ele)
 
         Command.log("[Command] End.")
 
@@ -124,12 +139,11 @@ if __name__ == "__main__":
     except Exception as e:
         import traceback
         
-        log_dir = "log"
+        log_dir = os.path.dirname(LOG_PATH)
         if not os.path.exists(log_dir):
             os.makedirs(log_dir)
-        log_path = os.path.join(log_dir, "abaqus_log.txt")
 
-        with open(log_path, "a") as f:
+        with open(LOG_PATH, "a") as f:
             f.write("\n====================================================\n")
             f.write("\n[COMMAND ERROR] An exception occurred during execution:\n")
             traceback.print_exc(file=f)
@@ -25,8 +25,7 @@ class RebuildMesh():
         self.PartName = str(data_model['partData']['createPartInformation']['Name'])
         self.odbOrtCutName = str(data_model['generalInformation']['odbOrtCutName'])
 
-        self.NodesInfo = data_mesh[self.odbOrtCutName]['nodes']
-        self.EleInfo = data_mesh[self.odbOrtCutName]['elements']
+        self.Mesh = data_mesh.mesh
 
         self.m = mdb.models[self.ModelName]
     
@@ -34,21 +33,18 @@ class RebuildMesh():
         self.p = self.m.Part(name=self.PartName, dimensionality=TWO_D_PLANAR, type=DEFORMABLE_BODY)
 
         node_dict = {}
-        for nid, val in self.NodesInfo.items():
-            x = float(val['coords'][0])
-            y = float(val['coords'][2])
-            coords = (x, y, 0.0)
-            label = int(nid) 
-            
-            obj = self.p.Node(coordinates=coords, label=label)
-            node_dict[nid] = obj
-
-        for eid, val in self.EleInfo.items():
-            connect = [str(n) for n in val['connectivity']]
+        labels = self.Mesh.labels.tolist()
+        coords = self.Mesh.plane_coords().tolist()
+        for label, (x, y) in zip(labels, coords):
+            node_dict[label] = self.p.Node(coordinates=(x, y, 0.0), label=label)
+
+        ele_labels = self.Mesh.element_labels.tolist()
+        connectivity = self.Mesh.quads().tolist()
+        for eid, connect in zip(ele_labels, connectivity):
             node_objs = (node_dict[connect[0]], node_dict[connect[1]],
                          node_dict[connect[2]], node_dict[connect[3]])
 
-            self.p.Element(nodes=node_objs, elemShape=QUAD4, label=int(eid))
+            self.p.Element(nodes=node_objs, elemShape=QUAD4, label=eid)
 
     def createSetsandSections(self):
         self.p.Set(elements= self.p.elements[:], name='allElements'+self.PartName)
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+import sys
+import os
+import json
+
+os.chdir(os.getenv("BACKEND_PROJECT_PATH", None))
+sys.dont_write_bytecode = True
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.getcwd())))
+
+# Only the ODB API is needed: the post-relaxation extraction runs under
+# `abaqus python`, one process per share of the frames.
+from relaxed_extractor import RelaxedExtractor
+from common import tracing
+
+LOG_PATH = os.getenv("RELAXED_LOG_PATH", os.path.join("log", "relaxed_log.txt"))
+TRACE_PATH = os.path.splitext(LOG_PATH)[0] + "_trace.jsonl"
+RELAXED_MODE = os.getenv("RELAXED_MODE", "python")
+
+
+class Command:
+    def __init__(self):
+        if os.path.exists(LOG_PATH):
+            os.remove(LOG_PATH)
+
+        tracer = tracing.configure(TRACE_PATH, LOG_PATH)
+        try:
+            with tracer.span("relaxed_extraction"):
+                Command.log("[Command] Starting execution...\n")
+                self.start_extractor()
+                Command.log("[Command] End.")
+        finally:
+            Command.log("\n[Command] Stage summary (trace: {}):\n{}".format(TRACE_PATH, tracer.summary()))
+            tracer.close()
+
+    @staticmethod
+    def log(msg):
+        tracing.log(msg)
+
+    def start_extractor(self):
+        frames = os.getenv("RELAXED_FRAMES", None)
+        worker_id = int(os.getenv("RELAXED_WORKER", "0"))
+        workers = int(os.getenv("RELAXED_WORKERS", "1"))
+
+        Command.log("[Command] Worker {} of {}".format(worker_id + 1, workers))
+        RelaxedExtractor(
+            os.getenv("RELAXED_ODB_PATH"),
+            os.getenv("RELAXED_INSTANCE"),
+            os.getenv("RELAXED_STORE_PATH"),
+            os.getenv("RELAXED_ODB_NAME"),
+            os.getenv("RELAXED_PART_PATH"),
+            frames=json.loads(frames) if frames else None,
+            stride=int(os.getenv("RELAXED_STRIDE", "1")),
+            worker_id=worker_id,
+            workers=workers,
+            step_name=os.getenv("RELAXED_STEP", None) or None,
+        )
+
+
+if __name__ == "__main__":
+    try:
+        model = Command()
+    except Exception as e:
+        import traceback
+
+        log_dir = os.path.dirname(LOG_PATH)
+        if log_dir and not os.path.exists(log_dir):
+            os.makedirs(log_dir)
+
+        with open(LOG_PATH, "a") as f:
+            f.write("\n====================================================\n")
+            f.write("\n[COMMAND ERROR] An exception occurred during execution:\n")
+            traceback.print_exc(file=f)
+            f.write("\n====================================================\n")
+
+        if RELAXED_MODE == "python":
+            sys.exit(1)
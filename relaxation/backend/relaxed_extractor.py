@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+from odbAccess import openOdb
+import numpy as np
+
+from common import tracing
+from common.array_store import ArrayStore
+from common.zoi_model import label_index, lookup_rows
+
+# (field output name, mesh entity) read from every frame of the relaxation ODB.
+RELAXED_FIELDS = (
+    ('S', 'elements'),
+    ('PEEQ', 'elements'),
+    ('NT11', 'nodes'),
+    ('U', 'nodes'),
+)
+PART_KEY = "relaxed"
+
+
+def resolve_frames(frame_count, frames=None, stride=1):
+    """Returns the sorted frame indices to extract.
+
+    ``frames`` is a list of frame indices (negative ones count from the
+    end); without it every ``stride``-th frame is taken, the last one always
+    included.
+    """
+    if frames:
+        return sorted(set(index % frame_count for index in frames))
+
+    indices = list(range(0, frame_count, max(1, stride)))
+    if indices[-1] != frame_count - 1:
+        indices.append(frame_count - 1)
+    return indices
+
+
+class RelaxedExtractor:
+    """Reads the relaxed fields of a share of the frames of the relaxation ODB.
+
+    The relaxation model is built from the ZOI, so its node and element
+    labels are the ZOI labels stored by the extraction: every field is read
+    with ``bulkDataBlocks`` and scattered into one row per ZOI label. Worker
+    ``worker_id`` of ``workers`` takes every ``workers``-th selected frame and
+    writes them as a frame series of its own part store.
+    """
+
+    def __init__(self, odb_path, instance_name, store_path, odb_name, part_path,
+                 frames=None, stride=1, worker_id=0, workers=1, step_name=None):
+        self.odb_path = odb_path
+        self.instance_name = instance_name.upper()
+        self.step_name = step_name
+        self.frames = frames
+        self.stride = stride
+        self.worker_id = worker_id
+        self.workers = workers
+
+        store = ArrayStore(store_path)
+        self.zoi_labels = {
+            'nodes': np.asarray(store.load(odb_name, 'labels')),
+            'elements': np.asarray(store.load(odb_name, 'element_labels')),
+        }
+        self.zoi_rows = dict((entity, label_index(labels)) for entity, labels in self.zoi_labels.items())
+
+        self.part = ArrayStore(part_path)
+        self.part.reset()
+
+        with tracing.span("open_odb"):
+            RelaxedExtractor.log("  [Relaxed] Opening ODB: {}".format(self.odb_path))
+            self.odb = openOdb(path=self.odb_path, readOnly=True)
+        try:
+            self.extract_frames()
+        finally:
+            with tracing.span("close_odb"):
+                self.odb.close()
+
+    @staticmethod
+    def log(msg):
+        tracing.log(msg)
+
+    def extract_frames(self):
+        step_name = self.step_name or list(self.odb.steps.keys())[-1]
+        step = self.odb.steps[step_name]
+        self.instance = self.odb.rootAssembly.instances[self.instance_name]
+
+        selected = resolve_frames(len(step.frames), self.frames, self.stride)
+        frame_indices = selected[self.worker_id::self.workers]
+        RelaxedExtractor.log("  [Relaxed] Step {}: {} of {} frames on worker {}".format(
+            step_name, len(frame_indices), len(step.frames), self.worker_id))
+        if not frame_indices:
+            return
+
+        series = {}
+        entities = {}
+        times = []
+        for position, frame_index in enumerate(frame_indices):
+            frame = step.frames[frame_index]
+            for name, entity in RELAXED_FIELDS:
+                with tracing.span("read_field", field=name, frame=frame_index) as span:
+                    values = self._read_field(frame, name, entity)
+                    span.count(values=values.size)
+
+                if name not in series:
+                    series[name] = self.part.create_series(
+                        PART_KEY, name, (len(frame_indices),) + values.shape, np.float64)
+                    entities[name] = entity
+                series[name][position] = values
+
+            times.append(float(frame.frameValue))
+            RelaxedExtractor.log("  [Relaxed] Frame {} had been extracted (t = {})".format(
+                frame_index, frame.frameValue))
+
+        for array in series.values():
+            array.flush()
+        del series
+
+        self.part.write(PART_KEY, {'labels': self.zoi_labels['nodes']},
+                        {'element_labels': self.zoi_labels['elements']})
+        self.part.register_series(PART_KEY, frame_indices, times, entities)
+
+    def _read_field(self, frame, name, entity):
+        """Returns one row per ZOI label of field ``name``; rows without data are NaN.
+
+        Element fields are averaged over the integration points of each element.
+        """
+        fdo = frame.fieldOutputs[name].getSubset(region=self.instance)
+        row_of_label = self.zoi_rows[entity]
+        count = len(self.zoi_labels[entity])
+
+        values = None
+        hits = np.zeros(count, dtype=np.int64)
+        for block in fdo.bulkDataBlocks:
+            block_labels = block.nodeLabels if entity == 'nodes' else block.elementLabels
+            block_labels = np.asarray(block_labels, dtype=np.int64)
+            block_data = np.asarray(block.data, dtype=np.float64).reshape(len(block_labels), -1)
+
+            rows = lookup_rows(row_of_label, block_labels)
+            hit = rows >= 0
+
+            if values is None:
+                values = np.zeros((count, block_data.shape[1]), dtype=np.float64)
+            np.add.at(values, rows[hit], block_data[hit])
+            hits += np.bincount(rows[hit], minlength=count)
+
+        if values is None:
+            values = np.zeros((count, 1), dtype=np.float64)
+
+        found = hits > 0
+        values[found] /= hits[found][:, None]
+        values[~found] = np.nan
+        return values[:, 0] if values.shape[1] == 1 else values
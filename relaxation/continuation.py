@@ -0,0 +1,168 @@
+import argparse
+import os
+import subprocess
+import sys
+
+FRAMEWORK_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, FRAMEWORK_PATH)
+
+from common.relaxation_steps import (
+    TIME_POINTS_NAME, field_output_keyword, restart_keyword, restart_options, time_points, time_points_block,
+)
+from common.solver_tuning import FIXED_SETTINGS, read_settings, settings_path, write_settings
+from inp_writer import number, read_config
+from monitor import read_sta_summary
+
+ABAQUS_CMD_PATH = r'C:\SIMULIA\Commands\abq2023.bat'
+
+CONFIG_PATH = os.path.join(FRAMEWORK_PATH, "config")
+BACKEND_PATH = os.path.join(FRAMEWORK_PATH, "relaxation", "backend")
+INP_PATH = os.path.join(BACKEND_PATH, "files", "inp")
+JOB_PATH = os.path.join(BACKEND_PATH, "files", "job")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Continues a relaxation job from its last converged increment with a restart analysis."
+    )
+    parser.add_argument(
+        "--model-config", default=os.path.join(CONFIG_PATH, "model_config.json"),
+        help="model_config.json of the relaxation model"
+    )
+    parser.add_argument("--old-job", default=None, help="job to continue (default: <modelName>_modified)")
+    parser.add_argument("--job", required=True, help="name of the restart job")
+    parser.add_argument("--step-name", default=None, help="name of the new step (default: ContinuationStep<n>)")
+    parser.add_argument("--time-period", type=float, required=True, help="time period of the new step")
+    parser.add_argument(
+        "--time-points", type=float, nargs="*", default=None,
+        help="step times the field output is written at (default: the output frequency of the deck)"
+    )
+    parser.add_argument("--sink-temp", type=float, default=None, help="film sink temperature of the new step")
+    parser.add_argument("--conv-coef", type=float, default=None, help="film coefficient of the new step")
+    parser.add_argument("--solver", default=f'"{ABAQUS_CMD_PATH}"', help="solver command")
+    parser.add_argument("--cpus", type=int, default=None, help="cpus passed to the solver")
+    parser.add_argument("--write-only", action="store_true", help="write the restart deck without running it")
+    return parser.parse_args()
+
+
+def restart_point(sta_summary, restart):
+    """Returns ``(step, increment)`` to restart from; ``increment`` is None for the end of a completed step.
+
+    Without ``end step`` only increments with restart data can be read: the
+    last converged one rounded down to the restart frequency.
+    """
+    if sta_summary["step"] is None:
+        raise ValueError("The old job has no converged increment to restart from.")
+    if sta_summary["completed"]:
+        return sta_summary["step"], None
+
+    frequency = int(restart["frequency"])
+    if frequency < 1:
+        raise ValueError("The old job wrote no restart data (restart frequency 0).")
+    increment = sta_summary["last_increment"] - sta_summary["last_increment"] % frequency
+    if increment < 1:
+        raise ValueError(f"No restart data was written before increment {sta_summary['last_increment']}.")
+    return sta_summary["step"], increment
+
+
+class ContinuationDeck:
+    """Restart deck that reads the old job and adds one coupled temperature-displacement step.
+
+    The step keeps the film condition of the old job unless a sink
+    temperature or film coefficient is given (e.g. a cooling stage), and
+    writes restart data again so that it can be continued in turn.
+    """
+
+    def __init__(self, model_config, solver, old_job, point, step_name, time_period, points=None,
+                 sink_temp=None, conv_coef=None):
+        simulation = model_config["assemblyAndSimulationData"]
+        self.model_name = str(model_config["generalInformation"]["modelName"])
+        self.part_name = str(model_config["partData"]["createPartInformation"]["Name"])
+        self.restart = restart_options(simulation["stepsAndHistoryInformation"])
+
+        self.solver = solver
+        self.old_job = old_job
+        self.step, self.increment = point
+        self.step_name = step_name
+        self.time_period = time_period
+        self.time_points = time_points(time_period, points)
+        self.points_name = f"{TIME_POINTS_NAME}-{step_name}"
+
+        self.film = None
+        if sink_temp is not None or conv_coef is not None:
+            self.film = (simulation["convBC"]["sinkTemp"] if sink_temp is None else sink_temp,
+                         simulation["convBC"]["convCoef"] if conv_coef is None else conv_coef)
+
+    def write(self, inp_path):
+        solver = self.solver
+        initial_inc = min(solver["initialInc"], self.time_period)
+        origin = f"step {self.step}" + (f", increment {self.increment}" if self.increment else "")
+
+        with open(inp_path, 'w') as f_out:
+            f_out.write("*Heading\n")
+            f_out.write(f"** Job name: {os.path.splitext(os.path.basename(inp_path))[0]} "
+                        f"Model name: {self.model_name}\n")
+            f_out.write(f"** Restart of {self.old_job} from {origin}\n")
+            f_out.write("** Generated by: relaxation/continuation.py\n")
+            if self.increment:
+                f_out.write(f"*Restart, read, step={self.step}, inc={self.increment}, end step\n")
+            else:
+                f_out.write(f"*Restart, read, step={self.step}\n")
+
+            f_out.write("** ----------------------------------------------------------------\n**\n")
+            f_out.write(f"** STEP: {self.step_name}\n**\n")
+            f_out.write(f"*Step, name={self.step_name}, nlgeom=NO, inc={solver['maxNumInc']}\n")
+            f_out.write(f"*Coupled Temperature-displacement, creep=none, deltmx={number(solver['deltmx'])}\n")
+            f_out.write(f"{number(initial_inc)}, {number(self.time_period)}, "
+                        f"{number(min(solver['minInc'], initial_inc))}, {number(self.time_period)}\n")
+            if self.film is not None:
+                f_out.write("**\n** INTERACTIONS\n**\n** Interaction: naturalConvection\n")
+                f_out.write(f"*Sfilm, op=NEW\ntopElements{self.part_name}, F, "
+                            f"{number(self.film[0])}, {number(self.film[1])}\n")
+            f_out.write("**\n** OUTPUT REQUESTS\n**\n" + restart_keyword(self.restart))
+            if self.time_points:
+                f_out.write(time_points_block(self.time_points, self.points_name))
+            f_out.write(field_output_keyword(self.time_points, self.points_name))
+            f_out.write("*Output, history, variable=PRESELECT\n*End Step\n")
+
+        return inp_path
+
+
+def main():
+    args = parse_args()
+    model_config = read_config(CONFIG_PATH, args.model_config)
+    model_name = str(model_config["generalInformation"]["modelName"])
+    old_job = args.old_job or f"{model_name}_modified"
+
+    restart = restart_options(model_config["assemblyAndSimulationData"]["stepsAndHistoryInformation"])
+    point = restart_point(read_sta_summary(os.path.join(JOB_PATH, old_job + ".sta")), restart)
+    step_name = args.step_name or f"ContinuationStep{point[0] + 1}"
+
+    solver = read_settings(settings_path(INP_PATH, model_name)) or dict(FIXED_SETTINGS)
+    solver["time_period"] = args.time_period
+    job_settings = settings_path(INP_PATH, args.job)
+    write_settings(job_settings, solver)
+
+    inp_path = ContinuationDeck(
+        model_config, solver, old_job, point, step_name, args.time_period, args.time_points,
+        args.sink_temp, args.conv_coef
+    ).write(os.path.join(INP_PATH, f"{args.job}.inp"))
+
+    print(f"\n=== Continuation of {old_job} ===")
+    print(f"Restart from step {point[0]}" + (f", increment {point[1]}" if point[1] else " (end of step)"))
+    print(f"New step {step_name}: {args.time_period:g} s")
+    print(f"Restart deck: {inp_path}")
+    print("==========================")
+    if args.write_only:
+        return
+
+    command = [sys.executable, os.path.join(FRAMEWORK_PATH, "relaxation", "monitor.py"),
+               "--job-dir", JOB_PATH, "--job", args.job, "--input", inp_path, "--old-job", old_job,
+               "--solver", args.solver, "--settings", job_settings]
+    if args.cpus:
+        command += ["--cpus", str(args.cpus)]
+    sys.exit(subprocess.run(command, cwd=JOB_PATH).returncode)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+FRAMEWORK_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, FRAMEWORK_PATH)
+
+from common import tracing
+from common.array_store import ArrayStore
+from common.live_output import run_streaming
+from common.zoi_model import ZoiFields, relaxation_odb_name
+from inp_modifier_initial_conditions import STRESS_COMPONENTS
+from inp_writer import read_config
+
+ABAQUS_CMD_PATH = r'C:\SIMULIA\Commands\abq2023.bat'
+
+CONFIG_PATH = os.path.join(FRAMEWORK_PATH, "config")
+BACKEND_PATH = os.path.join(FRAMEWORK_PATH, "relaxation", "backend")
+JOB_PATH = os.path.join(BACKEND_PATH, "files", "job")
+PARTS_PATH = os.path.join(CONFIG_PATH, "data_parts")
+
+BACKEND_COMMANDS = {
+    "python": '"{abaqus}" python "relaxation/backend/relaxed_command.py"',
+    "cae": '"{abaqus}" cae startup="relaxation/backend/relaxed_command.py"',
+}
+RELAXED_SUFFIX = "_relaxed"
+PART_KEY = "relaxed"
+
+# Relaxed fields compared with the initial field of the same name.
+DELTA_FIELDS = ("S", "PEEQ", "NT11")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Extracts the relaxed fields of the relaxation ODB into the array store."
+    )
+    parser.add_argument(
+        "--model-config", default=os.path.join(CONFIG_PATH, "model_config.json"),
+        help="model_config.json of the relaxation model"
+    )
+    parser.add_argument(
+        "--odb", default=None,
+        help="relaxation ODB (default: backend/files/job/<modelName>_modified.odb)"
+    )
+    parser.add_argument("--step", default=None, help="step to read (default: the last step)")
+    parser.add_argument(
+        "--frames", type=int, nargs="*", default=None,
+        help="frame indices to extract, negative ones from the end (default: every frame)"
+    )
+    parser.add_argument("--stride", type=int, default=1, help="frame stride when --frames is not given")
+    parser.add_argument("--workers", type=int, default=1, help="number of Abaqus processes sharing the frames")
+    parser.add_argument(
+        "--mode", choices=sorted(BACKEND_COMMANDS), default="python",
+        help="Abaqus interpreter the extraction runs under (default: python)"
+    )
+    return parser.parse_args()
+
+
+def run_worker(worker_id, workers, args, odb_path, odb_name, instance_name, store_path, part_path):
+    env = dict(os.environ)
+    env["BACKEND_PROJECT_PATH"] = BACKEND_PATH
+    env["RELAXED_ODB_PATH"] = odb_path
+    env["RELAXED_ODB_NAME"] = odb_name
+    env["RELAXED_INSTANCE"] = instance_name
+    env["RELAXED_STORE_PATH"] = store_path
+    env["RELAXED_PART_PATH"] = part_path
+    env["RELAXED_FRAMES"] = json.dumps(args.frames) if args.frames else ""
+    env["RELAXED_STRIDE"] = str(args.stride)
+    env["RELAXED_STEP"] = args.step or ""
+    env["RELAXED_WORKER"] = str(worker_id)
+    env["RELAXED_WORKERS"] = str(workers)
+    env["RELAXED_MODE"] = args.mode
+    env["RELAXED_LOG_PATH"] = os.path.join("log", f"relaxed_log_{worker_id}.txt")
+    log_path = os.path.join(BACKEND_PATH, env["RELAXED_LOG_PATH"])
+
+    abaqus_command = BACKEND_COMMANDS[args.mode].format(abaqus=ABAQUS_CMD_PATH)
+
+    started = time.time()
+    try:
+        with tracing.span("abaqus_worker", worker=worker_id, mode=args.mode):
+            result = run_streaming(
+                abaqus_command, env=env, cwd=FRAMEWORK_PATH, tail_paths=[log_path], prefix=f"[worker {worker_id}] "
+            )
+        print(f"\n=== Abaqus finished (worker {worker_id}) ===")
+        print('Retorno:', result.returncode)
+        print(f"Wall clock (abaqus {args.mode}): {time.time() - started:.1f} s")
+        print("==========================")
+        return True
+
+    except subprocess.CalledProcessError as e:
+        print(f"=== Abaqus 'except' error (worker {worker_id}) ===\n")
+        print('Retorno:', e.returncode)
+        print(f"Wall clock (abaqus {args.mode}): {time.time() - started:.1f} s")
+        print("==========================\n")
+        return False
+
+
+def initial_fields(initial, relaxed_name, n_components):
+    """Returns the injected initial value of ``relaxed_name`` in the layout of the relaxation model."""
+    if relaxed_name != "S":
+        return np.asarray(initial[relaxed_name], dtype=np.float64)
+
+    values = np.asarray(initial.columns("S", STRESS_COMPONENTS), dtype=np.float64)
+    if values.shape[1] != n_components:
+        raise ValueError(f"The relaxed S has {n_components} components, expected {values.shape[1]}.")
+    return values
+
+
+def merge_relaxed(store, odb_name, part_roots):
+    """Joins the frame series of the worker part stores into ``<odb_name>_relaxed`` of ``store``.
+
+    The entry holds the ZOI mesh, the fields of the last extracted frame and,
+    for S, PEEQ and NT11, ``<field>_delta`` = relaxed - injected initial
+    value; every field and delta is also stored as a frame series.
+    Returns the name of the entry.
+    """
+    parts = [ArrayStore(root) for root in part_roots]
+    parts = [part for part in parts if PART_KEY in part.read_manifest()["odbs"]]
+    if not parts:
+        raise ValueError("No worker extracted any frame of the relaxation ODB.")
+
+    entries = [(part, part.series(PART_KEY)) for part in parts]
+    frames = sorted((frame, time_value, part, position)
+                    for part, entry in entries
+                    for position, (frame, time_value) in enumerate(zip(entry["frames"], entry["times"])))
+    entities = dict(entries[0][1]["fields"])
+
+    initial = ZoiFields.from_store(store, odb_name, DELTA_FIELDS)
+    mesh = initial.mesh
+
+    # The workers scatter the relaxed fields into the rows of the ZOI labels
+    # of this store, so the part series are already aligned with ``mesh``.
+    relaxed_name = odb_name + RELAXED_SUFFIX
+    last = {}
+    fields = {}
+    for name, entity in sorted(entities.items()):
+        shape = (len(frames),) + parts[0].load_series(PART_KEY, name).shape[1:]
+        outputs = [(name, None)]
+        if name in DELTA_FIELDS:
+            outputs.append((name + "_delta", initial_fields(initial, name, shape[2] if len(shape) > 2 else 1)))
+
+        arrays = dict((output, store.create_series(relaxed_name, output, shape, np.float64)) for output, _ in outputs)
+        for position, (_, _, part, part_position) in enumerate(frames):
+            values = np.asarray(part.load_series(PART_KEY, name)[part_position])
+            for output, reference in outputs:
+                arrays[output][position] = values if reference is None else values - reference
+
+        for output, _ in outputs:
+            arrays[output].flush()
+            last[output] = np.array(arrays[output][-1])
+            fields[output] = entity
+        del arrays
+
+    node_arrays = mesh.node_arrays()
+    element_arrays = mesh.element_arrays()
+    for name, values in last.items():
+        (node_arrays if fields[name] == 'nodes' else element_arrays)[name] = values
+    store.write(relaxed_name, node_arrays, element_arrays)
+    store.register_series(relaxed_name, [frame for frame, _, _, _ in frames],
+                          [time_value for _, time_value, _, _ in frames], fields)
+
+    return relaxed_name
+
+
+def main():
+    args = parse_args()
+    model_config = read_config(CONFIG_PATH, args.model_config)
+
+    model_name = str(model_config["generalInformation"]["modelName"])
+    odb_name = relaxation_odb_name(model_config, model_config["generalInformation"]["odbOrtCutName"])
+    instance_name = str(model_config["partData"]["createPartInformation"]["Name"]) + "-1"
+    odb_path = os.path.abspath(args.odb or os.path.join(JOB_PATH, f"{model_name}_modified.odb"))
+
+    store_path = os.path.join(CONFIG_PATH, "data")
+    trace_path = os.path.join(BACKEND_PATH, "log", "relaxed_trace.jsonl")
+    tracer = tracing.configure(trace_path)
+
+    workers = max(1, args.workers)
+    part_paths = [os.path.join(PARTS_PATH, f"relaxed_{i}") for i in range(workers)]
+    for path in part_paths:
+        shutil.rmtree(path, ignore_errors=True)
+
+    with tracer.span("workers") as span:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            succeeded = list(pool.map(
+                lambda i: run_worker(i, workers, args, odb_path, odb_name, instance_name, store_path, part_paths[i]),
+                range(workers)
+            ))
+        span.count(workers=workers)
+
+    if not all(succeeded):
+        print(f"{succeeded.count(False)} worker(s) failed; the relaxed fields were not merged.")
+    else:
+        with tracer.span("merge_relaxed"):
+            relaxed_name = merge_relaxed(ArrayStore(store_path), odb_name, part_paths)
+        print(f"Relaxed fields of {odb_path} written to: {os.path.join(store_path, relaxed_name)}")
+
+    for path in part_paths:
+        shutil.rmtree(path, ignore_errors=True)
+
+    print(f"\n=== Post-relaxation stages (trace: {trace_path}) ===")
+    print(tracer.summary())
+    print("==========================")
+    tracer.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,39 +1,160 @@
+import argparse
 import json
+import os
+import sys
 
-json_file_path = 'C:/Users/adam-jd1r2h3ttnmecz9/Desktop/arthur/Framework-Relaxation/config/data.json'
-inp_source_path = 'C:/Users/adam-jd1r2h3ttnmecz9/Desktop/arthur/Framework-Relaxation/relaxation/backend/files/inp/ImplicitRelaxation.inp'
-inp_output_path = 'C:/Users/adam-jd1r2h3ttnmecz9/Desktop/arthur/Framework-Relaxation/relaxation/backend/files/inp/ImplicitRelaxation_modified.inp'
+import numpy as np
 
-with open(json_file_path, 'r') as f:
-    data = json.load(f)
+FRAMEWORK_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, FRAMEWORK_PATH)
 
-elements_data = data["BIGGER"]["elements"]
+from common.array_store import ArrayStore
+from common.initial_temperature import initial_temperature_method
+from common.zoi_model import ZoiFields, expand_zois, relaxation_odb_name
 
-stress_lines = []
-hardening_lines = []
+CONFIG_PATH = os.path.join(FRAMEWORK_PATH, "config")
+INP_PATH = os.path.join(FRAMEWORK_PATH, "relaxation", "backend", "files", "inp")
 
-for elem_id, props in elements_data.items():
-    s = props["S"]
-    pe = props["PE"]
-    peeq = props["PEEQ"]
+CHUNK_SIZE = 200000
+BUFFER_SIZE = 1 << 20
 
-    str_line = f"ZOI-1.{elem_id}, {s[0]}, {s[2]}, {s[1]}, {s[4]}, 0., 0.\n"
-    stress_lines.append(str_line)
+# Eulerian stress components -> plane X-Z of the relaxation model:
+# S11 = S11, S22 = S33, S33 = S22 (out of plane), S12 = S13.
+STRESS_COMPONENTS = ("S11", "S33", "S22", "S13")
 
-    hard_line = f"ZOI-1.{elem_id}, {peeq}, 0., 0., 0., 0., 0., 0.\n"
-    hardening_lines.append(hard_line)
 
-with open(inp_source_path, 'r') as f_in, open(inp_output_path, 'w') as f_out:
+def parse_args():
+    parser = argparse.ArgumentParser(description="Adds the extracted initial conditions to the relaxation INP.")
+    parser.add_argument(
+        "--model-config", default=os.path.join(CONFIG_PATH, "model_config.json"),
+        help="model_config.json of the relaxation model"
+    )
+    parser.add_argument(
+        "--inp-dir", default=INP_PATH,
+        help="directory of <modelName>.inp; the include files and the modified INP are written there"
+    )
+    return parser.parse_args()
 
-    for line in f_in:
-        if line.strip().upper().startswith("** PREDEFINED FIELDS"):
-            f_out.write("*Initial Conditions, type=STRESS\n")
-            f_out.writelines(stress_lines)
-            
-            f_out.write("*Initial Conditions, type=HARDENING\n")
-            f_out.writelines(hardening_lines)
-            
-        f_out.write(line)
 
+def read_config(path_dir_config, path_model_config):
+    with open(path_model_config, 'r') as file:
+        model_config = json.load(file)
+
+    with open(os.path.join(path_dir_config, "odb_config.json"), 'r') as file:
+        odb_config = expand_zois(json.load(file))
+
+    return model_config, odb_config
+
+
+def value_format(dtype):
+    return "%.9g" if np.dtype(dtype) == np.float32 else "%.17g"
+
+
+def write_rows(f_out, row_format, labels, columns):
+    """Writes ``row_format`` for every row of (labels, columns) in chunks of CHUNK_SIZE rows."""
+    for start in range(0, len(labels), CHUNK_SIZE):
+        stop = start + CHUNK_SIZE
+        chunk = np.column_stack([labels[start:stop].astype(np.float64)] + [c[start:stop] for c in columns])
+        np.savetxt(f_out, chunk, fmt=row_format)
+
+
+def write_stress_block(output_path, instance_name, labels, stress):
+    """``stress`` holds the STRESS_COMPONENTS columns, in that order (``ZoiFields.columns``)."""
+    keep = ~np.isnan(stress).any(axis=1)
+    number = value_format(stress.dtype)
+    row_format = f"{instance_name}.%d, " + ", ".join([number] * len(STRESS_COMPONENTS)) + ", 0., 0."
+
+    with open(output_path, 'w', buffering=BUFFER_SIZE) as f_out:
+        f_out.write("*Initial Conditions, type=STRESS\n")
+        write_rows(f_out, row_format, labels[keep], [stress[keep, c] for c in range(len(STRESS_COMPONENTS))])
+
+    return int(keep.sum())
+
+
+def write_hardening_block(output_path, instance_name, labels, peeq):
+    keep = ~np.isnan(peeq)
+    row_format = f"{instance_name}.%d, {value_format(peeq.dtype)}, 0., 0., 0., 0., 0., 0."
+
+    with open(output_path, 'w', buffering=BUFFER_SIZE) as f_out:
+        f_out.write("*Initial Conditions, type=HARDENING\n")
+        write_rows(f_out, row_format, labels[keep], [peeq[keep]])
+
+    return int(keep.sum())
+
+
+def write_temperature_block(output_path, instance_name, labels, nt11):
+    keep = ~np.isnan(nt11)
+    row_format = f"{instance_name}.%d, {value_format(nt11.dtype)}"
+
+    with open(output_path, 'w', buffering=BUFFER_SIZE) as f_out:
+        f_out.write("*Initial Conditions, type=TEMPERATURE\n")
+        write_rows(f_out, row_format, labels[keep], [nt11[keep]])
+
+    return int(keep.sum())
+
+
+def add_includes(inp_source_path, inp_output_path, include_paths):
+    """Copies the INP line by line, adding ``*INCLUDE`` lines before the predefined fields.
+
+    The includes go before ``** PREDEFINED FIELDS`` or, when the deck has no
+    predefined fields, before the first ``*Step``.
+    """
+    include_lines = [f"*INCLUDE, INPUT={path}\n" for path in include_paths]
+    inserted = False
+
+    with open(inp_source_path, 'r', buffering=BUFFER_SIZE) as f_in, \
+            open(inp_output_path, 'w', buffering=BUFFER_SIZE) as f_out:
+        for line in f_in:
+            key = line.strip().upper()
+            if not inserted and (key.startswith("** PREDEFINED FIELDS") or key.startswith("*STEP")):
+                f_out.writelines(include_lines)
+                inserted = True
+            f_out.write(line)
+
+    if not inserted:
+        raise ValueError(f"No '** PREDEFINED FIELDS' or '*Step' line found in: {inp_source_path}")
+
+
+def main():
+    args = parse_args()
+    model_config, odb_config = read_config(CONFIG_PATH, args.model_config)
+
+    model_name = str(model_config["generalInformation"]["modelName"])
+    instance_name = str(model_config["partData"]["createPartInformation"]["Name"]) + "-1"
+    odb_name = relaxation_odb_name(
+        model_config, model_config["generalInformation"]["odbOrtCutName"] or list(odb_config.keys())[0]
+    )
+
+    temperature_method = initial_temperature_method(model_config)
+
+    names = ("S", "PEEQ", "NT11") if temperature_method == "label" else ("S", "PEEQ")
+    fields = ZoiFields.from_store(ArrayStore(os.path.join(CONFIG_PATH, "data")), odb_name, names)
+    labels = np.asarray(fields.mesh.element_labels)
+
+    stress_path = os.path.join(args.inp_dir, f"{model_name}_initial_stress.inp")
+    hardening_path = os.path.join(args.inp_dir, f"{model_name}_initial_hardening.inp")
+    include_paths = [stress_path, hardening_path]
+
+    if temperature_method == "label":
+        temperature_path = os.path.join(args.inp_dir, f"{model_name}_initial_temperature.inp")
+        n_temperature = write_temperature_block(
+            temperature_path, instance_name, np.asarray(fields.mesh.labels), np.asarray(fields["NT11"])
+        )
+        include_paths.insert(0, temperature_path)
+
+    n_stress = write_stress_block(stress_path, instance_name, labels, fields.columns("S", STRESS_COMPONENTS))
+    n_hardening = write_hardening_block(hardening_path, instance_name, labels, np.asarray(fields["PEEQ"]))
+
+    inp_source_path = os.path.join(args.inp_dir, f"{model_name}.inp")
+    inp_output_path = os.path.join(args.inp_dir, f"{model_name}_modified.inp")
+    add_includes(inp_source_path, inp_output_path, include_paths)
+
+    if temperature_method == "label":
+        print(f"Initial temperatures written for {n_temperature} nodes: {temperature_path}")
+    print(f"Initial stresses written for {n_stress} elements: {stress_path}")
+    print(f"Initial hardening written for {n_hardening} elements: {hardening_path}")
     print(f"Modified INP file written to: {inp_output_path}")
 
+
+if __name__ == "__main__":
+    main()
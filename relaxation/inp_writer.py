@@ -0,0 +1,409 @@
+import argparse
+import json
+import os
+import re
+import sys
+
+import numpy as np
+
+FRAMEWORK_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, FRAMEWORK_PATH)
+
+from common.array_store import ArrayStore
+from common.initial_temperature import initial_temperature_method
+from common.relaxation_steps import (
+    field_output_keyword, restart_keyword, restart_options, step_time_points, time_points_block,
+)
+from common.solver_tuning import settings_path, solver_settings, write_settings
+from common.zoi_model import ZoiFields, expand_zois, relaxation_odb_name
+from inp_modifier_initial_conditions import (
+    BUFFER_SIZE, STRESS_COMPONENTS, write_rows, write_stress_block, write_hardening_block, write_temperature_block
+)
+
+CONFIG_PATH = os.path.join(FRAMEWORK_PATH, "config")
+INP_PATH = os.path.join(FRAMEWORK_PATH, "relaxation", "backend", "files", "inp")
+
+MATERIAL_NAME = "DA718"
+SECTION_NAME = "Sec_DA718"
+STEP_NAME = "RelaxationStep"
+
+# Face -> local node pair of a counter-clockwise quad whose first node is the
+# bottom-left one (the order written by DataExtractor).
+FACE_NODES = {
+    "S1": (0, 1),
+    "S2": (1, 2),
+    "S3": (2, 3),
+    "S4": (3, 0),
+}
+LABELS_PER_LINE = 16
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Writes the ImplicitRelaxation deck without Abaqus CAE.")
+    parser.add_argument(
+        "--model-config", default=os.path.join(CONFIG_PATH, "model_config.json"),
+        help="model_config.json of the relaxation model"
+    )
+    parser.add_argument(
+        "--inp-dir", default=INP_PATH,
+        help="directory the deck and its include files are written to"
+    )
+    parser.add_argument(
+        "--compare", default=None,
+        help="deck written by Abaqus CAE to validate the generated deck against"
+    )
+    return parser.parse_args()
+
+
+def read_config(path_dir_config, path_model_config):
+    with open(path_model_config, 'r') as file:
+        model_config = json.load(file)
+
+    with open(os.path.join(path_dir_config, "odb_config.json"), 'r') as file:
+        odb_config = expand_zois(json.load(file))
+
+    odb_name = model_config["generalInformation"]["odbOrtCutName"] or list(odb_config.keys())[0]
+    model_config["generalInformation"]["odbOrtCutName"] = odb_name
+    model_config["partData"]["createPartInformation"]["Dimensions"] = odb_config[odb_name]["zoi_coordinates"]
+    model_config["partData"]["createPartInformation"]["eleSize"] = odb_config[odb_name]["ele_size"]
+
+    return model_config
+
+
+def number(value):
+    return "%.10g" % value
+
+
+def write_labels(f_out, labels):
+    labels = np.asarray(labels, dtype=np.int64)
+    for start in range(0, len(labels), LABELS_PER_LINE):
+        f_out.write(", ".join(str(label) for label in labels[start:start + LABELS_PER_LINE].tolist()) + "\n")
+
+
+class RelaxationDeck:
+    """Builds the ImplicitRelaxation deck that the CAE backend writes, from the extracted arrays.
+
+    Geometry selections reproduce the bounding boxes of AssemblyModel; an
+    element is selected when all of its nodes lie in the box, like
+    ``getByBoundingBox``. NT11 is always written by node label: the deck
+    nodes are the ones NT11 was stored for, so ``mapped`` gives the same field.
+    """
+
+    def __init__(self, model_config, fields):
+        general = model_config["generalInformation"]
+        part = model_config["partData"]["createPartInformation"]
+        simulation = model_config["assemblyAndSimulationData"]
+
+        self.model_name = str(general["modelName"])
+        self.part_name = str(part["Name"])
+        self.instance_name = self.part_name + "-1"
+        self.initial_temperature = initial_temperature_method(model_config)
+        self.material = model_config["partData"]["materialInformation"]
+        self.time_period = simulation["stepsAndHistoryInformation"]["timePeriod"]
+        self.time_points = step_time_points(simulation["stepsAndHistoryInformation"])
+        self.restart = restart_options(simulation["stepsAndHistoryInformation"])
+        self.conv_coef = simulation["convBC"]["convCoef"]
+        self.sink_temp = simulation["convBC"]["sinkTemp"]
+        self.ele_size = part["eleSize"]
+        self.x_points = sorted([part["Dimensions"]["x1"], part["Dimensions"]["x2"]])
+        self.y_points = sorted([part["Dimensions"]["z1"], part["Dimensions"]["z2"]])
+
+        self.fields = fields
+        self.mesh = fields.mesh
+        self.solver = solver_settings(model_config, self.mesh.n_nodes)
+        self.node_xy = np.asarray(self.mesh.plane_coords())
+        self.quads = np.asarray(self.mesh.quads())
+        self.quad_xy = self.node_xy[self.mesh.node_rows(self.quads)]
+
+        self.surfaces = {}
+        self.node_sets = {}
+        self._select_regions()
+
+    def _elements_in_box(self, x_min, x_max, y_min, y_max):
+        x = self.quad_xy[:, :, 0]
+        y = self.quad_xy[:, :, 1]
+        inside = (x >= x_min) & (x <= x_max) & (y >= y_min) & (y <= y_max)
+        return np.nonzero(inside.all(axis=1))[0]
+
+    def _surface(self, name, rows, face):
+        self.surfaces[name] = (self.mesh.element_labels[rows], face)
+        face_nodes = self.quads[rows][:, FACE_NODES[face]]
+        return np.unique(face_nodes)
+
+    def _select_regions(self):
+        e = self.ele_size
+        xp = self.x_points
+        yp = self.y_points
+
+        rows = self._elements_in_box(xp[0] - e, xp[1] + e, yp[1] - e * 1.5, yp[1] + e * 0.5)
+        self.node_sets["topNodesSet"] = self._surface("topElements" + self.part_name, rows, "S3")
+
+        rows = self._elements_in_box(xp[1] - e * 1.5, xp[1] + e * 0.5, yp[0] - e, yp[1] + e)
+        self.node_sets["rightNodesSet"] = self._surface("rightElements" + self.part_name, rows, "S2")
+
+        rows = self._elements_in_box(xp[0] - e * 0.5, xp[0] + e * 1.5, yp[0] - e, yp[1] + e)
+        left_nodes = self._surface("leftElements" + self.part_name, rows, "S4")
+        self.node_sets["leftNodesSet"] = left_nodes
+
+        all_y_coords = np.sort(self.node_xy[self.mesh.node_rows(left_nodes), 1])
+        y_max = yp[0] + all_y_coords[1] + (all_y_coords[2] - all_y_coords[1]) / 2.0
+        rows = self._elements_in_box(xp[0] - e * 0.5, xp[1] + e * 0.5, yp[0] - e, y_max)
+        self.node_sets["bottomNodesSet"] = self._surface("bottomElements" + self.part_name, rows, "S1")
+
+        x = self.node_xy[:, 0]
+        y = self.node_xy[:, 1]
+        inside = (x >= xp[0] - e) & (x <= xp[1] + e) & (y >= yp[0] - e) & (y <= yp[1] + e)
+        self.node_sets["allNodesSet"] = self.mesh.labels[inside]
+
+    def write_part(self, f_out):
+        set_name = "allElements" + self.part_name
+
+        f_out.write("**\n** PARTS\n**\n")
+        f_out.write(f"*Part, name={self.part_name}\n")
+        f_out.write("*Node\n")
+        write_rows(f_out, "%d, %.9g, %.9g", self.mesh.labels, [self.node_xy[:, 0], self.node_xy[:, 1]])
+        f_out.write("*Element, type=CPE4RT\n")
+        write_rows(f_out, "%d, %d, %d, %d, %d", self.mesh.element_labels, [self.quads[:, i] for i in range(4)])
+        f_out.write(f"*Nset, nset={set_name}\n")
+        write_labels(f_out, np.unique(self.quads))
+        f_out.write(f"*Elset, elset={set_name}\n")
+        write_labels(f_out, self.mesh.element_labels)
+        f_out.write(f"** Section: {SECTION_NAME}\n")
+        f_out.write(f"*Solid Section, elset={set_name}, material={MATERIAL_NAME}\n,\n")
+        f_out.write("*End Part\n")
+
+    def write_assembly(self, f_out):
+        f_out.write("**\n** ASSEMBLY\n**\n*Assembly, name=Assembly\n**\n")
+        f_out.write(f"*Instance, name={self.instance_name}, part={self.part_name}\n*End Instance\n**\n")
+
+        for name, labels in self.node_sets.items():
+            f_out.write(f"*Nset, nset={name}, instance={self.instance_name}\n")
+            write_labels(f_out, labels)
+
+        for name, (labels, face) in self.surfaces.items():
+            internal = f"_{name}_{face}"
+            f_out.write(f"*Elset, elset={internal}, internal, instance={self.instance_name}\n")
+            write_labels(f_out, labels)
+            f_out.write(f"*Surface, type=ELEMENT, name={name}\n{internal}, {face}\n")
+
+        f_out.write("*End Assembly\n")
+
+    def write_material(self, f_out):
+        mat_i = self.material
+        plastic = mat_i["Plastic"]
+        rate = mat_i["RateDependent"]
+
+        f_out.write("**\n** MATERIALS\n**\n")
+        f_out.write(f"*Material, name={MATERIAL_NAME}\n")
+        f_out.write("*Conductivity\n")
+        for ele in mat_i["Conductivity"]:
+            f_out.write(f"{number(ele['conductivity'])}, {number(ele['temp'])}\n")
+        f_out.write(f"*Density\n{number(mat_i['Density'])},\n")
+        f_out.write("*Elastic\n")
+        for ele in mat_i["Elastic"]:
+            f_out.write(f"{number(ele['youngs_modulus'])}, {number(ele['poissons_ratio'])}, {number(ele['temp'])}\n")
+        f_out.write(f"*Expansion\n{number(mat_i['Expansion'])},\n")
+        f_out.write("*Plastic, hardening=JOHNSON COOK\n")
+        f_out.write(", ".join(number(plastic[key]) for key in ("A", "B", "n", "m", "melting_temp", "ref_temp")) + "\n")
+        f_out.write("*Rate Dependent, type=JOHNSON COOK\n")
+        f_out.write(f"{number(rate['C'])}, {number(rate['epsilon_dot_0'])}\n")
+        f_out.write("*Specific Heat\n")
+        for ele in mat_i["SpecificHeat"]:
+            f_out.write(f"{number(ele['specific_heat'])}, {number(ele['temp'])}\n")
+
+    def write_boundary_conditions(self, f_out):
+        f_out.write("**\n** BOUNDARY CONDITIONS\n**\n")
+        f_out.write("** Name: bottomBC Type: Displacement/Rotation\n")
+        f_out.write("*Boundary\nbottomNodesSet, 1, 1\nbottomNodesSet, 2, 2\n")
+
+    def write_initial_conditions(self, f_out, inp_dir):
+        """Writes the initial-condition include files and their ``*INCLUDE`` lines."""
+        f_out.write("**\n** PREDEFINED FIELDS\n**\n")
+
+        blocks = (
+            ("temperature", write_temperature_block, self.mesh.labels, self.fields["NT11"]),
+            ("stress", write_stress_block, self.mesh.element_labels, self.fields.columns("S", STRESS_COMPONENTS)),
+            ("hardening", write_hardening_block, self.mesh.element_labels, self.fields["PEEQ"]),
+        )
+        for suffix, write_block, labels, values in blocks:
+            path = os.path.join(inp_dir, f"{self.model_name}_initial_{suffix}.inp")
+            write_block(path, self.instance_name, np.asarray(labels), np.asarray(values))
+            f_out.write(f"*INCLUDE, INPUT={path}\n")
+
+    def write_step(self, f_out):
+        if self.time_points:
+            f_out.write(time_points_block(self.time_points))
+        f_out.write("** ----------------------------------------------------------------\n**\n")
+        f_out.write(f"** STEP: {STEP_NAME}\n**\n")
+        solver = self.solver
+        f_out.write(f"*Step, name={STEP_NAME}, nlgeom=NO, inc={solver['maxNumInc']}\n")
+        f_out.write(f"*Coupled Temperature-displacement, creep=none, deltmx={number(solver['deltmx'])}\n")
+        f_out.write(f"{number(solver['initialInc'])}, {number(self.time_period)}, "
+                    f"{number(solver['minInc'])}, {number(self.time_period)}\n")
+        f_out.write("**\n** INTERACTIONS\n**\n** Interaction: naturalConvection\n")
+        f_out.write(f"*Sfilm\ntopElements{self.part_name}, F, {number(self.sink_temp)}, {number(self.conv_coef)}\n")
+        f_out.write("**\n** OUTPUT REQUESTS\n**\n" + restart_keyword(self.restart))
+        f_out.write(field_output_keyword(self.time_points) + "*Output, history, variable=PRESELECT\n")
+        f_out.write("*End Step\n")
+
+    def write(self, inp_dir):
+        """Writes ``<modelName>_modified.inp`` (and its include files) and the solver settings into ``inp_dir``."""
+        os.makedirs(inp_dir, exist_ok=True)
+        inp_path = os.path.join(inp_dir, f"{self.model_name}_modified.inp")
+
+        with open(inp_path, 'w', buffering=BUFFER_SIZE) as f_out:
+            f_out.write("*Heading\n")
+            f_out.write(f"** Job name: {self.model_name} Model name: {self.model_name}\n")
+            f_out.write("** Generated by: relaxation/inp_writer.py\n")
+            f_out.write("*Preprint, echo=NO, model=NO, history=NO, contact=NO\n")
+            self.write_part(f_out)
+            self.write_assembly(f_out)
+            self.write_material(f_out)
+            self.write_boundary_conditions(f_out)
+            self.write_initial_conditions(f_out, inp_dir)
+            self.write_step(f_out)
+
+        write_settings(settings_path(inp_dir, self.model_name), self.solver)
+        return inp_path
+
+
+def _parameter(text):
+    """Lower-cased ``name=value`` without spaces; numeric values are written as ``%.9g`` (``20.`` -> ``20``)."""
+    name, equals, value = text.strip().lower().replace(" ", "").partition("=")
+    try:
+        value = "%.9g" % float(value)
+    except ValueError:
+        pass
+    return name + equals + value
+
+
+def read_keyword_blocks(inp_path):
+    """Parses a deck into ``{keyword: [(parameters, data lines)]}``, following ``*INCLUDE``.
+
+    Keywords and parameters are lower-cased and stripped of spaces, numeric
+    parameter values normalized; comments and CAE-only keywords (headings,
+    preprint) are skipped.
+    """
+    blocks = {}
+    current = None
+
+    def read(path):
+        nonlocal current
+        with open(path, 'r') as f_in:
+            for line in f_in:
+                line = line.strip()
+                if not line or line.startswith("**"):
+                    continue
+                if line.startswith("*"):
+                    keyword, _, params = line[1:].partition(",")
+                    keyword = keyword.strip().lower()
+                    if keyword == "include":
+                        include = re.search(r"input\s*=\s*(.+)", params, re.IGNORECASE).group(1).strip()
+                        read(include if os.path.isabs(include) else os.path.join(os.path.dirname(path), include))
+                        current = None
+                        continue
+                    params = ",".join(sorted(_parameter(p) for p in params.split(",") if p.strip()))
+                    current = []
+                    blocks.setdefault(keyword, []).append((params, current))
+                elif current is not None:
+                    current.append(line)
+
+    read(inp_path)
+    for keyword in ("heading", "preprint"):
+        blocks.pop(keyword, None)
+    return blocks
+
+
+def _data_values(lines):
+    """Returns the data lines as a sorted set of tuples, numbers rounded to 9 significant digits."""
+    rows = set()
+    for line in lines:
+        row = []
+        for token in line.split(","):
+            token = token.strip()
+            if not token:
+                continue
+            try:
+                row.append(float("%.9g" % float(token)))
+            except ValueError:
+                row.append(token.lower())
+        rows.add(tuple(row))
+    return rows
+
+
+def _set_labels(lines, generate=False):
+    labels = set()
+    for line in lines:
+        tokens = [int(token) for token in line.split(",") if token.strip()]
+        if generate:
+            start, stop, step = (tokens + [1])[:3]
+            labels.update(range(start, stop + 1, step))
+        else:
+            labels.update(tokens)
+    return labels
+
+
+def _set_blocks(blocks):
+    """Returns ``{parameters: label set}`` of *Nset / *Elset blocks, ``generate`` ranges expanded."""
+    sets = {}
+    for params, lines in blocks:
+        names = params.split(",")
+        key = ",".join(name for name in names if name != "generate")
+        sets[key] = _set_labels(lines, "generate" in names)
+    return sets
+
+
+def compare_decks(reference_path, generated_path):
+    """Returns the differences between two decks as a list of messages (empty when equivalent).
+
+    Keyword blocks are matched by keyword and parameters; sets are compared
+    as label sets (whether written as lists or ``generate`` ranges) and every
+    other block by its data rows.
+    """
+    reference = read_keyword_blocks(reference_path)
+    generated = read_keyword_blocks(generated_path)
+    differences = []
+
+    for keyword in sorted(set(reference) | set(generated)):
+        is_set = keyword in ("nset", "elset")
+        read_blocks = _set_blocks if is_set else dict
+        ref_blocks = read_blocks(reference.get(keyword, []))
+        gen_blocks = read_blocks(generated.get(keyword, []))
+        for params in sorted(set(ref_blocks) | set(gen_blocks)):
+            if params not in gen_blocks:
+                differences.append(f"*{keyword}, {params}: missing in the generated deck")
+                continue
+            if params not in ref_blocks:
+                differences.append(f"*{keyword}, {params}: not in the reference deck")
+                continue
+
+            if is_set:
+                same = ref_blocks[params] == gen_blocks[params]
+            else:
+                same = _data_values(ref_blocks[params]) == _data_values(gen_blocks[params])
+            if not same:
+                differences.append(f"*{keyword}, {params}: data differs")
+
+    return differences
+
+
+def main():
+    args = parse_args()
+    model_config = read_config(CONFIG_PATH, args.model_config)
+    odb_name = relaxation_odb_name(model_config, model_config["generalInformation"]["odbOrtCutName"])
+
+    fields = ZoiFields.from_store(ArrayStore(os.path.join(CONFIG_PATH, "data")), odb_name, ("S", "PEEQ", "NT11"))
+    inp_path = RelaxationDeck(model_config, fields).write(args.inp_dir)
+    print(f"Relaxation deck written to: {inp_path}")
+
+    if args.compare:
+        differences = compare_decks(args.compare, inp_path)
+        print(f"\n=== Comparison with {args.compare} ===")
+        for message in differences:
+            print("  " + message)
+        print("  Decks are equivalent." if not differences else f"  {len(differences)} difference(s).")
+        print("==========================")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,14 @@
 import os
 import subprocess
+import sys
 from utilities.clean_files import clean_files
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common import tracing
+from common.live_output import run_streaming
+from remesh import remesh_zoi
+
 ABAQUS_CMD_PATH = r'C:\SIMULIA\Commands\abq2023.bat'
 
 def main():
@@ -9,24 +16,33 @@ def main():
     
     abaqus_command = f'"{ABAQUS_CMD_PATH}" cae startup="relaxation/backend/command.py"'
 
+    log_path = os.path.join(os.environ["BACKEND_PROJECT_PATH"], "log", "abaqus_log.txt")
+    trace_path = os.path.join(os.environ["BACKEND_PROJECT_PATH"], "log", "launcher_trace.jsonl")
+    tracer = tracing.configure(trace_path)
+
+    # The CAE model is built from the graded remesh of the ZOI when it is enabled.
+    model_config_path = os.path.join(os.getcwd(), "config", "model_config.json")
+    with tracer.span("remesh"):
+        remesh_zoi(model_config_path, os.path.join(os.getcwd(), "config", "data"))
+
     try:
-        result = subprocess.run(
-            abaqus_command, shell=True, check=True, capture_output=True, text=True
-        )
-        print("\n=== Abaqus Outputs ===\n")
-        print('Retorno:', result.returncode, "\n")
-        print('STDOUT:', result.stdout, "\n")
-        print('STDERR:', result.stderr)
+        with tracer.span("abaqus_cae"):
+            result = run_streaming(abaqus_command, tail_paths=[log_path])
+        print("\n=== Abaqus finished ===")
+        print('Retorno:', result.returncode)
         print("==========================")
         clean_files()
 
     except subprocess.CalledProcessError as e:
         print("=== Abaqus 'except' error ===\n")
-        print('Retorno:', e.returncode, "\n")
-        print('STDOUT:', e.stdout, "\n")
-        print('STDERR:', e.stderr)
+        print('Retorno:', e.returncode)
         print("==========================\n")
 
+    print(f"\n=== Launcher stages (trace: {trace_path}) ===")
+    print(tracer.summary())
+    print("==========================")
+    tracer.close()
+
 
 if __name__ == "__main__":
     main()
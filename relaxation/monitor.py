@@ -0,0 +1,415 @@
+import argparse
+import asyncio
+import json
+import os
+import re
+import signal
+import subprocess
+import sys
+import time
+
+FRAMEWORK_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, FRAMEWORK_PATH)
+
+from common.live_output import FileTailer
+from common.solver_tuning import RUNS_PATH, read_settings, record_run
+
+CONFIG_PATH = os.path.join(FRAMEWORK_PATH, "config")
+
+# STEP INC ATT SEVERE-DISCON EQUIL TOTAL-ITERS TOTAL-TIME STEP-TIME INC-OF-TIME
+STA_LINE = re.compile(
+    r"^\s*(\d+)\s+(\d+)\s+(\d+)(U?)\s+(\d+)\s+(\d+)\s+(\d+)\s+(\S+)\s+(\S+)\s+(\S+)"
+)
+TERMINATE_GRACE = 30.0
+# The job shell runs in its own process group, so that killing it also kills
+# the solver it started (which holds the license tokens until it exits).
+if os.name == "nt":
+    PROCESS_GROUP = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+else:
+    PROCESS_GROUP = {"start_new_session": True}
+# Without min_time_increment in the abort rules, an increment collapse is a
+# converged increment below this multiple of the minInc of the job settings.
+COLLAPSE_FACTOR = 2.0
+
+STA_COMPLETED = "THE ANALYSIS HAS COMPLETED SUCCESSFULLY"
+DAT_VARIABLES = re.compile(r"TOTAL NUMBER OF VARIABLES IN THE MODEL\s+(\d+)")
+DAT_WALLCLOCK = re.compile(r"WALLCLOCK TIME \(SEC\)\s*=\s*([\d.]+)")
+DAT_MEMORY_HEADER = "M E M O R Y   E S T I M A T E"
+# PROCESS  FLOATING PT OPERATIONS  MINIMUM MEMORY REQUIRED (MB)  MEMORY TO MINIMIZE I/O (MB)
+DAT_MEMORY_LINE = re.compile(r"^\s*(\d+)\s+(\S+)\s+(\d+)\s+(\d+)\s*$")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Runs an Abaqus job and follows its .sta/.msg/.log files.")
+    parser.add_argument("--job-dir", required=True, help="directory the job runs in")
+    parser.add_argument("--job", required=True, help="job name")
+    parser.add_argument("--input", required=True, help="input file of the job")
+    parser.add_argument("--cpus", type=int, default=None, help="cpus passed to the solver")
+    parser.add_argument("--solver", default="abaqus", help="solver command")
+    parser.add_argument("--old-job", default=None, help="job a restart analysis reads its restart data from")
+    parser.add_argument(
+        "--monitor-config", default=os.path.join(CONFIG_PATH, "monitor_config.json"),
+        help="poll interval and abort rules"
+    )
+    parser.add_argument(
+        "--settings", default=None,
+        help="solver settings written next to the deck (<modelName>_solver.json); in auto mode its cpus and "
+             "memory are passed to the solver and the run is recorded in the runs file"
+    )
+    parser.add_argument(
+        "--runs", default=RUNS_PATH, help="file the run timings are recorded in for the solver calibration"
+    )
+    parser.add_argument(
+        "--record-only", action="store_true",
+        help="do not run the job; record the .sta/.dat of a finished run in the runs file"
+    )
+    return parser.parse_args()
+
+
+def parse_sta_line(line):
+    """Returns the increment record of a .sta line, or None for any other line."""
+    match = STA_LINE.match(line)
+    if match is None:
+        return None
+
+    try:
+        return {
+            "step": int(match.group(1)),
+            "increment": int(match.group(2)),
+            "attempt": int(match.group(3)),
+            "cutback": match.group(4) == "U",
+            "severe_iterations": int(match.group(5)),
+            "equilibrium_iterations": int(match.group(6)),
+            "total_iterations": int(match.group(7)),
+            "total_time": float(match.group(8)),
+            "step_time": float(match.group(9)),
+            "time_increment": float(match.group(10)),
+        }
+    except ValueError:
+        return None
+
+
+def read_sta_summary(path):
+    """Increments, cutbacks and converged time increments of a finished .sta file.
+
+    ``step`` / ``last_increment`` / ``step_time`` locate the last converged
+    increment, the one a continuation job restarts from.
+    """
+    summary = {"increments": 0, "cutbacks": 0, "first_increment": None, "min_increment": None,
+               "completed": False, "step": None, "last_increment": None, "step_time": None}
+    if not os.path.exists(path):
+        return summary
+
+    with open(path, 'r', errors='replace') as f:
+        for line in f:
+            if STA_COMPLETED in line:
+                summary["completed"] = True
+            record = parse_sta_line(line)
+            if record is None:
+                continue
+            if record["cutback"]:
+                summary["cutbacks"] += 1
+                continue
+
+            summary["increments"] = max(summary["increments"], record["increment"])
+            summary["step"] = record["step"]
+            summary["last_increment"] = record["increment"]
+            summary["step_time"] = record["step_time"]
+            if summary["first_increment"] is None:
+                summary["first_increment"] = record["time_increment"]
+            if summary["min_increment"] is None or record["time_increment"] < summary["min_increment"]:
+                summary["min_increment"] = record["time_increment"]
+    return summary
+
+
+def read_dat_summary(path):
+    """Model size, memory estimate and wall clock time reported in a .dat file."""
+    summary = {"variables": None, "memory_mb": None, "minimum_memory_mb": None, "dat_wall_clock_s": None}
+    if not os.path.exists(path):
+        return summary
+
+    in_memory_table = False
+    with open(path, 'r', errors='replace') as f:
+        for line in f:
+            match = DAT_VARIABLES.search(line)
+            if match:
+                summary["variables"] = int(match.group(1))
+            match = DAT_WALLCLOCK.search(line)
+            if match:
+                summary["dat_wall_clock_s"] = float(match.group(1))
+
+            if DAT_MEMORY_HEADER in line:
+                in_memory_table = True
+                summary["memory_mb"] = summary["minimum_memory_mb"] = 0
+                continue
+            if in_memory_table:
+                match = DAT_MEMORY_LINE.match(line)
+                if match:
+                    # One row per MPI process: the job needs their sum.
+                    summary["minimum_memory_mb"] += int(match.group(3))
+                    summary["memory_mb"] += int(match.group(4))
+                elif summary["memory_mb"] and line.strip():
+                    in_memory_table = False
+    return summary
+
+
+def calibration_record(job_dir, job_name, settings, result=None, old_job=None):
+    """Calibration table entry of a run, from its settings and its .sta/.dat files.
+
+    A restart analysis records the job it continues as ``restart_of``: it
+    starts mid-step, so the solver tuning leaves it out of the similar runs.
+    """
+    sta = read_sta_summary(os.path.join(job_dir, job_name + ".sta"))
+    dat = read_dat_summary(os.path.join(job_dir, job_name + ".dat"))
+
+    wall_clock_s = dat["dat_wall_clock_s"]
+    if wall_clock_s is None and result is not None:
+        wall_clock_s = result["wall_clock_s"]
+
+    return {
+        "job": job_name,
+        "recorded": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "dofs": dat["variables"] or settings["dofs"],
+        "nodes": settings["nodes"],
+        "time_period": settings["time_period"],
+        "cpus": settings["cpus"],
+        "memory_mb": dat["memory_mb"] or None,
+        "minimum_memory_mb": dat["minimum_memory_mb"] or None,
+        "wall_clock_s": wall_clock_s,
+        "increments": sta["increments"],
+        "cutbacks": sta["cutbacks"],
+        "first_increment": sta["first_increment"],
+        "min_increment": sta["min_increment"],
+        "completed": sta["completed"] and (result is None or not result["aborted"]),
+        "restart_of": old_job,
+        "settings": dict((key, settings[key]) for key in ("initialInc", "minInc", "maxNumInc", "memoryPercent")),
+    }
+
+
+class AbortRules:
+    """Decides from the .sta records when a job should be stopped.
+
+    - ``min_time_increment`` / ``collapse_increments``: the converged time
+      increment stayed below ``min_time_increment`` for that many increments.
+    - ``max_cutbacks``: total number of cut-back attempts.
+    - ``max_consecutive_cutbacks``: cut-back attempts in a row.
+
+    A rule set to None is disabled.
+    """
+
+    def __init__(self, min_time_increment=None, collapse_increments=5, max_cutbacks=None,
+                 max_consecutive_cutbacks=None):
+        self.min_time_increment = min_time_increment
+        self.collapse_increments = collapse_increments
+        self.max_cutbacks = max_cutbacks
+        self.max_consecutive_cutbacks = max_consecutive_cutbacks
+
+        self.cutbacks = 0
+        self.consecutive_cutbacks = 0
+        self.small_increments = 0
+
+    def check(self, record):
+        if record["cutback"]:
+            self.cutbacks += 1
+            self.consecutive_cutbacks += 1
+        else:
+            self.consecutive_cutbacks = 0
+            if self.min_time_increment is not None and record["time_increment"] < self.min_time_increment:
+                self.small_increments += 1
+            else:
+                self.small_increments = 0
+
+        if self.max_cutbacks is not None and self.cutbacks > self.max_cutbacks:
+            return f"{self.cutbacks} cutbacks (limit {self.max_cutbacks})"
+        if self.max_consecutive_cutbacks is not None and self.consecutive_cutbacks > self.max_consecutive_cutbacks:
+            return f"{self.consecutive_cutbacks} consecutive cutbacks (limit {self.max_consecutive_cutbacks})"
+        if self.min_time_increment is not None and self.small_increments >= self.collapse_increments:
+            return (f"time increment below {self.min_time_increment:g} for "
+                    f"{self.small_increments} increments")
+        return None
+
+
+class JobMonitor:
+    def __init__(self, job_dir, job_name, command, rules, poll_interval=2.0, terminate_command=None):
+        self.job_dir = job_dir
+        self.job_name = job_name
+        self.command = command
+        self.rules = rules
+        self.poll_interval = poll_interval
+        self.terminate_command = terminate_command
+
+        self.tailers = dict(
+            (ext, FileTailer(os.path.join(job_dir, job_name + ext))) for ext in (".sta", ".msg", ".log")
+        )
+        self.jsonl_path = os.path.join(job_dir, job_name + "_monitor.jsonl")
+        self.abort_reason = None
+        self.last_record = None
+
+    def emit(self, event, **data):
+        record = {"time": time.time(), "job": self.job_name, "event": event}
+        record.update(data)
+        with open(self.jsonl_path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+    def poll_files(self):
+        """Streams the new lines of the job files; returns an abort reason or None."""
+        for line in self.tailers[".sta"].read_lines():
+            record = parse_sta_line(line)
+            if record is None:
+                continue
+
+            self.last_record = record
+            self.emit("increment", **record)
+            print(f"[{self.job_name}] step {record['step']} inc {record['increment']} "
+                  f"att {record['attempt']}{'U' if record['cutback'] else ''} "
+                  f"step time {record['step_time']:.4g} dt {record['time_increment']:.3g}", flush=True)
+
+            reason = self.rules.check(record)
+            if reason is not None:
+                return reason
+
+        for line in self.tailers[".msg"].read_lines():
+            if "***ERROR" in line:
+                self.emit("error", message=line.strip())
+                print(f"[{self.job_name}] {line.strip()}", flush=True)
+
+        for line in self.tailers[".log"].read_lines():
+            if line.strip():
+                self.emit("log", message=line.strip())
+
+        return None
+
+    async def pump_stdout(self, stream):
+        while True:
+            line = await stream.readline()
+            if not line:
+                break
+            print(f"[{self.job_name}] {line.decode(errors='replace').rstrip()}", flush=True)
+
+    async def kill_group(self, process):
+        """Kills the job shell and every process it started."""
+        if os.name == "nt":
+            killer = await asyncio.create_subprocess_exec(
+                "taskkill", "/F", "/T", "/PID", str(process.pid),
+                stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL
+            )
+            await killer.wait()
+        else:
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        await process.wait()
+
+    async def terminate(self, process):
+        if not self.terminate_command:
+            await self.kill_group(process)
+            return
+
+        killer = await asyncio.create_subprocess_shell(self.terminate_command, cwd=self.job_dir)
+        await killer.wait()
+        try:
+            await asyncio.wait_for(process.wait(), TERMINATE_GRACE)
+        except asyncio.TimeoutError:
+            await self.kill_group(process)
+
+    async def run(self):
+        started = time.time()
+        for tailer in self.tailers.values():
+            if os.path.exists(tailer.path):
+                os.remove(tailer.path)
+        self.emit("start", command=self.command)
+
+        process = await asyncio.create_subprocess_shell(
+            self.command, cwd=self.job_dir, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+            **PROCESS_GROUP
+        )
+        pump = asyncio.ensure_future(self.pump_stdout(process.stdout))
+
+        while process.returncode is None:
+            self.abort_reason = self.poll_files()
+            if self.abort_reason is not None:
+                print(f"[{self.job_name}] Aborting: {self.abort_reason}", flush=True)
+                self.emit("abort", reason=self.abort_reason)
+                await self.terminate(process)
+                break
+
+            try:
+                await asyncio.wait_for(process.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+        await pump
+        if self.abort_reason is None:
+            self.poll_files()
+
+        result = {
+            "job": self.job_name,
+            "returncode": process.returncode,
+            "aborted": self.abort_reason,
+            "wall_clock_s": time.time() - started,
+            "last_increment": self.last_record,
+        }
+        self.emit("exit", **result)
+        return result
+
+
+def read_monitor_config(path):
+    if not os.path.exists(path):
+        return {"poll_interval": 2.0, "abort_rules": {}}
+
+    with open(path, 'r') as file:
+        return json.load(file)
+
+
+def main():
+    args = parse_args()
+    config = read_monitor_config(args.monitor_config)
+    settings = read_settings(args.settings)
+    auto = settings is not None and settings.get("mode") == "auto"
+
+    if args.record_only:
+        if settings is None:
+            raise SystemExit("--record-only needs the --settings of the run.")
+        record = calibration_record(args.job_dir, args.job, settings, old_job=args.old_job)
+        record_run(record, args.runs)
+        print(f"Run {args.job} recorded in {args.runs}")
+        return
+
+    # The deck does not carry the job resources: in auto mode they go on the command line.
+    cpus = args.cpus or (settings["cpus"] if auto else None)
+    command = f'{args.solver} job={args.job} input="{args.input}" interactive ask_delete=OFF'
+    if cpus:
+        command += f" cpus={cpus}"
+    if auto and settings.get("memory_mb"):
+        command += f' memory="{settings["memory_mb"]} mb"'
+    if args.old_job:
+        command += f" oldjob={args.old_job}"
+
+    abort_rules = dict(config.get("abort_rules", {}))
+    if abort_rules.get("min_time_increment") is None and settings is not None:
+        abort_rules["min_time_increment"] = COLLAPSE_FACTOR * settings["minInc"]
+
+    monitor = JobMonitor(
+        args.job_dir, args.job, command, AbortRules(**abort_rules),
+        poll_interval=config.get("poll_interval", 2.0),
+        terminate_command=f"{args.solver} terminate job={args.job}"
+    )
+    result = asyncio.run(monitor.run())
+
+    if auto:
+        settings["cpus"] = cpus
+        record_run(calibration_record(args.job_dir, args.job, settings, result, args.old_job), args.runs)
+
+    print(f"\n=== Job {result['job']} finished ===")
+    print('Retorno:', result['returncode'])
+    if result['aborted']:
+        print('Aborted:', result['aborted'])
+    print(f"Wall clock: {result['wall_clock_s']:.1f} s")
+    print("==========================")
+
+    sys.exit(1 if result['aborted'] else result['returncode'])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,399 @@
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+FRAMEWORK_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, FRAMEWORK_PATH)
+
+from common import tracing
+from common.array_store import ArrayStore
+from common.solver_tuning import DOFS_PER_NODE
+from common.zoi_model import ZoiFields, ZoiMesh, relaxation_odb_name
+from inp_writer import read_config
+
+CONFIG_PATH = os.path.join(FRAMEWORK_PATH, "config")
+BACKEND_PATH = os.path.join(FRAMEWORK_PATH, "relaxation", "backend")
+REPORT_NAME = "remesh.json"
+
+# Coordinates closer than this fraction of ele_size belong to the same grid line.
+EDGE_TOLERANCE = 1e-6
+
+# Source rectangles transferred per pass, to bound the memory of the overlap pairs.
+CHUNK_SIZE = 500000
+
+DEFAULT_REMESH = {
+    "enabled": False,
+    "fineDepth": 0.05,
+    "growthRate": 1.3,
+    "maxSizeRatio": 8,
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Maps the extracted ZOI fields onto a relaxation mesh graded in depth."
+    )
+    parser.add_argument(
+        "--model-config", default=os.path.join(CONFIG_PATH, "model_config.json"),
+        help="model_config.json of the relaxation model (partData/remeshInformation)"
+    )
+    parser.add_argument("--store", default=os.path.join(CONFIG_PATH, "data"), help="array store of the extraction")
+    return parser.parse_args()
+
+
+def remesh_options(model_config):
+    options = dict(DEFAULT_REMESH)
+    options.update(model_config["partData"].get("remeshInformation", {}))
+    return options
+
+
+def grid_lines(values, tolerance):
+    """Returns the sorted distinct values, merging the ones closer than ``tolerance``."""
+    values = np.sort(np.asarray(values, dtype=np.float64))
+    keep = np.concatenate([[True], np.diff(values) > tolerance])
+    return values[keep]
+
+
+def graded_lines(z_lines, fine_depth, growth_rate, max_ratio):
+    """Returns the subset of the source ``z_lines`` kept by the graded mesh.
+
+    Within ``fine_depth`` of the top every source row is kept; below it each
+    element merges ``growth_rate`` times more source rows than the one above,
+    up to ``max_ratio``. A last element thinner than half of the one above it
+    is merged into it.
+    """
+    top = len(z_lines) - 1
+    kept = [top]
+    index = top
+    group = 1.0
+    while index > 0:
+        if z_lines[top] - z_lines[index] < fine_depth:
+            step = 1
+        else:
+            group = min(group * growth_rate, max_ratio)
+            step = int(round(group))
+        index = max(0, index - step)
+        kept.append(index)
+
+    if len(kept) > 2 and 2 * (kept[-2] - kept[-1]) < kept[-3] - kept[-2]:
+        del kept[-2]
+    return z_lines[sorted(kept)]
+
+
+def element_boxes(mesh):
+    """Returns the (lower, upper) X-Z corners of every element, which must be axis-aligned rectangles."""
+    xz = mesh.plane_coords()[mesh.node_rows(mesh.quads())]
+    lower = xz.min(axis=1)
+    upper = xz.max(axis=1)
+
+    x = xz[:, :, 0]
+    z = xz[:, :, 1]
+    area = 0.5 * np.abs((x * np.roll(z, -1, axis=1) - np.roll(x, -1, axis=1) * z).sum(axis=1))
+    box_area = (upper - lower).prod(axis=1)
+    if not np.allclose(area, box_area, rtol=1e-6):
+        raise ValueError("The ZOI elements are not axis-aligned rectangles in X-Z; they cannot be remeshed.")
+    return lower, upper
+
+
+def node_quarters(mesh, lower, upper):
+    """Splits every element into the four quarters around its nodes.
+
+    Returns (lower, upper, node rows): the quarters tile the ZOI, so a node
+    value held constant over its quarters is the dual-cell (tributary area)
+    view of the nodal field.
+    """
+    centroid = (lower + upper) / 2.0
+    corners = mesh.plane_coords()[mesh.node_rows(mesh.quads())]
+    quarter_lower = np.minimum(corners, centroid[:, None, :]).reshape(-1, 2)
+    quarter_upper = np.maximum(corners, centroid[:, None, :]).reshape(-1, 2)
+    return quarter_lower, quarter_upper, mesh.node_rows(mesh.quads()).ravel()
+
+
+def dual_lines(lines):
+    """Grid lines of the node quarters of a tensor grid: the lines and their midpoints."""
+    dual = np.empty(2 * len(lines) - 1)
+    dual[0::2] = lines
+    dual[1::2] = (lines[:-1] + lines[1:]) / 2.0
+    return dual
+
+
+def overlap_sums(lower, upper, values, x_lines, z_lines):
+    """Integrates piecewise-constant ``values`` on rectangles over the cells of a tensor grid.
+
+    Every rectangle ``[lower, upper]`` is expanded into the grid cells it
+    overlaps (found with ``searchsorted`` on the grid lines) and its exact
+    overlap areas are accumulated with ``bincount``. Rectangles with NaN
+    values are skipped. Returns ``(integrals, areas)``: (n_cells x
+    n_components) and (n_cells), cell = row * n_columns + column.
+    """
+    n_columns = len(x_lines) - 1
+    n_cells = n_columns * (len(z_lines) - 1)
+    values = values.reshape(len(values), -1)
+    integrals = np.zeros((n_cells, values.shape[1]))
+    areas = np.zeros(n_cells)
+
+    valid = np.nonzero(~np.isnan(values).any(axis=1))[0]
+    for start in range(0, len(valid), CHUNK_SIZE):
+        rows = valid[start:start + CHUNK_SIZE]
+        low = lower[rows]
+        high = upper[rows]
+
+        first_column = np.clip(np.searchsorted(x_lines, low[:, 0], 'right') - 1, 0, n_columns - 1)
+        last_column = np.clip(np.searchsorted(x_lines, high[:, 0], 'left') - 1, first_column, n_columns - 1)
+        first_row = np.clip(np.searchsorted(z_lines, low[:, 1], 'right') - 1, 0, len(z_lines) - 2)
+        last_row = np.clip(np.searchsorted(z_lines, high[:, 1], 'left') - 1, first_row, len(z_lines) - 2)
+
+        widths = last_column - first_column + 1
+        counts = widths * (last_row - first_row + 1)
+        source = np.repeat(np.arange(len(rows)), counts)
+        offset = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        column = first_column[source] + offset % widths[source]
+        row = first_row[source] + offset // widths[source]
+
+        width = np.minimum(high[source, 0], x_lines[column + 1]) - np.maximum(low[source, 0], x_lines[column])
+        height = np.minimum(high[source, 1], z_lines[row + 1]) - np.maximum(low[source, 1], z_lines[row])
+        overlap = np.clip(width, 0.0, None) * np.clip(height, 0.0, None)
+        cell = row * n_columns + column
+
+        areas += np.bincount(cell, weights=overlap, minlength=n_cells)
+        chunk_values = values[rows][source]
+        for k in range(values.shape[1]):
+            integrals[:, k] += np.bincount(cell, weights=overlap * chunk_values[:, k], minlength=n_cells)
+
+    return integrals, areas
+
+
+def cell_averages(integrals, areas):
+    averages = np.full(integrals.shape, np.nan)
+    covered = areas > 0
+    averages[covered] = integrals[covered] / areas[covered][:, None]
+    return averages
+
+
+class GradedMesh(object):
+    """Tensor-product relaxation mesh: the source columns, and rows graded in depth.
+
+    Nodes and elements are numbered row by row from the bottom; only the
+    elements covering at least half of their area with source elements are
+    kept, so the graded mesh has the outline of the ZOI.
+    """
+
+    def __init__(self, x_lines, z_lines, y):
+        self.x_lines = x_lines
+        self.z_lines = z_lines
+        self.dual_x = dual_lines(x_lines)
+        self.dual_z = dual_lines(z_lines)
+
+        n_columns = len(x_lines) - 1
+        grid = np.arange(len(x_lines) * len(z_lines)).reshape(len(z_lines), len(x_lines))
+        self.grid_connectivity = np.column_stack([
+            grid[:-1, :-1].ravel(), grid[:-1, 1:].ravel(), grid[1:, 1:].ravel(), grid[1:, :-1].ravel(),
+        ])
+
+        x, z = np.meshgrid(x_lines, z_lines)
+        self.grid_coords = np.column_stack([x.ravel(), np.full(x.size, y), z.ravel()])
+
+        # Node of every quarter cell of the dual grid.
+        dual_columns = (np.arange(len(self.dual_x) - 1) + 1) // 2
+        dual_rows = (np.arange(len(self.dual_z) - 1) + 1) // 2
+        self.dual_nodes = (dual_rows[:, None] * len(x_lines) + dual_columns[None, :]).ravel()
+        self.n_columns = n_columns
+
+    def cell_areas(self):
+        return np.outer(np.diff(self.z_lines), np.diff(self.x_lines)).ravel()
+
+    def dual_areas(self):
+        return np.outer(np.diff(self.dual_z), np.diff(self.dual_x)).ravel()
+
+    def build(self, kept_elements):
+        """Returns the ZoiMesh of ``kept_elements`` (grid element indices) and the grid rows of its nodes."""
+        connectivity = self.grid_connectivity[kept_elements]
+        node_rows = np.unique(connectivity)
+        labels = np.arange(1, len(node_rows) + 1)
+
+        label_of_row = np.zeros(len(self.grid_coords), dtype=np.int64)
+        label_of_row[node_rows] = labels
+        mesh = ZoiMesh(labels, self.grid_coords[node_rows], np.arange(1, len(kept_elements) + 1),
+                       label_of_row[connectivity])
+        return mesh, node_rows
+
+    def sample_elements(self, values, points):
+        """Element values of the graded grid at ``points`` (X-Z)."""
+        column = np.clip(np.searchsorted(self.x_lines, points[:, 0], 'right') - 1, 0, self.n_columns - 1)
+        row = np.clip(np.searchsorted(self.z_lines, points[:, 1], 'right') - 1, 0, len(self.z_lines) - 2)
+        return values[row * self.n_columns + column]
+
+    def sample_nodes(self, values, points):
+        """Bilinear interpolation of the node values of the graded grid at ``points`` (X-Z)."""
+        column = np.clip(np.searchsorted(self.x_lines, points[:, 0], 'right') - 1, 0, self.n_columns - 1)
+        row = np.clip(np.searchsorted(self.z_lines, points[:, 1], 'right') - 1, 0, len(self.z_lines) - 2)
+        s = (points[:, 0] - self.x_lines[column]) / (self.x_lines[column + 1] - self.x_lines[column])
+        t = (points[:, 1] - self.z_lines[row]) / (self.z_lines[row + 1] - self.z_lines[row])
+
+        corners = values[self.grid_connectivity[row * self.n_columns + column]]
+        weights = np.column_stack([(1 - s) * (1 - t), s * (1 - t), s * t, (1 - s) * t])
+        if corners.ndim == 3:
+            weights = weights[:, :, None]
+        return (corners * weights).sum(axis=1)
+
+
+def mapping_error(source, target, weights, surface):
+    """Relative L2 error of ``target`` against ``source``, weighted by area, overall and near the surface."""
+    source = source.reshape(len(source), -1)
+    target = target.reshape(len(target), -1)
+    valid = ~np.isnan(source).any(axis=1) & ~np.isnan(target).any(axis=1)
+
+    def relative(mask):
+        w = weights[mask][:, None]
+        norm = np.sqrt((w * source[mask] ** 2).sum())
+        return float(np.sqrt((w * (source[mask] - target[mask]) ** 2).sum()) / norm) if norm > 0 else 0.0
+
+    return {
+        "l2": relative(valid),
+        "surface_l2": relative(valid & surface),
+        "max": float(np.abs(source[valid] - target[valid]).max()) if valid.any() else 0.0,
+    }
+
+
+def remesh_fields(fields, options, ele_size):
+    """Maps ``fields`` onto a graded mesh; returns (ZoiFields of the graded mesh, report).
+
+    Element fields are transferred as exact overlap-area averages of the
+    source elements, node fields as overlap-area averages of the source node
+    quarters onto the target node quarters, so both keep their integral over
+    the ZOI. The graded rows reuse source grid lines, so the rows of the fine
+    band are copied exactly.
+    """
+    mesh = fields.mesh
+    tolerance = EDGE_TOLERANCE * ele_size
+    lower, upper = element_boxes(mesh)
+    quarter_lower, quarter_upper, quarter_nodes = node_quarters(mesh, lower, upper)
+
+    x_lines = grid_lines(np.concatenate([lower[:, 0], upper[:, 0]]), tolerance)
+    source_z_lines = grid_lines(np.concatenate([lower[:, 1], upper[:, 1]]), tolerance)
+    z_lines = graded_lines(source_z_lines, options["fineDepth"], options["growthRate"], options["maxSizeRatio"])
+    graded = GradedMesh(x_lines, z_lines, float(np.mean(mesh.coords[:, 1])))
+
+    _, covered = overlap_sums(lower, upper, np.zeros((len(lower), 0)), x_lines, z_lines)
+    kept = np.nonzero(covered >= 0.5 * graded.cell_areas())[0]
+    target_mesh, node_rows = graded.build(kept)
+
+    centroids = (lower + upper) / 2.0
+    source_areas = (upper - lower).prod(axis=1)
+    node_weights = np.bincount(quarter_nodes, weights=(quarter_upper - quarter_lower).prod(axis=1),
+                               minlength=mesh.n_nodes)
+    top = source_z_lines[-1]
+    surface = {
+        'elements': top - centroids[:, 1] <= options["fineDepth"],
+        'nodes': top - mesh.plane_coords()[:, 1] <= options["fineDepth"],
+    }
+
+    target = ZoiFields(target_mesh)
+    errors = {}
+    for name in fields.names():
+        entity = fields.entities[name]
+        values = np.asarray(fields[name], dtype=np.float64)
+
+        with tracing.span("transfer", field=name) as span:
+            if entity == 'elements':
+                integrals, areas = overlap_sums(lower, upper, values, x_lines, z_lines)
+                grid_values = cell_averages(integrals, areas)
+                mapped = grid_values[kept]
+                sampled = graded.sample_elements(grid_values, centroids)
+                weights = source_areas
+            else:
+                integrals, areas = overlap_sums(quarter_lower, quarter_upper, values[quarter_nodes],
+                                                graded.dual_x, graded.dual_z)
+                n_grid_nodes = len(graded.grid_coords)
+                node_integrals = np.column_stack([
+                    np.bincount(graded.dual_nodes, weights=integrals[:, k], minlength=n_grid_nodes)
+                    for k in range(integrals.shape[1])
+                ])
+                node_areas = np.bincount(graded.dual_nodes, weights=areas, minlength=n_grid_nodes)
+                grid_values = cell_averages(node_integrals, node_areas)
+                mapped = grid_values[node_rows]
+                sampled = graded.sample_nodes(grid_values, mesh.plane_coords())
+                weights = node_weights
+            span.count(values=mapped.size)
+
+        mapped = mapped[:, 0] if values.ndim == 1 else mapped
+        target.set(name, entity, mapped, fields[name].dtype.name, fields.components.get(name))
+        errors[name] = mapping_error(values, sampled, weights, surface[entity])
+
+    report = {
+        "source": {"nodes": mesh.n_nodes, "elements": mesh.n_elements, "dofs": DOFS_PER_NODE * mesh.n_nodes},
+        "target": {"nodes": target_mesh.n_nodes, "elements": target_mesh.n_elements,
+                   "dofs": DOFS_PER_NODE * target_mesh.n_nodes},
+        "rows": {"source": len(source_z_lines) - 1, "target": len(z_lines) - 1},
+        "options": options,
+        "errors": errors,
+    }
+    return target, report
+
+
+def format_report(odb_name, remeshed_name, report):
+    source = report["source"]
+    target = report["target"]
+    lines = [
+        f"Nodes:    {source['nodes']:>10} -> {target['nodes']:<10}",
+        f"Elements: {source['elements']:>10} -> {target['elements']:<10}"
+        f" (rows {report['rows']['source']} -> {report['rows']['target']})",
+        f"DOFs:     {source['dofs']:>10} -> {target['dofs']:<10}"
+        f" ({1.0 - target['dofs'] / source['dofs']:.1%} fewer, x{source['dofs'] / target['dofs']:.2f})",
+        "",
+        f"{'field':<10}{'L2 error':>12}{'surface L2':>12}{'max error':>14}",
+    ]
+    for name, error in sorted(report["errors"].items()):
+        lines.append(f"{name:<10}{error['l2']:>12.3e}{error['surface_l2']:>12.3e}{error['max']:>14.4g}")
+    return f"=== Remeshing ({odb_name} -> {remeshed_name}) ===\n" + "\n".join(lines)
+
+
+def remesh_zoi(model_config_path, store_path):
+    """Writes the graded remesh of the relaxation ZOI into the store when it is enabled.
+
+    Returns the store key of the remeshed entry, or None when remeshing is disabled.
+    """
+    model_config = read_config(CONFIG_PATH, model_config_path)
+    options = remesh_options(model_config)
+    if not options["enabled"]:
+        return None
+
+    odb_name = model_config["generalInformation"]["odbOrtCutName"]
+    remeshed_name = relaxation_odb_name(model_config, odb_name)
+    ele_size = model_config["partData"]["createPartInformation"]["eleSize"]
+
+    store = ArrayStore(store_path)
+    with tracing.span("read_fields"):
+        fields = ZoiFields.from_store(store, odb_name, sorted(store.fields(odb_name)))
+    with tracing.span("remesh_fields") as span:
+        target, report = remesh_fields(fields, options, ele_size)
+        span.count(nodes=target.mesh.n_nodes, elements=target.mesh.n_elements)
+    with tracing.span("save_arrays"):
+        target.save(store, remeshed_name)
+        with open(os.path.join(store.root, remeshed_name, REPORT_NAME), 'w') as f:
+            json.dump(report, f, indent=4)
+
+    print(format_report(odb_name, remeshed_name, report))
+    print(f"Remeshed fields written to: {os.path.join(store.root, remeshed_name)}")
+    print("==========================")
+    return remeshed_name
+
+
+def main():
+    args = parse_args()
+    trace_path = os.path.join(BACKEND_PATH, "log", "remesh_trace.jsonl")
+    tracer = tracing.configure(trace_path)
+
+    with tracer.span("remesh"):
+        remeshed_name = remesh_zoi(args.model_config, args.store)
+    if remeshed_name is None:
+        print("Remeshing is disabled (partData/remeshInformation/enabled); nothing to do.")
+
+    tracer.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,7 @@ set "input_file=%current_dir%backend\files\inp\ImplicitRelaxation.inp"
 set "input_file_modified=%current_dir%backend\files\inp\ImplicitRelaxation_modified.inp"
 set "job_dir=%current_dir%backend\files\job"
 set "job_name=ImplicitRelaxation_modified"
+set "solver_settings=%current_dir%backend\files\inp\ImplicitRelaxation_solver.json"
 echo Caminho do arquivo .inp: %input_file%
 
 REM Verifica se o arquivo .inp existe
@@ -16,8 +17,11 @@ if exist "%input_file%" (
     REM Muda para o diretório do job
     cd /d "%job_dir%"
 
-    REM Roda o job
-    abaqus job=%job_name% input="%input_file_modified%"
+    REM Roda o job acompanhando os arquivos .sta/.msg/.log
+    python "%current_dir%monitor.py" --job-dir "%job_dir%" --job %job_name% --input "%input_file_modified%" --settings "%solver_settings%"
+
+    REM Extrai os campos relaxados do ODB para o array store
+    if not errorlevel 1 python "%current_dir%extract_relaxed.py"
 
 ) else (
     echo O arquivo %input_file% nao foi encontrado.
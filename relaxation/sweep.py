@@ -0,0 +1,320 @@
+import argparse
+import copy
+import itertools
+import json
+import math
+import os
+import subprocess
+import sys
+import time
+
+FRAMEWORK_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, FRAMEWORK_PATH)
+
+from common.solver_tuning import host_cores, host_memory_mb, read_settings, record_run, settings_path
+from monitor import calibration_record
+
+CONFIG_PATH = os.path.join(FRAMEWORK_PATH, "config")
+SWEEPS_PATH = os.path.join(FRAMEWORK_PATH, "relaxation", "backend", "files", "sweeps")
+
+ABAQUS_CMD_PATH = r'C:\SIMULIA\Commands\abq2023.bat'
+
+# Sweep parameter -> path inside model_config.json.
+PARAMETER_PATHS = {
+    "timePeriod": ("assemblyAndSimulationData", "stepsAndHistoryInformation", "timePeriod"),
+    "timePoints": ("assemblyAndSimulationData", "stepsAndHistoryInformation", "timePoints"),
+    "convCoef": ("assemblyAndSimulationData", "convBC", "convCoef"),
+    "sinkTemp": ("assemblyAndSimulationData", "convBC", "sinkTemp"),
+    "zoi": ("generalInformation", "odbOrtCutName"),
+}
+
+POLL_INTERVAL = 1.0
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Runs a relaxation parameter sweep on this host.")
+    parser.add_argument(
+        "--sweep-config", default=os.path.join(CONFIG_PATH, "sweep_config.json"),
+        help="sweep definition (grid, host budgets and job estimates)"
+    )
+    parser.add_argument(
+        "--name", default=time.strftime("sweep_%Y%m%d_%H%M%S"),
+        help="name of the sweep directory under relaxation/backend/files/sweeps"
+    )
+    parser.add_argument(
+        "--solver", default=f'"{ABAQUS_CMD_PATH}"',
+        help="solver command; it is called as: <solver> job=<name> input=<inp> cpus=<n> memory=\"<mb> mb\" interactive"
+    )
+    parser.add_argument(
+        "--deck", choices=("cae", "writer"), default="cae",
+        help="build the decks with Abaqus CAE + the INP modifier, or with relaxation/inp_writer.py "
+             "(no Abaqus license), like pipeline.py"
+    )
+    parser.add_argument(
+        "--separate-time-periods", action="store_true",
+        help="run every timePeriod of the grid as its own job instead of time points of the longest one"
+    )
+    parser.add_argument(
+        "--skip-decks", action="store_true",
+        help="do not build the decks; every job directory must already hold its modified INP"
+    )
+    return parser.parse_args()
+
+
+def read_json(path):
+    with open(path, 'r') as file:
+        return json.load(file)
+
+
+def write_json(path, data):
+    with open(path, 'w') as file:
+        json.dump(data, file, indent=4)
+
+
+def expand_grid(grid):
+    """Returns one {parameter: value} dict per combination of the grid values."""
+    names = sorted(grid.keys())
+    unknown = [name for name in names if name not in PARAMETER_PATHS]
+    if unknown:
+        raise ValueError(f"Unknown sweep parameter(s): {', '.join(unknown)}")
+
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def merge_time_periods(grid_points):
+    """Folds the grid points that only differ in timePeriod into one job of the longest period.
+
+    The shorter periods are prefixes of the longest relaxation, so they
+    become time points of its field output instead of separate solves.
+    """
+    groups = {}
+    for parameters in grid_points:
+        others = tuple(sorted((name, json.dumps(value)) for name, value in parameters.items() if name != "timePeriod"))
+        groups.setdefault(others, []).append(parameters)
+
+    merged = []
+    for group in groups.values():
+        if len(group) == 1 or "timePeriod" not in group[0]:
+            merged.extend(group)
+            continue
+        parameters = dict(group[0])
+        parameters["timePoints"] = sorted(set(point["timePeriod"] for point in group))
+        parameters["timePeriod"] = parameters["timePoints"][-1]
+        merged.append(parameters)
+    return merged
+
+
+def apply_parameters(model_config, parameters):
+    model_config = copy.deepcopy(model_config)
+    for name, value in parameters.items():
+        *parents, key = PARAMETER_PATHS[name]
+        node = model_config
+        for parent in parents:
+            node = node[parent]
+        node[key] = value
+    return model_config
+
+
+def prepare_jobs(sweep_path, base_model_config, grid, separate_time_periods=False):
+    """Creates one job directory per grid point, each with its own model_config.json."""
+    grid_points = expand_grid(grid)
+    if not separate_time_periods:
+        grid_points = merge_time_periods(grid_points)
+
+    jobs = []
+    for index, parameters in enumerate(grid_points):
+        job_dir = os.path.join(sweep_path, f"job_{index:03d}")
+        os.makedirs(job_dir, exist_ok=True)
+
+        model_config = apply_parameters(base_model_config, parameters)
+        write_json(os.path.join(job_dir, "model_config.json"), model_config)
+        write_json(os.path.join(job_dir, "params.json"), parameters)
+
+        model_name = model_config["generalInformation"]["modelName"]
+        jobs.append({
+            "name": f"job_{index:03d}",
+            "dir": job_dir,
+            "parameters": parameters,
+            "inp": os.path.join(job_dir, f"{model_name}_modified.inp"),
+            "settings": settings_path(job_dir, model_name),
+        })
+    return jobs
+
+
+def build_deck(job, deck="cae"):
+    """Writes the relaxation deck of ``job`` with Abaqus CAE and the INP modifier, or with inp_writer.py.
+
+    When remeshing is enabled the graded remesh of the job ZOI is written first.
+    """
+    env = dict(os.environ)
+    env["BACKEND_PROJECT_PATH"] = os.path.join(FRAMEWORK_PATH, "relaxation", "backend")
+    env["RELAXATION_MODEL_CONFIG"] = os.path.join(job["dir"], "model_config.json")
+    env["RELAXATION_INP_PATH"] = job["dir"]
+
+    subprocess.run(
+        [sys.executable, os.path.join(FRAMEWORK_PATH, "relaxation", "remesh.py"),
+         "--model-config", env["RELAXATION_MODEL_CONFIG"]],
+        check=True, capture_output=True, text=True
+    )
+
+    if deck == "writer":
+        subprocess.run(
+            [sys.executable, os.path.join(FRAMEWORK_PATH, "relaxation", "inp_writer.py"),
+             "--model-config", env["RELAXATION_MODEL_CONFIG"], "--inp-dir", job["dir"]],
+            check=True, capture_output=True, text=True
+        )
+        return
+
+    subprocess.run(
+        f'"{ABAQUS_CMD_PATH}" cae noGUI="relaxation/backend/command.py"',
+        shell=True, check=True, capture_output=True, text=True, env=env, cwd=FRAMEWORK_PATH
+    )
+    subprocess.run(
+        [sys.executable, os.path.join(FRAMEWORK_PATH, "relaxation", "inp_modifier_initial_conditions.py"),
+         "--model-config", env["RELAXATION_MODEL_CONFIG"], "--inp-dir", job["dir"]],
+        check=True, capture_output=True, text=True
+    )
+
+
+def license_tokens(cpus):
+    """Abaqus analysis tokens needed by a job on ``cpus`` cores."""
+    return int(math.floor(5 * cpus ** 0.422))
+
+
+def relative_runtime(cpus, serial_fraction):
+    """Amdahl runtime of a job on ``cpus`` cores, relative to one core."""
+    return serial_fraction + (1.0 - serial_fraction) / cpus
+
+
+def choose_cpus(n_jobs, budget, job_estimate):
+    """Picks the cores per job that give the highest sweep throughput.
+
+    For every candidate core count the number of concurrent jobs is bounded
+    by the core, memory and license-token budgets, and the sweep makespan is
+    the number of waves times the Amdahl runtime of one job. Returns
+    ``(cpus, concurrent jobs)`` of the shortest makespan.
+    """
+    best = None
+    for cpus in range(1, min(budget["cores"], job_estimate["max_cpus"]) + 1):
+        slots = budget["cores"] // cpus
+        slots = min(slots, budget["memory_mb"] // job_estimate["memory_mb"])
+        slots = min(slots, budget["license_tokens"] // license_tokens(cpus))
+        slots = min(slots, n_jobs)
+        if slots < 1:
+            continue
+
+        waves = math.ceil(n_jobs / slots)
+        makespan = waves * relative_runtime(cpus, job_estimate["serial_fraction"])
+        if best is None or makespan < best[2]:
+            best = (cpus, slots, makespan)
+
+    if best is None:
+        raise ValueError("A single job does not fit in the host budgets.")
+
+    return best[0], best[1]
+
+
+def run_jobs(jobs, solver, cpus, slots, memory_mb):
+    """Runs the jobs, ``slots`` at a time, and records queue-wait and wall-clock times."""
+    submitted = time.time()
+    pending = list(jobs)
+    running = []
+
+    while pending or running:
+        while pending and len(running) < slots:
+            job = pending.pop(0)
+            job["cpus"] = cpus
+            job["started"] = time.time()
+            job["queue_wait_s"] = job["started"] - submitted
+            command = (
+                f'{solver} job={job["name"]} input="{job["inp"]}" '
+                f'cpus={cpus} memory="{memory_mb} mb" interactive'
+            )
+            job["log"] = open(os.path.join(job["dir"], "solver_output.txt"), "w")
+            job["process"] = subprocess.Popen(
+                command, shell=True, cwd=job["dir"], stdout=job["log"], stderr=subprocess.STDOUT
+            )
+            running.append(job)
+            print(f"[Sweep] Started {job['name']} ({cpus} cpus) {job['parameters']}")
+
+        time.sleep(POLL_INTERVAL)
+
+        for job in list(running):
+            returncode = job["process"].poll()
+            if returncode is None:
+                continue
+
+            job["wall_clock_s"] = time.time() - job["started"]
+            job["returncode"] = returncode
+            job["log"].close()
+            running.remove(job)
+            print(f"[Sweep] Finished {job['name']} (return code {returncode}) in {job['wall_clock_s']:.1f} s")
+
+    return jobs
+
+
+def record_runs(jobs):
+    """Adds the finished jobs to the solver runs file, so later auto-tuned decks learn from them."""
+    for job in jobs:
+        settings = read_settings(job["settings"])
+        if settings is None or job.get("returncode") is None:
+            continue
+        settings["cpus"] = job["cpus"]
+        record_run(calibration_record(job["dir"], job["name"], settings, {
+            "wall_clock_s": job["wall_clock_s"], "aborted": job["returncode"] != 0,
+        }))
+
+
+def write_report(sweep_path, jobs):
+    report = [{
+        "name": job["name"],
+        "parameters": job["parameters"],
+        "cpus": job.get("cpus"),
+        "returncode": job.get("returncode"),
+        "queue_wait_s": job.get("queue_wait_s"),
+        "wall_clock_s": job.get("wall_clock_s"),
+    } for job in jobs]
+    write_json(os.path.join(sweep_path, "report.json"), report)
+
+    print("\n=== Sweep report ===\n")
+    print(f"{'job':<10}{'cpus':>6}{'rc':>5}{'queue wait [s]':>16}{'wall clock [s]':>16}  parameters")
+    for row in report:
+        print(f"{row['name']:<10}{row['cpus'] or '-':>6}{str(row['returncode']):>5}"
+              f"{row['queue_wait_s'] or 0.0:>16.1f}{row['wall_clock_s'] or 0.0:>16.1f}  {row['parameters']}")
+    print("====================")
+
+
+def main():
+    args = parse_args()
+    sweep_config = read_json(args.sweep_config)
+    base_model_config = read_json(os.path.join(CONFIG_PATH, "model_config.json"))
+
+    sweep_path = os.path.join(SWEEPS_PATH, args.name)
+    jobs = prepare_jobs(sweep_path, base_model_config, sweep_config["grid"], args.separate_time_periods)
+    print(f"[Sweep] {len(jobs)} job(s) prepared in: {sweep_path}")
+
+    if not args.skip_decks:
+        for job in jobs:
+            build_deck(job, args.deck)
+            print(f"[Sweep] Deck built for {job['name']}")
+
+    host = sweep_config.get("host", {})
+    budget = {
+        "cores": host.get("cores") or host_cores(),
+        "memory_mb": host.get("memory_mb") or host_memory_mb(),
+        "license_tokens": host.get("license_tokens") or 10 ** 6,
+    }
+    if budget["memory_mb"] is None:
+        raise ValueError("The host memory could not be read; set host.memory_mb in the sweep config.")
+
+    job_estimate = sweep_config["job"]
+    cpus, slots = choose_cpus(len(jobs), budget, job_estimate)
+    print(f"[Sweep] Budget {budget}: {slots} concurrent job(s) on {cpus} cpus each")
+
+    run_jobs(jobs, args.solver, cpus, slots, job_estimate["memory_mb"])
+    record_runs(jobs)
+    write_report(sweep_path, jobs)
+
+
+if __name__ == "__main__":
+    main()